@@ -0,0 +1,137 @@
+"""期限到来クエリのスケーリングベンチマーク
+
+履歴（sent行）が増えたときに、従来の TEXT 比較 + 全ステータス複合インデックスと、
+scheduled_at_ms + pending専用部分インデックスで、期限到来行の取得時間が
+どう変わるかを比較する。pending行は履歴の量に関係なく PENDING_ROWS 件に固定する。
+
+使い方:
+  uv run python -m benchmarks.due_query_scaling
+  uv run python -m benchmarks.due_query_scaling --sizes 10000 100000 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from src.database.models import PROFILES, Database, to_epoch_ms
+
+LEGACY_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_notif_status_scheduled
+    ON scheduled_notifications(status, scheduled_at)
+"""
+
+LEGACY_QUERY = """
+SELECT * FROM scheduled_notifications
+WHERE status = 'pending' AND scheduled_at <= ?
+ORDER BY scheduled_at
+"""
+
+
+PENDING_ROWS = 200
+
+EPOCH_QUERY = """
+SELECT * FROM scheduled_notifications
+WHERE status = 'pending' AND scheduled_at_ms <= ?
+ORDER BY scheduled_at_ms
+"""
+
+
+def _populate(db: Database, rows: int) -> None:
+    """rows件の履歴を作る。PENDING_ROWS件がpending（半分は期限到来済み）、残りはsent。"""
+    start = datetime.now() - timedelta(days=365)
+    step = timedelta(days=730) / rows
+    pending_every = max(1, rows // PENDING_ROWS)
+    batch = []
+    conn = db.connection
+    for i in range(rows):
+        at = (start + step * i).strftime("%Y-%m-%dT%H:%M:%S")
+        status = "pending" if i % pending_every == 0 else "sent"
+        batch.append((f"bench {i}", at, status, to_epoch_ms(at)))
+        if len(batch) >= 10000:
+            conn.executemany(
+                "INSERT INTO scheduled_notifications (message, scheduled_at, status, scheduled_at_ms) VALUES (?, ?, ?, ?)",
+                batch,
+            )
+            batch.clear()
+    if batch:
+        conn.executemany(
+            "INSERT INTO scheduled_notifications (message, scheduled_at, status, scheduled_at_ms) VALUES (?, ?, ?, ?)",
+            batch,
+        )
+    conn.execute(LEGACY_INDEX)
+    conn.commit()
+    conn.execute("ANALYZE")
+
+
+def _index_pages(conn, name: str) -> int | None:
+    """インデックスのページ数（dbstat が使えないビルドではNone）。"""
+    try:
+        return conn.execute("SELECT COUNT(*) FROM dbstat WHERE name = ?", (name,)).fetchone()[0]
+    except Exception:
+        return None
+
+
+def _time_query(fn, repeat: int) -> float:
+    fn()  # ウォームアップ
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def _measure(rows: int, workdir: Path, repeat: int) -> dict:
+    db = Database(db_path=str(workdir / f"scaling-{rows}.db"), profile=PROFILES["wal"])
+    db.initialize()
+    try:
+        _populate(db, rows)
+        now = datetime.now()
+        now_str = now.strftime("%Y-%m-%dT%H:%M:%S")
+        now_ms = int(now.timestamp() * 1000)
+        conn = db.connection
+
+        due = len(conn.execute(EPOCH_QUERY, (now_ms,)).fetchall())
+        legacy_ms = _time_query(lambda: conn.execute(LEGACY_QUERY, (now_str,)).fetchall(), repeat)
+        epoch_ms = _time_query(lambda: conn.execute(EPOCH_QUERY, (now_ms,)).fetchall(), repeat)
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {EPOCH_QUERY}", (now_ms,))]
+        index_pages = {
+            name: _index_pages(conn, name)
+            for name in ("idx_notif_status_scheduled", "idx_notif_pending_due")
+        }
+    finally:
+        db.close()
+
+    return {
+        "rows": rows,
+        "due_rows": due,
+        "legacy_text_query_ms": round(legacy_ms, 4),
+        "epoch_partial_index_query_ms": round(epoch_ms, 4),
+        "epoch_query_plan": plan,
+        "index_pages": index_pages,
+    }
+
+
+def run(sizes: list[int] | None = None, repeat: int = 50) -> dict:
+    """テーブルサイズごとにクエリ時間を計測し、結果をdictで返す。"""
+    sizes = sizes or [10_000, 100_000, 1_000_000]
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [_measure(rows, Path(tmp), repeat) for rows in sizes]
+    return {"benchmark": "due_query_scaling", "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="期限到来クエリのスケーリングベンチマーク")
+    parser.add_argument("--sizes", type=int, nargs="+", default=None)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    print(json.dumps(run(args.sizes, args.repeat), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
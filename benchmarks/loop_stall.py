@@ -0,0 +1,119 @@
+"""通知リポジトリのイベントループ停止時間ベンチマーク
+
+1,000件のINSERTを一気に流したとき、同じループ上のティッカーがどれだけ
+遅延したか（=ループが止まっていた時間）を同期版・非同期版で比較する。
+
+使い方:
+  uv run python -m benchmarks.loop_stall
+  uv run python -m benchmarks.loop_stall --inserts 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from src.database.models import Database
+from src.database.repository import AsyncNotificationRepository, NotificationRepository
+
+TICK_INTERVAL = 0.001
+
+
+class StallProbe:
+    """一定間隔で起きるティッカー。予定より遅れた分をループ停止時間として数える。"""
+
+    def __init__(self, interval: float = TICK_INTERVAL):
+        self.interval = interval
+        self.max_stall = 0.0
+        self.total_stall = 0.0
+        self.ticks = 0
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            stall = loop.time() - start - self.interval
+            self.ticks += 1
+            if stall > 0:
+                self.total_stall += stall
+                self.max_stall = max(self.max_stall, stall)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def result(self) -> dict:
+        return {
+            "max_stall_ms": round(self.max_stall * 1000, 3),
+            "total_stall_ms": round(self.total_stall * 1000, 3),
+            "ticks": self.ticks,
+        }
+
+
+async def _burst_sync(repo: NotificationRepository, inserts: int) -> None:
+    for i in range(inserts):
+        repo.create(message=f"bench {i}", scheduled_at="2099-01-01T00:00:00")
+        await asyncio.sleep(0)
+
+
+async def _burst_async(repo: AsyncNotificationRepository, inserts: int) -> None:
+    await asyncio.gather(*(
+        repo.create(message=f"bench {i}", scheduled_at="2099-01-01T00:00:00")
+        for i in range(inserts)
+    ))
+
+
+async def _measure(mode: str, inserts: int, workdir: Path) -> dict:
+    db = Database(db_path=str(workdir / f"{mode}.db"))
+    db.initialize()
+    probe = StallProbe()
+    try:
+        probe.start()
+        await asyncio.sleep(0.01)
+        start = time.perf_counter()
+        if mode == "sync":
+            await _burst_sync(NotificationRepository(db), inserts)
+        else:
+            await _burst_async(AsyncNotificationRepository(db), inserts)
+        elapsed = time.perf_counter() - start
+        await probe.stop()
+    finally:
+        db.close()
+    return {"mode": mode, "inserts": inserts, "elapsed_s": round(elapsed, 3), **probe.result()}
+
+
+async def run(inserts: int = 1000) -> dict:
+    """同期版と非同期版を順に計測し、結果をdictで返す。"""
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        results = [
+            await _measure("sync", inserts, workdir),
+            await _measure("async", inserts, workdir),
+        ]
+    return {"benchmark": "loop_stall", "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="通知リポジトリのループ停止時間ベンチマーク")
+    parser.add_argument("--inserts", type=int, default=1000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    print(json.dumps(asyncio.run(run(args.inserts)), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
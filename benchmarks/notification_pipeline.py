@@ -0,0 +1,306 @@
+"""通知パイプライン全体のベンチマーク
+
+リマインダーの登録から送信までを実際の ReminderCog / NotificationRepository で流し、
+次の4つを計測する（送信先は記録するだけのダミーチャンネル）。
+
+- insert: NotificationRepository.create の1件ずつのINSERT速度（同期版・非同期版）
+- due_query: 履歴の行数を変えたときの期限到来行の取得時間
+- drain: 期限到来済みの pending が 10 / 1,000 / 100,000 件あるときの check_scheduled の所要時間
+- lateness: 近い未来に散らしたリマインダーが、scheduled_at から実際に送られるまでの遅れの分布
+
+使い方:
+  uv run python -m benchmarks.notification_pipeline
+  uv run python -m benchmarks.notification_pipeline --drain-sizes 10 1000 --send-latency-ms 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from src.cogs.reminder import ReminderCog
+from src.database.models import PROFILES, Database, to_epoch_ms
+from src.database.repository import AsyncNotificationRepository, NotificationRepository
+
+CHANNELS = 10
+PENDING_ROWS = 200
+INSERT_BATCH = 10000
+
+
+class BenchChannel:
+    """送信時刻とEmbed本文を記録するだけのチャンネル。"""
+
+    def __init__(self, channel_id: int, latency: float, log: list[tuple[float, str]]):
+        self.id = channel_id
+        self.latency = latency
+        self.log = log
+        self.messages = 0
+
+    async def send(self, embed=None, embeds=None) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        sent_at = time.time()
+        self.messages += 1
+        for item in embeds or [embed]:
+            self.log.append((sent_at, item.description))
+
+
+class BenchBot:
+    """ReminderCog が使う分だけを持つBot。"""
+
+    def __init__(self, latency: float = 0.0):
+        self.default_channel_id = 1
+        self.latency = latency
+        self.log: list[tuple[float, str]] = []
+        self.channels: dict[int, BenchChannel] = {}
+
+    async def resolve_channel(self, channel_id: int) -> BenchChannel:
+        channel = self.channels.get(channel_id)
+        if channel is None:
+            channel = self.channels[channel_id] = BenchChannel(channel_id, self.latency, self.log)
+        return channel
+
+    async def wait_until_ready(self) -> None:
+        pass
+
+    @property
+    def messages(self) -> int:
+        return sum(channel.messages for channel in self.channels.values())
+
+
+def _percentiles(values: list[float]) -> dict:
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+    return {
+        "min": round(ordered[0], 3),
+        "p50": pick(0.50),
+        "p90": pick(0.90),
+        "p99": pick(0.99),
+        "max": round(ordered[-1], 3),
+        "mean": round(statistics.fmean(ordered), 3),
+    }
+
+
+def _open(workdir: Path, name: str) -> Database:
+    db = Database(db_path=str(workdir / f"{name}.db"), profile=PROFILES["wal"])
+    db.initialize()
+    return db
+
+
+def _seed(db: Database, rows: int, status: str, at: datetime, step: timedelta) -> None:
+    """rows件を直接INSERTする（計測対象外の準備用）。"""
+    conn = db.connection
+    batch = []
+    for i in range(rows):
+        scheduled_at = (at + step * i).strftime("%Y-%m-%dT%H:%M:%S")
+        batch.append((
+            f"bench {i}", scheduled_at, status, (i % CHANNELS) + 1, to_epoch_ms(scheduled_at),
+        ))
+        if len(batch) >= INSERT_BATCH:
+            _insert(conn, batch)
+    _insert(conn, batch)
+    conn.commit()
+
+
+def _insert(conn, batch: list[tuple]) -> None:
+    conn.executemany(
+        """
+        INSERT INTO scheduled_notifications
+            (message, scheduled_at, status, channel_id, scheduled_at_ms)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        batch,
+    )
+    batch.clear()
+
+
+# ── insert ──
+
+async def _bench_insert(workdir: Path, rows: int) -> dict:
+    db = _open(workdir, "insert")
+    try:
+        repo = NotificationRepository(db)
+        start = time.perf_counter()
+        for i in range(rows):
+            repo.create(message=f"bench {i}", scheduled_at="2099-01-01T00:00:00")
+        sync_s = time.perf_counter() - start
+
+        async_repo = AsyncNotificationRepository(db)
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            async_repo.create(message=f"bench {i}", scheduled_at="2099-01-01T00:00:00")
+            for i in range(rows)
+        ))
+        async_s = time.perf_counter() - start
+    finally:
+        db.close()
+    return {
+        "rows": rows,
+        "sync_per_s": round(rows / sync_s, 1),
+        "async_per_s": round(rows / async_s, 1),
+    }
+
+
+# ── due_query ──
+
+def _bench_due_query(workdir: Path, sizes: list[int], repeat: int) -> list[dict]:
+    results = []
+    for rows in sizes:
+        db = _open(workdir, f"due-{rows}")
+        try:
+            now = datetime.now()
+            _seed(db, rows, "sent", now - timedelta(days=365), timedelta(days=365) / rows)
+            _seed(db, PENDING_ROWS, "pending", now - timedelta(hours=1), timedelta(seconds=1))
+            db.connection.execute("ANALYZE")
+            repo = NotificationRepository(db)
+            now_ms = int(now.timestamp() * 1000)
+
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                due = repo.get_due(now_ms, limit=100)
+                timings.append((time.perf_counter() - start) * 1000)
+        finally:
+            db.close()
+        results.append({
+            "history_rows": rows,
+            "due_rows": len(due),
+            "query_ms": _percentiles(timings),
+        })
+    return results
+
+
+# ── drain ──
+
+async def _bench_drain(workdir: Path, size: int, send_latency: float, coalesce: bool) -> dict:
+    db = _open(workdir, f"drain-{size}")
+    try:
+        _seed(db, size, "pending", datetime.now() - timedelta(hours=1), timedelta(0))
+        bot = BenchBot(latency=send_latency)
+        cog = ReminderCog(bot, AsyncNotificationRepository(db), coalesce_embeds=coalesce)
+
+        start = time.perf_counter()
+        await cog.check_scheduled()
+        elapsed = time.perf_counter() - start
+
+        left = NotificationRepository(db).get_due(int(time.time() * 1000))
+    finally:
+        db.close()
+    return {
+        "pending_rows": size,
+        "coalesce_embeds": coalesce,
+        "elapsed_s": round(elapsed, 3),
+        "notifications_per_s": round(size / elapsed, 1),
+        "messages_sent": bot.messages,
+        "left_pending": len(left),
+    }
+
+
+# ── lateness ──
+
+async def _bench_lateness(
+    workdir: Path, count: int, window: float, send_latency: float
+) -> dict:
+    db = _open(workdir, "lateness")
+    bot = BenchBot(latency=send_latency)
+    cog = ReminderCog(bot, AsyncNotificationRepository(db))
+    try:
+        repo = AsyncNotificationRepository(db)
+        first = datetime.now() + timedelta(seconds=0.5)
+        for i in range(count):
+            at = (first + timedelta(seconds=window * i / count)).isoformat(timespec="milliseconds")
+            await repo.create(message=at, scheduled_at=at, channel_id=(i % CHANNELS) + 1)
+
+        cog.scheduler_loop.start()
+        deadline = time.monotonic() + window + 30
+        while len(bot.log) < count and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+    finally:
+        cog.scheduler_loop.cancel()
+        await asyncio.sleep(0)
+        db.close()
+
+    lateness_ms = [
+        (sent_at - datetime.fromisoformat(scheduled_at).timestamp()) * 1000
+        for sent_at, scheduled_at in bot.log
+    ]
+    return {
+        "reminders": count,
+        "window_s": window,
+        "delivered": len(lateness_ms),
+        "lateness_ms": _percentiles(lateness_ms),
+    }
+
+
+async def run(
+    inserts: int = 2000,
+    due_sizes: Optional[list[int]] = None,
+    drain_sizes: Optional[list[int]] = None,
+    lateness_count: int = 500,
+    lateness_window: float = 5.0,
+    send_latency_ms: float = 0.0,
+    repeat: int = 50,
+) -> dict:
+    """パイプラインの各段階を計測し、結果をdictで返す。"""
+    due_sizes = due_sizes or [1_000, 10_000, 100_000]
+    drain_sizes = drain_sizes or [10, 1_000, 100_000]
+    send_latency = send_latency_ms / 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        insert = await _bench_insert(workdir, inserts)
+        due_query = _bench_due_query(workdir, due_sizes, repeat)
+        drain = []
+        for size in drain_sizes:
+            for coalesce in (False, True):
+                drain.append(await _bench_drain(workdir, size, send_latency, coalesce))
+        lateness = await _bench_lateness(workdir, lateness_count, lateness_window, send_latency)
+    return {
+        "benchmark": "notification_pipeline",
+        "send_latency_ms": send_latency_ms,
+        "insert": insert,
+        "due_query": due_query,
+        "drain": drain,
+        "lateness": lateness,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="通知パイプライン全体のベンチマーク")
+    parser.add_argument("--inserts", type=int, default=2000)
+    parser.add_argument("--due-sizes", type=int, nargs="+", default=None)
+    parser.add_argument("--drain-sizes", type=int, nargs="+", default=None)
+    parser.add_argument("--lateness-count", type=int, default=500)
+    parser.add_argument("--lateness-window", type=float, default=5.0,
+                        help="リマインダーを散らす秒数")
+    parser.add_argument("--send-latency-ms", type=float, default=0.0,
+                        help="ダミーチャンネルの送信1回あたりの遅延")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    result = asyncio.run(run(
+        inserts=args.inserts,
+        due_sizes=args.due_sizes,
+        drain_sizes=args.drain_sizes,
+        lateness_count=args.lateness_count,
+        lateness_window=args.lateness_window,
+        send_latency_ms=args.send_latency_ms,
+        repeat=args.repeat,
+    ))
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
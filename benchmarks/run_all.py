@@ -0,0 +1,115 @@
+"""ベンチマーク一式をまとめて実行し、1つのJSONにする
+
+リリースごとに結果を保存しておき、前回との差分で性能の劣化を見つけるためのもの。
+結果には実行環境（Python / SQLite のバージョン・gitのコミット）も含める。
+
+使い方:
+  uv run python -m benchmarks.run_all --output benchmarks/results/$(date +%Y%m%d).json
+  uv run python -m benchmarks.run_all --quick   # 小さいサイズで一通り（数秒〜数十秒）
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from . import due_query_scaling, loop_stall, notification_pipeline, sqlite_profiles, thread_delete
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, timeout=10,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _environment() -> dict:
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+    }
+
+
+async def run(quick: bool = False) -> dict:
+    """全ベンチマークを順に実行し、結果をまとめたdictを返す。"""
+    if quick:
+        pipeline = dict(
+            inserts=500, due_sizes=[1_000, 10_000], drain_sizes=[10, 1_000],
+            lateness_count=100, lateness_window=1.0, repeat=10,
+        )
+        scaling = dict(sizes=[10_000, 100_000], repeat=10)
+        profile_rows, stall_inserts = 500, 300
+        deletes = dict(threads=100, concurrency=[1, 10], legacy_sample=5)
+    else:
+        pipeline = {}
+        scaling = {}
+        profile_rows, stall_inserts = 2000, 1000
+        deletes = {}
+
+    results = {}
+    durations = {}
+
+    start = time.perf_counter()
+    results["notification_pipeline"] = await notification_pipeline.run(**pipeline)
+    durations["notification_pipeline"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results["due_query_scaling"] = due_query_scaling.run(**scaling)
+    durations["due_query_scaling"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results["sqlite_profiles"] = sqlite_profiles.run(profile_rows)
+    durations["sqlite_profiles"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results["loop_stall"] = await loop_stall.run(stall_inserts)
+    durations["loop_stall"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results["thread_delete"] = await thread_delete.run(**deletes)
+    durations["thread_delete"] = time.perf_counter() - start
+
+    return {
+        "suite": "ebibot",
+        "quick": quick,
+        "environment": _environment(),
+        "duration_s": {name: round(seconds, 2) for name, seconds in durations.items()},
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ベンチマーク一式の実行")
+    parser.add_argument("--quick", action="store_true", help="小さいサイズで一通り実行する")
+    parser.add_argument("--output", default=None, help="結果のJSONを書き出すファイル（省略時は標準出力）")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    result = json.dumps(asyncio.run(run(args.quick)), indent=2, ensure_ascii=False)
+    if args.output:
+        path = Path(args.output)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(result + "\n", encoding="utf-8")
+        print(f"ベンチマーク結果を書き出しました: {path}", file=sys.stderr)
+    else:
+        print(result)
+
+
+if __name__ == "__main__":
+    main()
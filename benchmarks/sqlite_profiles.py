@@ -0,0 +1,81 @@
+"""SQLite性能プロファイル別のスループットベンチマーク
+
+プロファイルごとに新しいDBを作り、通知のINSERT（1件1commit）、
+mark_sent（1件1commit）、record_outcomes（まとめて1commit）の
+1秒あたり処理件数を計測する。
+
+使い方:
+  uv run python -m benchmarks.sqlite_profiles
+  uv run python -m benchmarks.sqlite_profiles --rows 5000 --dir data/bench
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+from src.database.models import PROFILES, Database
+from src.database.repository import NotificationRepository
+
+
+def _rate(count: int, elapsed: float) -> float:
+    return round(count / elapsed, 1) if elapsed > 0 else float("inf")
+
+
+def _measure(name: str, rows: int, workdir: Path) -> dict:
+    db = Database(db_path=str(workdir / f"{name}.db"), profile=PROFILES[name])
+    db.initialize()
+    repo = NotificationRepository(db)
+    try:
+        start = time.perf_counter()
+        ids = [
+            repo.create(message=f"bench {i}", scheduled_at="2099-01-01T00:00:00")
+            for i in range(rows)
+        ]
+        insert_s = time.perf_counter() - start
+
+        half = len(ids) // 2
+        start = time.perf_counter()
+        for notification_id in ids[:half]:
+            repo.mark_sent(notification_id)
+        mark_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        repo.record_outcomes(sent=ids[half:], failed=[])
+        batch_s = time.perf_counter() - start
+    finally:
+        db.close()
+
+    return {
+        "profile": name,
+        "settings": asdict(PROFILES[name]),
+        "rows": rows,
+        "insert_per_s": _rate(rows, insert_s),
+        "mark_sent_per_s": _rate(half, mark_s),
+        "record_outcomes_per_s": _rate(len(ids) - half, batch_s),
+    }
+
+
+def run(rows: int = 2000, directory: str | None = None) -> dict:
+    """全プロファイルを計測し、結果をdictで返す。"""
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        results = [_measure(name, rows, Path(tmp)) for name in PROFILES]
+    return {"benchmark": "sqlite_profiles", "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SQLite性能プロファイル別ベンチマーク")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--dir", default=None, help="DBを作るディレクトリ（実ディスクで測る場合に指定）")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    print(json.dumps(run(args.rows, args.dir), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""スレッド一括削除ベンチマーク（scripts/discord_admin.py delete-threads）
+
+偽Discord（scripts/fake_discord.py）にスレッドを作り、delete_threads() の
+並行数ごとに削除にかかる時間と 429 の件数を測る。比較として、以前の
+「1件ずつ削除して0.5秒待つ」やり方を少数で計測し、全件分に換算する。
+
+使い方:
+  uv run python -m benchmarks.thread_delete
+  uv run python -m benchmarks.thread_delete --threads 1000 --concurrency 1 10 50
+  uv run python -m benchmarks.thread_delete --header-case title   # X-RateLimit-* で返す
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+from aiohttp.test_utils import TestServer
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import discord_admin  # noqa: E402
+from discord_http import DiscordHTTP  # noqa: E402
+from fake_discord import HEADER_CASES, FakeDiscord  # noqa: E402
+
+# 以前の実装が1件ごとに入れていた待ち時間
+LEGACY_DELAY = 0.5
+
+
+@contextlib.asynccontextmanager
+async def _fake_server(threads: int, latency_ms: float, header_case: str):
+    fake = FakeDiscord(threads=threads, latency_ms=latency_ms, header_case=header_case)
+    server = TestServer(fake.app())
+    await server.start_server()
+    try:
+        async with DiscordHTTP("bench", base=str(server.make_url("/api/v10"))) as client:
+            yield fake, client
+    finally:
+        await server.close()
+
+
+def _threads(fake: FakeDiscord) -> list[dict]:
+    return [c for c in fake.channels.values() if c.get("thread_metadata")]
+
+
+async def _measure_legacy(sample: int, threads: int, latency_ms: float, header_case: str) -> dict:
+    async with _fake_server(sample, latency_ms, header_case) as (fake, client):
+        start = time.perf_counter()
+        for t in _threads(fake):
+            await client.delete(f"/channels/{t['id']}")
+            await asyncio.sleep(LEGACY_DELAY)
+        elapsed = time.perf_counter() - start
+    return {
+        "mode": "legacy_sequential",
+        "measured_threads": sample,
+        "threads": threads,
+        "elapsed_s": round(elapsed / sample * threads, 3),
+        "threads_per_s": round(sample / elapsed, 1),
+        "extrapolated": True,
+    }
+
+
+async def _measure_parallel(
+    concurrency: int, threads: int, latency_ms: float, header_case: str
+) -> dict:
+    async with _fake_server(threads, latency_ms, header_case) as (fake, client):
+        targets = _threads(fake)
+        with contextlib.redirect_stdout(io.StringIO()):
+            summary = await discord_admin.delete_threads(client, targets, concurrency=concurrency)
+        learned = client.bucket_for("DELETE", f"/channels/{targets[-1]['id']}").known
+    return {
+        "mode": "parallel",
+        "concurrency": concurrency,
+        "threads": threads,
+        "deleted": summary.deleted,
+        "failed": summary.failed,
+        "elapsed_s": round(summary.elapsed, 3),
+        "threads_per_s": round(summary.done / summary.elapsed, 1),
+        "rate_limited_429": fake.stats["429 route"] + fake.stats["429 global"],
+        "bucket_learned": learned,
+    }
+
+
+async def run(
+    threads: int = 500,
+    concurrency: list[int] | None = None,
+    latency_ms: float = 50.0,
+    legacy_sample: int = 10,
+    header_case: str = "lower",
+) -> dict:
+    """旧方式（換算）と並行数ごとの削除時間を計測し、結果をdictで返す。
+
+    偽Discordは既定で本物と同じ小文字のヘッダ名を返す。bucket_learned は
+    削除ルートのバケットをクライアントがヘッダから覚えたかどうか。
+    """
+    concurrency = concurrency or [1, 10, 50]
+    results = [
+        await _measure_legacy(min(legacy_sample, threads), threads, latency_ms, header_case)
+    ]
+    for n in concurrency:
+        results.append(await _measure_parallel(n, threads, latency_ms, header_case))
+    return {
+        "benchmark": "thread_delete",
+        "latency_ms": latency_ms,
+        "header_case": header_case,
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="スレッド一括削除のベンチマーク")
+    parser.add_argument("--threads", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=None)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--legacy-sample", type=int, default=10)
+    parser.add_argument("--header-case", choices=HEADER_CASES, default="lower")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    result = asyncio.run(run(
+        args.threads, args.concurrency, args.latency_ms, args.legacy_sample, args.header_case
+    ))
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
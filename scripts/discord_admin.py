@@ -7,6 +7,11 @@
   uv run python scripts/discord_admin.py delete-threads --dry-run
   uv run python scripts/discord_admin.py delete-threads --older-than 7
   uv run python scripts/discord_admin.py delete-threads --all
+  uv run python scripts/discord_admin.py delete-threads --older-than 7 --concurrency 20
+  uv run python scripts/discord_admin.py list-threads --index            # 索引を差分同期して表示
+  uv run python scripts/discord_admin.py delete-threads --keep-newest 50 --index
+  uv run python scripts/discord_admin.py sync-index --full
+  uv run python scripts/discord_admin.py export --older-than 7          # 削除前に保存
   uv run python scripts/discord_admin.py delete-thread THREAD_ID
   uv run python scripts/discord_admin.py channel-info CHANNEL_ID
 """
@@ -15,30 +20,46 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import gzip
+import heapq
+import json
 import os
 import sys
-from datetime import datetime, timezone
+import time
+from contextlib import aclosing, nullcontext
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from itertools import islice
 from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, Iterator
 
-import aiohttp
 from dotenv import load_dotenv
 
+from discord_http import DiscordHTTP
+from thread_index import ThreadIndex, archived_at_ms, datetime_to_snowflake, now_ms
+
 # .envを読む（discord-botルートディレクトリ基準）
 load_dotenv(Path(__file__).parent.parent / ".env")
 
-DISCORD_API = "https://discord.com/api/v10"
+DISCORD_API = os.getenv("DISCORD_API_BASE", "https://discord.com/api/v10")
 TOKEN = os.getenv("DISCORD_BOT_TOKEN", "")
 CHANNEL_ID = os.getenv("CLAUDE_CHANNEL_ID") or os.getenv("DISCORD_CHANNEL_ID", "")
+CHECKPOINT_DIR = Path(__file__).parent.parent / "data" / "checkpoints"
+EXPORT_DIR = Path(__file__).parent.parent / "data" / "exports"
+INDEX_PATH = Path(
+    os.getenv("THREAD_INDEX_PATH", Path(__file__).parent.parent / "data" / "threads.db")
+)
+
+PRIVATE_THREAD = 12
+# スレッド列挙で先読みしておくアーカイブのページ数
+PREFETCH_PAGES = 4
 
 
-def make_headers() -> dict[str, str]:
+def open_client() -> DiscordHTTP:
     if not TOKEN:
         print("ERROR: DISCORD_BOT_TOKEN が設定されていません", file=sys.stderr)
         sys.exit(1)
-    return {
-        "Authorization": f"Bot {TOKEN}",
-        "Content-Type": "application/json",
-    }
+    return DiscordHTTP(TOKEN, base=DISCORD_API)
 
 
 # ─────────────────────────────────────────────────
@@ -53,41 +74,27 @@ def snowflake_to_datetime(snowflake_id: int | str) -> datetime:
     return datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc)
 
 
-async def handle_rate_limit(response: aiohttp.ClientResponse) -> None:
-    """レートリミット（429）のとき指定秒数待つ"""
-    if response.status == 429:
-        data = await response.json()
-        retry_after = float(data.get("retry_after", 1.0))
-        print(f"  ⏳ Rate limit — {retry_after:.1f}秒待機...")
-        await asyncio.sleep(retry_after)
-
-
 # ─────────────────────────────────────────────────
 # API呼び出しヘルパー
 # ─────────────────────────────────────────────────
 
-async def get_channel(session: aiohttp.ClientSession, channel_id: str) -> dict:
-    async with session.get(f"{DISCORD_API}/channels/{channel_id}") as r:
-        r.raise_for_status()
-        return await r.json()
+async def get_channel(client: DiscordHTTP, channel_id: str) -> dict:
+    return (await client.get(f"/channels/{channel_id}")).json_or_raise()
 
 
-async def get_active_threads(session: aiohttp.ClientSession, guild_id: str) -> list[dict]:
+async def get_active_threads(client: DiscordHTTP, guild_id: str) -> list[dict]:
     """ギルド内のアクティブなスレッドをすべて取得"""
-    async with session.get(f"{DISCORD_API}/guilds/{guild_id}/threads/active") as r:
-        r.raise_for_status()
-        data = await r.json()
-        return data.get("threads", [])
+    data = (await client.get(f"/guilds/{guild_id}/threads/active")).json_or_raise()
+    return data.get("threads", [])
 
 
-async def get_archived_threads(
-    session: aiohttp.ClientSession,
+async def iter_archived_threads(
+    client: DiscordHTTP,
     channel_id: str,
     private: bool = False,
-) -> list[dict]:
-    """アーカイブ済みスレッドをページネーションで全件取得"""
+) -> AsyncIterator[list[dict]]:
+    """アーカイブ済みスレッドを1ページ（最大100件）ずつ返す"""
     path = "private" if private else "public"
-    threads: list[dict] = []
     before: str | None = None
 
     while True:
@@ -95,63 +102,561 @@ async def get_archived_threads(
         if before:
             params["before"] = before
 
-        async with session.get(
-            f"{DISCORD_API}/channels/{channel_id}/threads/archived/{path}",
-            params=params,
-        ) as r:
-            if r.status == 403:
-                # プライベートスレッドにアクセスできない場合はスキップ
-                break
-            r.raise_for_status()
-            data = await r.json()
+        r = await client.get(f"/channels/{channel_id}/threads/archived/{path}", params=params)
+        if r.status == 403:
+            # プライベートスレッドにアクセスできない場合はスキップ
+            return
+        data = r.json_or_raise()
 
         batch = data.get("threads", [])
-        threads.extend(batch)
+        if batch:
+            yield batch
 
-        if not data.get("has_more", False):
-            break
+        if not data.get("has_more", False) or not batch:
+            return
 
-        # 最後のスレッドのIDを次のbeforeに使う
-        if batch:
-            before = batch[-1]["id"]
+        # before はアーカイブ日時（ISO8601）。列挙中に前のページのスレッドが
+        # 削除されても続きのページがずれない
+        before = batch[-1]["thread_metadata"]["archive_timestamp"]
+
+
+async def get_archived_threads(
+    client: DiscordHTTP,
+    channel_id: str,
+    private: bool = False,
+) -> list[dict]:
+    """アーカイブ済みスレッドをページネーションで全件取得"""
+    return [t async for page in iter_archived_threads(client, channel_id, private) for t in page]
+
+
+async def iter_threads(client: DiscordHTTP, channel_id: str, guild_id: str) -> AsyncIterator[dict]:
+    """channel_id 配下のスレッドを、ページが届いた順に1件ずつ返す
+
+    アクティブ・アーカイブ(public)・アーカイブ(private) の取得を並行に走らせる。
+    先読みは PREFETCH_PAGES ページまでで、それ以上は呼び出し側が読み進めるまで
+    取得を止めるので、スレッド数が多くてもメモリに全件を溜めない。
+    アクティブを先に返し、列挙中にアーカイブされてアーカイブ側にも
+    出てきたスレッドは飛ばす。
+    """
+    pages: asyncio.Queue = asyncio.Queue(maxsize=PREFETCH_PAGES)
+
+    async def fetch_archived(private: bool) -> None:
+        try:
+            async for page in iter_archived_threads(client, channel_id, private):
+                await pages.put(page)
+        except Exception as e:
+            await pages.put(e)
         else:
-            break
+            await pages.put(None)
+
+    active_task = asyncio.create_task(get_active_threads(client, guild_id))
+    producers = [asyncio.create_task(fetch_archived(private)) for private in (False, True)]
+    try:
+        active_ids = set()
+        for t in await active_task:
+            if t.get("parent_id") == channel_id:
+                active_ids.add(t["id"])
+                yield t
+
+        finished = 0
+        while finished < len(producers):
+            page = await pages.get()
+            if page is None:
+                finished += 1
+                continue
+            if isinstance(page, Exception):
+                raise page
+            for t in page:
+                if t["id"] not in active_ids:
+                    yield t
+    finally:
+        for task in (active_task, *producers):
+            task.cancel()
+        await asyncio.gather(active_task, *producers, return_exceptions=True)
+
+
+def is_archived(thread: dict) -> bool:
+    return thread.get("thread_metadata", {}).get("archived", False)
+
 
-    return threads
+@dataclass
+class TargetSelection:
+    """列挙したスレッドから削除対象を選ぶ条件
+
+    keep_newest のときは新しいN件だけを最小ヒープに持ち、ヒープから押し出された
+    （＝最新N件に入らないと確定した）スレッドをその場で削除対象として返す。
+    """
+
+    older_than_days: int | None = None
+    keep_newest: int | None = None
+    seen: int = 0
+    kept: list[dict] = field(default_factory=list)
+
+    async def select(self, threads: AsyncIterable[dict]) -> AsyncIterator[dict]:
+        now = datetime.now(tz=timezone.utc)
+        heap: list[tuple[int, dict]] = []
+        async with aclosing(threads):
+            async for t in threads:
+                self.seen += 1
+                if self.keep_newest is not None:
+                    item = (int(t["id"]), t)
+                    if len(heap) < self.keep_newest:
+                        heapq.heappush(heap, item)
+                        continue
+                    if heap and item[0] > heap[0][0]:
+                        item = heapq.heapreplace(heap, item)
+                    yield item[1]
+                elif self.older_than_days is not None:
+                    if (now - snowflake_to_datetime(t["id"])).days >= self.older_than_days:
+                        yield t
+                else:
+                    yield t
+        self.kept = [t for _, t in sorted(heap, key=lambda item: item[0], reverse=True)]
+
+    def from_index(self, index: ThreadIndex, channel_id: str) -> Iterator[dict]:
+        """select() と同じ条件で、削除対象を索引から新しい順に返す。
+
+        どちらの条件も「このIDより小さい」に置き換えられるので、主キーの範囲を読むだけ。
+        """
+        self.seen = index.count(channel_id)
+        below_id = None
+        if self.keep_newest:
+            self.kept = list(islice(index.threads(channel_id), self.keep_newest))
+            # N件に満たなければ削除対象なし
+            below_id = index.nth_newest_id(channel_id, self.keep_newest) or 0
+        elif self.keep_newest is None and self.older_than_days is not None:
+            cutoff = datetime.now(tz=timezone.utc) - timedelta(days=self.older_than_days)
+            below_id = datetime_to_snowflake(cutoff)
+        return index.threads(channel_id, below_id=below_id)
+
+
+@dataclass
+class SyncResult:
+    """索引の同期結果"""
+
+    full: bool
+    fetched: int = 0
+    pruned: int = 0
+    elapsed: float = 0.0
+
+
+async def sync_index(
+    client: DiscordHTTP,
+    index: ThreadIndex,
+    channel_id: str,
+    guild_id: str,
+    *,
+    full: bool = False,
+) -> SyncResult:
+    """channel_id 配下のスレッドを索引に反映する
+
+    前回の同期位置があれば差分だけ取る:
+    - アクティブスレッドは1リクエストで全件取れるので毎回取り直す
+    - アーカイブは archive_timestamp の新しい順に返るので、前回見た最新の
+      archive_timestamp より古いスレッドが出てきたページで止める
+    - 前回アクティブで、今回どちらにも出てこなかったスレッドは削除されたとみなす
+    同期位置がないか full=True のときは全件取り、見かけなかった行を全て消す
+    （差分同期では、アーカイブ済みのまま他所で削除されたスレッドには気付けない）。
+    """
+    full = full or not index.synced(channel_id)
+    started = now_ms()
+    start = time.monotonic()
+    result = SyncResult(full=full)
+
+    async def sync_active() -> None:
+        threads = [
+            t for t in await get_active_threads(client, guild_id)
+            if t.get("parent_id") == channel_id
+        ]
+        index.upsert(threads, started)
+        result.fetched += len(threads)
+
+    async def sync_archived(private: bool) -> None:
+        kind = "private" if private else "public"
+        cursor = None if full else index.cursor(channel_id, kind)
+        newest = cursor or 0
+        async with aclosing(iter_archived_threads(client, channel_id, private)) as pages:
+            async for page in pages:
+                index.upsert(page, started)
+                result.fetched += len(page)
+                stamps = [archived_at_ms(t) or 0 for t in page]
+                newest = max(newest, *stamps)
+                if cursor is not None and min(stamps) < cursor:
+                    break
+        index.set_cursor(channel_id, kind, newest, started)
+
+    await asyncio.gather(sync_active(), sync_archived(False), sync_archived(True))
+    result.pruned = index.prune(channel_id, started, active_only=not full)
+    index.commit()
+    result.elapsed = time.monotonic() - start
+    return result
+
+
+# 削除結果
+DELETED = "deleted"
+MISSING = "missing"
+FAILED = "failed"
 
 
 async def delete_channel(
-    session: aiohttp.ClientSession,
+    client: DiscordHTTP,
     channel_id: str,
     name: str = "",
     dry_run: bool = False,
 ) -> bool:
-    """スレッド（チャンネル）を削除。dry_runのときはスキップ"""
+    """スレッド（チャンネル）を削除。dry_runのときはスキップ
+
+    レートリミット（429）の待機と再送は DiscordHTTP が行う。
+    """
     label = name or channel_id
     if dry_run:
         print(f"  [DRY-RUN] 削除をスキップ: {label}")
         return True
-
-    # リトライループ（レートリミット対応）
-    for attempt in range(5):
-        async with session.delete(f"{DISCORD_API}/channels/{channel_id}") as r:
-            if r.status == 429:
-                await handle_rate_limit(r)
+    return await _delete(client, channel_id, label) != FAILED
+
+
+async def _delete(client: DiscordHTTP, channel_id: str, label: str) -> str:
+    r = await client.delete(f"/channels/{channel_id}")
+    if r.ok:
+        print(f"  ✅ 削除: {label}")
+        return DELETED
+    if r.status == 404:
+        print(f"  ⚠️  既に存在しない: {label}")
+        return MISSING
+    if r.status == 403:
+        print(f"  ❌ 権限なし: {label}")
+        return FAILED
+    print(f"  ❌ エラー {r.status}: {label}")
+    return FAILED
+
+
+class Checkpoint:
+    """削除済みスレッドIDを1行ずつ追記するファイル。
+
+    中断して再実行したとき、ここに載っているスレッドは飛ばす。
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.done: set[str] = set()
+        self._file = None
+
+    def load(self) -> set[str]:
+        if self.path.exists():
+            self.done = {
+                line.strip()
+                for line in self.path.read_text(encoding="utf-8").splitlines()
+                if line.strip()
+            }
+        return self.done
+
+    def add(self, thread_id: str) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("a", encoding="utf-8")
+        self._file.write(f"{thread_id}\n")
+        self._file.flush()
+        self.done.add(thread_id)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self) -> None:
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+
+@dataclass
+class DeleteSummary:
+    """一括削除の結果"""
+
+    total: int = 0
+    deleted: int = 0
+    missing: int = 0
+    failed: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def done(self) -> int:
+        return self.deleted + self.missing + self.failed
+
+    def add(self, outcome: str) -> None:
+        if outcome == DELETED:
+            self.deleted += 1
+        elif outcome == MISSING:
+            self.missing += 1
+        else:
+            self.failed += 1
+
+
+async def _aiter(items: Iterable[dict] | AsyncIterable[dict]) -> AsyncIterator[dict]:
+    if isinstance(items, AsyncIterable):
+        async with aclosing(items):
+            async for item in items:
+                yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def delete_threads(
+    client: DiscordHTTP,
+    targets: Iterable[dict] | AsyncIterable[dict],
+    *,
+    concurrency: int = 10,
+    checkpoint: Checkpoint | None = None,
+    on_removed: Callable[[str], None] | None = None,
+    progress_interval: float = 5.0,
+) -> DeleteSummary:
+    """targets を concurrency 本のワーカーで並行に削除する。
+
+    targets は非同期イテレータでもよく、列挙が終わる前から削除を始める。
+    実際の送信ペースは DiscordHTTP がレートリミットのバケットに合わせて決めるので、
+    ここでは固定の sleep をしない。checkpoint に載っているスレッドは飛ばし、
+    削除できた（または既になかった）スレッドは checkpoint に追記して
+    on_removed(thread_id) を呼ぶ。
+    """
+    summary = DeleteSummary()
+    done_ids = checkpoint.done if checkpoint is not None else set()
+    if done_ids:
+        print(f"   チェックポイントから再開: {len(done_ids)} 件は削除済みのため飛ばします")
+
+    listed = False
+
+    async def pending() -> AsyncIterator[dict]:
+        nonlocal listed
+        async for t in _aiter(targets):
+            summary.total += 1
+            if t["id"] in done_ids:
+                summary.skipped += 1
+            else:
+                yield t
+        listed = True
+
+    now = datetime.now(tz=timezone.utc)
+    start = time.monotonic()
+
+    async def delete_one(t: dict) -> None:
+        age_days = (now - snowflake_to_datetime(t["id"])).days
+        label = f"[{age_days:3d}日前] {t.get('name', '(無題)')[:50]}"
+        outcome = await _delete(client, t["id"], label)
+        summary.add(outcome)
+        if outcome == FAILED:
+            return
+        if checkpoint is not None:
+            checkpoint.add(t["id"])
+        if on_removed is not None:
+            on_removed(t["id"])
+
+    try:
+        await run_workers(
+            pending(), delete_one, concurrency,
+            progress=lambda: (summary.done, summary.total - summary.skipped, listed),
+            progress_interval=progress_interval,
+        )
+    finally:
+        summary.elapsed = time.monotonic() - start
+    return summary
+
+
+async def run_workers(
+    items: AsyncIterator[dict],
+    handle: Callable[[dict], Awaitable[None]],
+    concurrency: int,
+    *,
+    progress: Callable[[], tuple[int, int, bool]] | None = None,
+    progress_interval: float = 5.0,
+) -> None:
+    """items を concurrency 本のワーカーで handle する
+
+    progress は (処理済み件数, 見つかった件数, 列挙が終わったか) を返す関数で、
+    progress_interval 秒ごとに進捗を表示する。
+    """
+    lock = asyncio.Lock()
+    start = time.monotonic()
+
+    async def worker() -> None:
+        while True:
+            # 非同期ジェネレータは同時に読み進められないので1本ずつ取り出す
+            async with lock:
+                item = await anext(items, None)
+            if item is None:
+                return
+            await handle(item)
+
+    async def report_progress() -> None:
+        while True:
+            await asyncio.sleep(progress_interval)
+            done, found, listed = progress()
+            elapsed = time.monotonic() - start
+            rate = done / elapsed if elapsed else 0.0
+            if not listed:
+                print(f"  📊 進捗 {done}/{found}+ — {rate:.1f}件/秒, スレッド列挙中")
                 continue
-            if r.status in (200, 204):
-                print(f"  ✅ 削除: {label}")
-                return True
-            if r.status == 404:
-                print(f"  ⚠️  既に存在しない: {label}")
-                return True
-            if r.status == 403:
-                print(f"  ❌ 権限なし: {label}")
-                return False
-            print(f"  ❌ エラー {r.status}: {label}")
-            return False
-        break
-
-    return False
+            left = found - done
+            eta = f"残り約{left / rate:.0f}秒" if rate else "残り不明"
+            print(
+                f"  📊 進捗 {done}/{found} "
+                f"({done * 100 / max(found, 1):.0f}%) — {rate:.1f}件/秒, {eta}"
+            )
+
+    reporter = asyncio.create_task(report_progress()) if progress is not None else None
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, concurrency))]
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        await items.aclose()
+
+
+def print_summary(summary: DeleteSummary, rate_limited: int) -> None:
+    rate = summary.done / summary.elapsed if summary.elapsed else 0.0
+    print("\n📊 サマリー:")
+    print(f"  削除: {summary.deleted}")
+    print(f"  既に存在しない: {summary.missing}")
+    print(f"  失敗: {summary.failed}")
+    if summary.skipped:
+        print(f"  チェックポイントで飛ばした: {summary.skipped}")
+    print(f"  所要時間: {summary.elapsed:.1f}秒（{rate:.1f}件/秒, 429: {rate_limited}回）")
+
+
+# ─────────────────────────────────────────────────
+# エクスポート
+# <出力先>/<thread_id>.jsonl.gz : メッセージ1件1行（新しい順）
+# <出力先>/<thread_id>.json     : スレッド情報と再開位置
+# ─────────────────────────────────────────────────
+
+EXPORTED = "exported"
+EXPORT_SKIPPED = "skipped"
+
+
+def _write_json_atomic(path: Path, data: dict) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(path)
+
+
+async def export_thread(client: DiscordHTTP, thread: dict, out_dir: Path) -> tuple[str, int]:
+    """1スレッドのメッセージを before= で遡りながら gzip の JSONL に追記する。
+
+    1ページ（100件）ごとに gzip のメンバーを閉じてから、書き終えたファイルサイズと
+    次の before を <thread_id>.json に保存する。中断後の再実行では、
+    保存したサイズより後ろ（書きかけのページ）を切り捨てて続きから取得する。
+    (結果, このスレッドで今回書き出したメッセージ数) を返す。
+    """
+    thread_id = thread["id"]
+    state_path = out_dir / f"{thread_id}.json"
+    data_path = out_dir / f"{thread_id}.jsonl.gz"
+    if state_path.exists():
+        state = json.loads(state_path.read_text(encoding="utf-8"))
+    else:
+        state = {"thread": thread, "before": None, "size": 0, "messages": 0, "done": False}
+    if state["done"]:
+        return EXPORT_SKIPPED, 0
+    if data_path.exists():
+        with data_path.open("r+b") as f:
+            f.truncate(state["size"])
+
+    written = 0
+    while not state["done"]:
+        params = {"limit": 100}
+        if state["before"]:
+            params["before"] = state["before"]
+        r = await client.get(f"/channels/{thread_id}/messages", params=params)
+        if not r.ok:
+            print(f"  ❌ エラー {r.status}: {thread.get('name', thread_id)[:50]}")
+            return FAILED, written
+        page = r.data or []
+
+        if page:
+            lines = "".join(json.dumps(m, ensure_ascii=False) + "\n" for m in page)
+            with gzip.open(data_path, "ab") as f:
+                f.write(lines.encode("utf-8"))
+            state["before"] = page[-1]["id"]
+            state["size"] = data_path.stat().st_size
+            state["messages"] += len(page)
+            written += len(page)
+        state["done"] = len(page) < 100
+        _write_json_atomic(state_path, state)
+
+    print(f"  📦 書き出し: {thread.get('name', '(無題)')[:50]} ({state['messages']} 件)")
+    return EXPORTED, written
+
+
+@dataclass
+class ExportSummary:
+    """エクスポートの結果"""
+
+    total: int = 0
+    exported: int = 0
+    skipped: int = 0
+    failed: int = 0
+    messages: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def done(self) -> int:
+        return self.exported + self.skipped + self.failed
+
+
+async def export_threads(
+    client: DiscordHTTP,
+    threads: Iterable[dict] | AsyncIterable[dict],
+    out_dir: Path,
+    *,
+    concurrency: int = 4,
+    progress_interval: float = 5.0,
+) -> ExportSummary:
+    """threads を concurrency 本のワーカーで並行にエクスポートする。
+
+    1スレッドの中はページを順に遡るしかないので、並行にするのはスレッド単位。
+    送信ペースは削除と同じく DiscordHTTP がバケットに合わせて決める。
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    summary = ExportSummary()
+    listed = False
+    start = time.monotonic()
+
+    async def pending() -> AsyncIterator[dict]:
+        nonlocal listed
+        async for t in _aiter(threads):
+            summary.total += 1
+            yield t
+        listed = True
+
+    async def export_one(t: dict) -> None:
+        outcome, written = await export_thread(client, t, out_dir)
+        summary.messages += written
+        if outcome == EXPORTED:
+            summary.exported += 1
+        elif outcome == EXPORT_SKIPPED:
+            summary.skipped += 1
+        else:
+            summary.failed += 1
+
+    try:
+        await run_workers(
+            pending(), export_one, concurrency,
+            progress=lambda: (summary.done, summary.total, listed),
+            progress_interval=progress_interval,
+        )
+    finally:
+        summary.elapsed = time.monotonic() - start
+    return summary
+
+
+def read_export(path: Path) -> Iterator[dict]:
+    """エクスポートした <thread_id>.jsonl.gz のメッセージを1件ずつ返す"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
 
 
 # ─────────────────────────────────────────────────
@@ -160,8 +665,8 @@ async def delete_channel(
 
 async def cmd_channel_info(channel_id: str) -> None:
     """チャンネル情報を表示（guild_idの確認などに使う）"""
-    async with aiohttp.ClientSession(headers=make_headers()) as session:
-        info = await get_channel(session, channel_id)
+    async with open_client() as client:
+        info = await get_channel(client, channel_id)
 
     print(f"チャンネル情報:")
     print(f"  ID       : {info['id']}")
@@ -171,36 +676,85 @@ async def cmd_channel_info(channel_id: str) -> None:
     print(f"  Parent   : {info.get('parent_id', 'なし')}")
 
 
-async def cmd_list_threads(channel_id: str) -> None:
-    """指定チャンネル配下のスレッドを一覧表示"""
-    async with aiohttp.ClientSession(headers=make_headers()) as session:
+async def print_threads(title: str, threads: Iterable[dict] | AsyncIterable[dict]) -> None:
+    print(f"\n📌 チャンネル: {title}\n")
+
+    now = datetime.now(tz=timezone.utc)
+    active = archived_pub = archived_priv = 0
+    async for t in _aiter(threads):
+        if not is_archived(t):
+            active += 1
+        elif t.get("type") == PRIVATE_THREAD:
+            archived_priv += 1
+        else:
+            archived_pub += 1
+        age_days = (now - snowflake_to_datetime(t["id"])).days
+        mark = "🗂" if is_archived(t) else "💬"
+        print(f"  {mark} [{age_days:3d}日前] {t.get('name', '(無題)')[:60]}  (id: {t['id']})")
+
+    print(f"\n   アクティブ: {active} / アーカイブ(public): {archived_pub} / アーカイブ(private): {archived_priv}")
+    print(f"   合計: {active + archived_pub + archived_priv} スレッド")
+
+
+async def sync_and_report(
+    client: DiscordHTTP,
+    index: ThreadIndex,
+    channel_id: str,
+    guild_id: str,
+    full: bool = False,
+) -> SyncResult:
+    result = await sync_index(client, index, channel_id, guild_id, full=full)
+    mode = "全件" if result.full else "差分"
+    print(
+        f"🔄 索引を同期（{mode}）: {result.fetched} 件取得, {result.pruned} 件を索引から削除, "
+        f"{result.elapsed:.1f}秒 — {index.count(channel_id)} スレッド ({index.path})"
+    )
+    return result
+
+
+async def cmd_list_threads(channel_id: str, use_index: bool = False, sync: bool = True) -> None:
+    """指定チャンネル配下のスレッドを一覧表示
+
+    索引を使わないときは取得できた順に、索引を使うときは新しい順に表示する。
+    """
+    if use_index and not sync:
+        with ThreadIndex(INDEX_PATH) as index:
+            await print_threads(channel_id, index.threads(channel_id))
+        return
+
+    async with open_client() as client:
         # guild_idをチャンネル情報から取得
-        ch_info = await get_channel(session, channel_id)
+        ch_info = await get_channel(client, channel_id)
         guild_id = ch_info.get("guild_id")
         if not guild_id:
             print("ERROR: guild_id が取得できません", file=sys.stderr)
             return
+        title = ch_info.get("name", channel_id)
 
-        # アクティブスレッド
-        active = await get_active_threads(session, guild_id)
-        # このチャンネルの子スレッドだけ絞り込む
-        active = [t for t in active if t.get("parent_id") == channel_id]
+        if not use_index:
+            await print_threads(title, iter_threads(client, channel_id, guild_id))
+            return
+        with ThreadIndex(INDEX_PATH) as index:
+            await sync_and_report(client, index, channel_id, guild_id)
+            await print_threads(title, index.threads(channel_id))
 
-        # アーカイブ済みスレッド（public + private）
-        archived_pub = await get_archived_threads(session, channel_id, private=False)
-        archived_priv = await get_archived_threads(session, channel_id, private=True)
 
-    all_threads = active + archived_pub + archived_priv
+async def cmd_sync_index(channel_id: str, full: bool) -> None:
+    """スレッド索引を同期する（full のときは作り直す）"""
+    async with open_client() as client:
+        ch_info = await get_channel(client, channel_id)
+        guild_id = ch_info.get("guild_id")
+        if not guild_id:
+            print("ERROR: guild_id が取得できません", file=sys.stderr)
+            return
+        with ThreadIndex(INDEX_PATH) as index:
+            await sync_and_report(client, index, channel_id, guild_id, full=full)
 
-    print(f"\n📌 チャンネル: {ch_info.get('name', channel_id)}")
-    print(f"   アクティブ: {len(active)} / アーカイブ(public): {len(archived_pub)} / アーカイブ(private): {len(archived_priv)}")
-    print(f"   合計: {len(all_threads)} スレッド\n")
 
-    for t in sorted(all_threads, key=lambda x: int(x["id"]), reverse=True):
-        created = snowflake_to_datetime(t["id"])
-        age_days = (datetime.now(tz=timezone.utc) - created).days
-        archived = "🗂" if t.get("thread_metadata", {}).get("archived") else "💬"
-        print(f"  {archived} [{age_days:3d}日前] {t.get('name', '(無題)')[:60]}  (id: {t['id']})")
+def print_kept(selection: TargetSelection) -> None:
+    print(f"   保持（最新{selection.keep_newest}件）:")
+    for t in selection.kept:
+        print(f"     ✅ {t.get('name', '(無題)')[:60]}")
 
 
 async def cmd_delete_threads(
@@ -209,81 +763,154 @@ async def cmd_delete_threads(
     delete_all: bool,
     keep_newest: int | None,
     dry_run: bool,
+    concurrency: int = 10,
+    checkpoint_path: str | None = None,
+    use_index: bool = False,
+    sync: bool = True,
 ) -> None:
-    """スレッドを条件付きで一括削除"""
+    """スレッドを条件付きで一括削除
+
+    スレッドの列挙と削除は並行に進む（列挙し終わるのを待たずに削除を始める）。
+    --keep-newest のときも、最新N件に入らないと確定したものから削除する。
+    use_index のときは索引を差分同期してから索引で対象を選び、削除した分を索引から消す。
+    """
     if not delete_all and older_than_days is None and keep_newest is None:
         print("ERROR: --all / --older-than N / --keep-newest N のいずれかを指定してください", file=sys.stderr)
         sys.exit(1)
 
-    async with aiohttp.ClientSession(headers=make_headers()) as session:
-        ch_info = await get_channel(session, channel_id)
+    async with open_client() as client:
+        ch_info = await get_channel(client, channel_id)
         guild_id = ch_info.get("guild_id")
         if not guild_id:
             print("ERROR: guild_id が取得できません", file=sys.stderr)
             return
 
+        selection = TargetSelection(
+            older_than_days=None if delete_all else older_than_days,
+            keep_newest=keep_newest,
+        )
+        index_context = ThreadIndex(INDEX_PATH) if use_index else nullcontext()
+        with index_context as index:
+            await _delete_selected(
+                client, channel_id, guild_id, selection, index,
+                sync=sync, dry_run=dry_run, concurrency=concurrency,
+                checkpoint_path=checkpoint_path,
+            )
+
+
+async def _delete_selected(
+    client: DiscordHTTP,
+    channel_id: str,
+    guild_id: str,
+    selection: TargetSelection,
+    index: ThreadIndex | None,
+    *,
+    sync: bool,
+    dry_run: bool,
+    concurrency: int,
+    checkpoint_path: str | None,
+) -> None:
+    keep_newest = selection.keep_newest
+    if index is None:
         print(f"📡 スレッド取得中...")
-        active = await get_active_threads(session, guild_id)
-        active = [t for t in active if t.get("parent_id") == channel_id]
-        archived_pub = await get_archived_threads(session, channel_id, private=False)
-        archived_priv = await get_archived_threads(session, channel_id, private=True)
+        targets = selection.select(iter_threads(client, channel_id, guild_id))
+    else:
+        if sync:
+            await sync_and_report(client, index, channel_id, guild_id)
+        targets = selection.from_index(index, channel_id)
 
-        all_threads = active + archived_pub + archived_priv
-        print(f"   合計 {len(all_threads)} スレッド発見")
-
-        # フィルタリング
+    if dry_run:
+        print("   ⚠️  DRY-RUN モード — 実際には削除しません\n")
         now = datetime.now(tz=timezone.utc)
-
-        # --keep-newest: IDの大きい順にN件を保持リストに入れ、残りを削除対象にする
+        count = 0
+        async for t in _aiter(targets):
+            count += 1
+            age_days = (now - snowflake_to_datetime(t["id"])).days
+            await delete_channel(
+                client, t["id"], name=f"[{age_days:3d}日前] {t.get('name', '(無題)')[:50]}",
+                dry_run=True,
+            )
+        print(f"\n   合計 {selection.seen} スレッド発見")
         if keep_newest is not None:
-            sorted_by_newest = sorted(all_threads, key=lambda t: int(t["id"]), reverse=True)
-            keep_ids = {t["id"] for t in sorted_by_newest[:keep_newest]}
-            targets = [t for t in all_threads if t["id"] not in keep_ids]
-            print(f"   保持（最新{keep_newest}件）:")
-            for t in sorted_by_newest[:keep_newest]:
-                print(f"     ✅ {t.get('name', '(無題)')[:60]}")
-        else:
-            keep_ids = set()
-            targets = []
-            for t in all_threads:
-                if delete_all:
-                    targets.append(t)
-                elif older_than_days is not None:
-                    created = snowflake_to_datetime(t["id"])
-                    age_days = (now - created).days
-                    if age_days >= older_than_days:
-                        targets.append(t)
-
-        print(f"   削除対象: {len(targets)} スレッド")
-        if dry_run:
-            print("   ⚠️  DRY-RUN モード — 実際には削除しません\n")
-        else:
-            print()
-
-        # 削除実行
-        success = 0
-        fail = 0
-        for t in targets:
-            name = t.get("name", "(無題)")
-            created = snowflake_to_datetime(t["id"])
-            age_days = (now - created).days
-            print(f"  [{age_days:3d}日前] {name[:50]}")
-            ok = await delete_channel(session, t["id"], name=name, dry_run=dry_run)
-            if ok:
-                success += 1
+            print_kept(selection)
+        print(f"\n[DRY-RUN] 完了: {count} 削除予定")
+        return
+
+    checkpoint = Checkpoint(
+        Path(checkpoint_path) if checkpoint_path
+        else CHECKPOINT_DIR / f"delete-threads-{channel_id}.txt"
+    )
+    checkpoint.load()
+    print()
+    try:
+        summary = await delete_threads(
+            client, targets, concurrency=concurrency, checkpoint=checkpoint,
+            on_removed=index.remove if index is not None else None,
+        )
+    finally:
+        checkpoint.close()
+    print(f"\n   合計 {selection.seen} スレッド発見 / 削除対象: {summary.total} スレッド")
+    if keep_newest is not None:
+        print_kept(selection)
+    print_summary(summary, client.rate_limited)
+
+    if summary.failed:
+        print(f"\n⚠️  失敗したスレッドがあります。再実行すると {checkpoint.path} の削除済み分を飛ばして続きから削除します")
+    else:
+        checkpoint.remove()
+
+
+async def cmd_export(
+    channel_id: str,
+    older_than_days: int | None,
+    keep_newest: int | None,
+    out: str | None = None,
+    concurrency: int = 4,
+    use_index: bool = False,
+    sync: bool = True,
+) -> None:
+    """スレッドのメッセージを gzip の JSONL に書き出す（条件なしなら全スレッド）
+
+    delete-threads と同じ条件で対象を選ぶので、同じ条件で先に export しておけば
+    削除するスレッドを全て保存できる。中断しても再実行で続きから書き出す。
+    """
+    out_dir = (Path(out) if out else EXPORT_DIR) / channel_id
+    async with open_client() as client:
+        ch_info = await get_channel(client, channel_id)
+        guild_id = ch_info.get("guild_id")
+        if not guild_id:
+            print("ERROR: guild_id が取得できません", file=sys.stderr)
+            return
+
+        selection = TargetSelection(older_than_days=older_than_days, keep_newest=keep_newest)
+        index_context = ThreadIndex(INDEX_PATH) if use_index else nullcontext()
+        with index_context as index:
+            if index is None:
+                print(f"📡 スレッド取得中...")
+                targets = selection.select(iter_threads(client, channel_id, guild_id))
             else:
-                fail += 1
-            # レートリミットを避けるため少し待つ
-            if not dry_run:
-                await asyncio.sleep(0.5)
+                if sync:
+                    await sync_and_report(client, index, channel_id, guild_id)
+                targets = selection.from_index(index, channel_id)
 
-    print(f"\n{'[DRY-RUN] ' if dry_run else ''}完了: {success} 削除, {fail} 失敗")
+            print(f"📦 {out_dir} に書き出します\n")
+            summary = await export_threads(client, targets, out_dir, concurrency=concurrency)
+
+    rate = summary.messages / summary.elapsed if summary.elapsed else 0.0
+    print("\n📊 サマリー:")
+    print(f"  書き出し: {summary.exported} スレッド / {summary.messages} メッセージ")
+    if summary.skipped:
+        print(f"  書き出し済みで飛ばした: {summary.skipped}")
+    print(f"  失敗: {summary.failed}")
+    print(f"  所要時間: {summary.elapsed:.1f}秒（{rate:.1f}メッセージ/秒, 429: {client.rate_limited}回）")
+    if summary.failed:
+        print("\n⚠️  失敗したスレッドがあります。再実行すると書き出し済みの分を飛ばして続きから書き出します")
 
 
 async def cmd_delete_thread(thread_id: str) -> None:
     """指定スレッドを1件削除"""
-    async with aiohttp.ClientSession(headers=make_headers()) as session:
-        ok = await delete_channel(session, thread_id, name=thread_id)
+    async with open_client() as client:
+        ok = await delete_channel(client, thread_id, name=thread_id)
     if not ok:
         sys.exit(1)
 
@@ -292,6 +919,14 @@ async def cmd_delete_thread(thread_id: str) -> None:
 # エントリーポイント
 # ─────────────────────────────────────────────────
 
+def _add_index_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--index", action="store_true", dest="use_index",
+                        help="ローカルのスレッド索引（THREAD_INDEX_PATH, 既定 data/threads.db）を"
+                             "差分同期して使う")
+    parser.add_argument("--no-sync", action="store_false", dest="sync",
+                        help="--index のとき、Discordと同期せずに索引だけで答える")
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="Discord Admin CLI",
@@ -307,6 +942,7 @@ def build_parser() -> argparse.ArgumentParser:
     # list-threads
     p_list = sub.add_parser("list-threads", help="スレッド一覧表示")
     p_list.add_argument("--channel", default=CHANNEL_ID, dest="channel_id")
+    _add_index_arguments(p_list)
 
     # delete-threads
     p_del = sub.add_parser("delete-threads", help="スレッド一括削除")
@@ -319,6 +955,31 @@ def build_parser() -> argparse.ArgumentParser:
                        help="最新N件を残して残りを削除")
     p_del.add_argument("--dry-run", action="store_true",
                        help="実際には削除しない（確認用）")
+    p_del.add_argument("--concurrency", type=int, default=10,
+                       help="同時に投げる削除リクエスト数（実際のペースはレートリミットに合わせる）")
+    p_del.add_argument("--checkpoint", default=None, metavar="PATH", dest="checkpoint_path",
+                       help="削除済みIDを記録するファイル（中断後の再実行で続きから）。"
+                            "省略時は data/checkpoints/delete-threads-<channel>.txt")
+    _add_index_arguments(p_del)
+
+    # sync-index
+    p_sync = sub.add_parser("sync-index", help="スレッド索引を同期")
+    p_sync.add_argument("--channel", default=CHANNEL_ID, dest="channel_id")
+    p_sync.add_argument("--full", action="store_true",
+                        help="全件取り直す（他所で削除されたアーカイブ済みスレッドも索引から消える）")
+
+    # export
+    p_exp = sub.add_parser("export", help="スレッドのメッセージをJSONL(gzip)に書き出す")
+    p_exp.add_argument("--channel", default=CHANNEL_ID, dest="channel_id")
+    p_exp.add_argument("--older-than", type=int, metavar="DAYS",
+                       help="N日以上前のスレッドだけ書き出す")
+    p_exp.add_argument("--keep-newest", type=int, metavar="N",
+                       help="最新N件以外のスレッドだけ書き出す（delete-threads と同じ条件）")
+    p_exp.add_argument("--out", default=None, metavar="DIR",
+                       help="出力先（<DIR>/<channel>/ に書く）。省略時は data/exports")
+    p_exp.add_argument("--concurrency", type=int, default=4,
+                       help="同時に書き出すスレッド数")
+    _add_index_arguments(p_exp)
 
     # delete-thread
     p_one = sub.add_parser("delete-thread", help="スレッドを1件削除")
@@ -334,7 +995,7 @@ def main() -> None:
     if args.cmd == "channel-info":
         asyncio.run(cmd_channel_info(args.channel_id or CHANNEL_ID))
     elif args.cmd == "list-threads":
-        asyncio.run(cmd_list_threads(args.channel_id))
+        asyncio.run(cmd_list_threads(args.channel_id, args.use_index, args.sync))
     elif args.cmd == "delete-threads":
         asyncio.run(cmd_delete_threads(
             channel_id=args.channel_id,
@@ -342,7 +1003,23 @@ def main() -> None:
             keep_newest=args.keep_newest,
             delete_all=args.delete_all,
             dry_run=args.dry_run,
+            concurrency=args.concurrency,
+            checkpoint_path=args.checkpoint_path,
+            use_index=args.use_index,
+            sync=args.sync,
+        ))
+    elif args.cmd == "export":
+        asyncio.run(cmd_export(
+            channel_id=args.channel_id,
+            older_than_days=args.older_than,
+            keep_newest=args.keep_newest,
+            out=args.out,
+            concurrency=args.concurrency,
+            use_index=args.use_index,
+            sync=args.sync,
         ))
+    elif args.cmd == "sync-index":
+        asyncio.run(cmd_sync_index(args.channel_id, args.full))
     elif args.cmd == "delete-thread":
         asyncio.run(cmd_delete_thread(args.thread_id))
 
@@ -0,0 +1,304 @@
+"""Discord REST の共有クライアント — scripts/ の管理スクリプトから使う
+
+- aiohttp のセッションを1つだけ持ち、コネクションを使い回す
+- レスポンスの X-RateLimit-* ヘッダからバケットごとの残り回数とリセット時刻を覚え、
+  残りがある間は待たずに投げ、尽きたらリセットまで待つ（固定の sleep はしない）
+- 429 は retry_after だけ待って再送、5xx・接続エラーは指数バックオフで再送する
+
+使い方:
+  async with DiscordHTTP(TOKEN, base=DISCORD_API) as client:
+      channel = (await client.get(f"/channels/{channel_id}")).json_or_raise()
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Mapping, Optional
+
+import aiohttp
+from multidict import CIMultiDict
+
+DEFAULT_API = "https://discord.com/api/v10"
+
+# Discord の全体上限（1秒あたり）
+GLOBAL_PER_SECOND = 50
+# 全体上限の窓に足す余裕（サーバ側の窓の区切りと到着時刻のずれを吸収する）
+GLOBAL_WINDOW = 1.1
+
+# メジャーパラメータ（バケットがこの値ごとに分かれる）
+_MAJOR = re.compile(r"^/(channels|guilds|webhooks)/(\d+)")
+_ID = re.compile(r"/\d{15,}")
+
+
+def route_key(method: str, path: str) -> tuple[str, str, str]:
+    """(メソッド, メジャーパラメータ以外のIDを伏せたパス, メジャーパラメータ) を返す。
+
+    /channels/123/messages/456 → ("GET", "/channels/{major}/messages/{id}", "123")
+    """
+    major = ""
+    match = _MAJOR.match(path)
+    if match:
+        major = match.group(2)
+        path = f"/{match.group(1)}/{{major}}" + path[match.end():]
+    return method, _ID.sub("/{id}", path), major
+
+
+class DiscordHTTPError(Exception):
+    """2xx 以外で終わったリクエスト"""
+
+    def __init__(self, response: "Response"):
+        self.response = response
+        self.status = response.status
+        message = response.data.get("message") if isinstance(response.data, dict) else response.data
+        super().__init__(f"{response.method} {response.path} → {response.status}: {message}")
+
+
+@dataclass
+class Response:
+    method: str
+    path: str
+    status: int
+    data: Any = None
+    # ヘッダ名の大文字小文字を区別しない（Discord は小文字で返す）
+    headers: Mapping[str, str] = field(default_factory=CIMultiDict, repr=False)
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise DiscordHTTPError(self)
+
+    def json_or_raise(self) -> Any:
+        self.raise_for_status()
+        return self.data
+
+
+class Bucket:
+    """1つのレートリミットバケットの状態。
+
+    最初のレスポンスが来るまでは上限が分からないので、同時に1件だけ投げる。
+    """
+
+    def __init__(self) -> None:
+        self.limit = 1
+        self.remaining = 1
+        self.reset_at = 0.0  # time.monotonic() 基準。0 は「リセット時刻不明」
+        self.known = False
+        # 別ルートと共有のバケットだと分かったら、以後はそちらで数える
+        self.moved_to: Optional["Bucket"] = None
+        self._updated = asyncio.Event()
+
+    async def acquire(self) -> "Bucket":
+        """1回分の枠を確保し、枠を取ったバケットを返す。
+
+        枠がなければリセットかヘッダの更新まで待つ。待っている間に共有バケットへ
+        移されたら、移動先で枠を取る。
+        """
+        while True:
+            if self.moved_to is not None:
+                return await self.moved_to.acquire()
+            now = time.monotonic()
+            if self.reset_at and now >= self.reset_at:
+                self.remaining = self.limit
+                self.reset_at = 0.0
+            if self.remaining > 0:
+                self.remaining -= 1
+                return self
+            updated = self._updated
+            timeout = self.reset_at - now if self.reset_at else None
+            try:
+                await asyncio.wait_for(updated.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        """レスポンスヘッダで残り回数とリセット時刻を更新する。"""
+        try:
+            limit = int(headers["X-RateLimit-Limit"])
+            remaining = int(headers["X-RateLimit-Remaining"])
+            reset_after = float(headers["X-RateLimit-Reset-After"])
+        except (KeyError, ValueError):
+            if not self.known:
+                # ヘッダのないルート。次のリクエストに上限の確認を任せる
+                self.remaining += 1
+                self._notify()
+            return
+
+        if self.known:
+            # 返事を待っているリクエストはサーバの残り回数にまだ入っていないので、
+            # 手元で数えた残りより増やさない
+            self.remaining = min(self.remaining, remaining)
+        else:
+            self.remaining = remaining
+        self.limit = limit
+        self.reset_at = time.monotonic() + reset_after
+        self.known = True
+        self._notify()
+
+    def move_to(self, shared: "Bucket") -> None:
+        """共有バケットへ移し、このバケットで待っているリクエストを起こして移動先へ回す。"""
+        self.moved_to = shared
+        self._notify()
+
+    def exhaust(self, retry_after: float) -> None:
+        """429 を受けたので retry_after まで枠をゼロにする。"""
+        self.remaining = 0
+        self.reset_at = time.monotonic() + retry_after
+        self._notify()
+
+    def _notify(self) -> None:
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+
+class DiscordHTTP:
+    """Discord REST API のクライアント（バケット単位のレートリミット対応）"""
+
+    def __init__(
+        self,
+        token: str,
+        *,
+        base: str = DEFAULT_API,
+        max_connections: int = 50,
+        max_retries: int = 5,
+        global_per_second: int = GLOBAL_PER_SECOND,
+    ):
+        self.token = token
+        self.base = base.rstrip("/")
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.global_per_second = global_per_second
+        self.rate_limited = 0
+        self._session: Optional[aiohttp.ClientSession] = None
+        # ルート → バケットハッシュ（X-RateLimit-Bucket）
+        self._bucket_hashes: dict[tuple[str, str], str] = {}
+        # (バケットハッシュ or ルート, メジャーパラメータ) → Bucket
+        self._buckets: dict[tuple[str, str], Bucket] = {}
+        self._global_reset_at = 0.0
+        self._global_sent: deque[float] = deque()
+
+    async def __aenter__(self) -> "DiscordHTTP":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={"Authorization": f"Bot {self.token}"},
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def bucket_for(self, method: str, path: str) -> Bucket:
+        """method path が属するバケットを返す（未知なら作る）。"""
+        method, route, major = route_key(method, path)
+        name = self._bucket_hashes.get((method, route), f"{method} {route}")
+        bucket = self._buckets.get((name, major))
+        if bucket is None:
+            bucket = self._buckets[(name, major)] = Bucket()
+        return bucket
+
+    def _learn_bucket(
+        self, method: str, path: str, bucket: Bucket, headers: Mapping[str, str]
+    ) -> Bucket:
+        """X-RateLimit-Bucket を見て、複数ルートで共有されるバケットをまとめる。"""
+        bucket_hash = headers.get("X-RateLimit-Bucket")
+        if not bucket_hash:
+            return bucket
+        method, route, major = route_key(method, path)
+        self._bucket_hashes[(method, route)] = bucket_hash
+        shared = self._buckets.setdefault((bucket_hash, major), bucket)
+        if shared is not bucket:
+            bucket.move_to(shared)
+        return shared
+
+    async def _wait_global(self) -> None:
+        """全体上限（直近 GLOBAL_WINDOW 秒に global_per_second 件）と global 429 を守る。"""
+        while True:
+            now = time.monotonic()
+            if now < self._global_reset_at:
+                await asyncio.sleep(self._global_reset_at - now)
+                continue
+            sent = self._global_sent
+            while sent and now - sent[0] >= GLOBAL_WINDOW:
+                sent.popleft()
+            if len(sent) < self.global_per_second:
+                sent.append(now)
+                return
+            await asyncio.sleep(sent[0] + GLOBAL_WINDOW - now)
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: Optional[dict] = None,
+        json: Any = None,
+    ) -> Response:
+        """1リクエストを送る。429・5xx・接続エラーは再送し、最後の Response を返す。"""
+        bucket = self.bucket_for(method, path)
+        for attempt in range(self.max_retries + 1):
+            bucket = await bucket.acquire()
+            await self._wait_global()
+            try:
+                async with self.session.request(
+                    method, f"{self.base}{path}", params=params, json=json
+                ) as r:
+                    headers = CIMultiDict(r.headers)
+                    data = await r.json() if r.content_type == "application/json" else None
+                    status = r.status
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                bucket.update({})
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(0.5 * 2 ** attempt)
+                continue
+            except BaseException:
+                # 上限確認中のバケットで待っている他のリクエストを起こす
+                bucket.update({})
+                raise
+
+            bucket = self._learn_bucket(method, path, bucket, headers)
+            bucket.update(headers)
+
+            if status == 429:
+                self.rate_limited += 1
+                retry_after = float((data or {}).get("retry_after", headers.get("Retry-After", 1.0)))
+                if (data or {}).get("global") or headers.get("X-RateLimit-Global"):
+                    self._global_reset_at = time.monotonic() + retry_after
+                else:
+                    bucket.exhaust(retry_after)
+                print(f"  ⏳ Rate limit — {retry_after:.1f}秒待機... ({method} {path})")
+                continue
+            if status >= 500 and attempt < self.max_retries:
+                await asyncio.sleep(0.5 * 2 ** attempt)
+                continue
+            return Response(method, path, status, data, headers)
+
+        return Response(method, path, status, data, headers)
+
+    async def get(self, path: str, **kwargs: Any) -> Response:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs: Any) -> Response:
+        return await self.request("POST", path, **kwargs)
+
+    async def put(self, path: str, **kwargs: Any) -> Response:
+        return await self.request("PUT", path, **kwargs)
+
+    async def delete(self, path: str, **kwargs: Any) -> Response:
+        return await self.request("DELETE", path, **kwargs)
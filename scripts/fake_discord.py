@@ -0,0 +1,656 @@
+#!/usr/bin/env python3
+"""ローカル用の偽Discord — REST API v10 と gateway の最小限のスタンドイン
+
+EbiBot（ReminderCog / WatchdogCog）や scripts/ の管理スクリプトが使う
+エンドポイントだけを、本物と同じ形のJSONとレートリミット（バケットヘッダ・
+429 + retry_after）付きで再現する。本物のDiscordに触らずに負荷試験・
+レイテンシ計測をするためのもの。状態はすべてメモリ上。
+
+使い方:
+  cd /home/ebi/discord-bot
+  uv run python scripts/fake_discord.py --port 8900 --threads 500
+
+  # 別ターミナルから偽Discordに向ける
+  export DISCORD_API_BASE=http://127.0.0.1:8900/api/v10
+  export DISCORD_GATEWAY_URL=ws://127.0.0.1:8900/gateway
+  export DISCORD_BOT_TOKEN=fake CLAUDE_CHANNEL_ID=100000000000000001
+  uv run python scripts/discord_admin.py list-threads
+  uv run python -m src.main
+
+  # 統計（ルートごとのリクエスト数・429の回数など）
+  curl http://127.0.0.1:8900/_fake/stats
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from aiohttp import WSMsgType, web
+
+DISCORD_EPOCH = 1420070400000  # 2015-01-01T00:00:00Z ms
+
+# レスポンスヘッダ名の書き方（"lower" が本物の Discord と同じ）
+HEADER_CASES = ("lower", "title")
+
+GUILD_TEXT = 0
+PUBLIC_THREAD = 11
+PRIVATE_THREAD = 12
+
+MAX_EMBEDS_PER_MESSAGE = 10
+HEARTBEAT_INTERVAL_MS = 41250
+
+
+def snowflake(at: datetime, sequence: int = 0) -> str:
+    """作成日時からSnowflake IDを作る（下位22bitは連番）。"""
+    ms = int(at.timestamp() * 1000) - DISCORD_EPOCH
+    return str((ms << 22) | (sequence & 0x3FFFFF))
+
+
+def snowflake_time(snowflake_id: str) -> datetime:
+    return datetime.fromtimestamp(
+        ((int(snowflake_id) >> 22) + DISCORD_EPOCH) / 1000, tz=timezone.utc
+    )
+
+
+def iso(at: datetime) -> str:
+    return at.astimezone(timezone.utc).isoformat()
+
+
+# ─────────────────────────────────────────────────
+# レートリミット
+# ─────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class RateLimit:
+    """per 秒あたり limit 回"""
+
+    limit: int
+    per: float
+
+
+# (メソッド, ルート) ごとの上限。バケットはメジャーパラメータ（channel_id / guild_id）単位。
+# 値は本物のDiscordで観測されるおおよその値
+ROUTE_LIMITS: dict[tuple[str, str], RateLimit] = {
+    ("POST", "/api/v10/channels/{channel_id}/messages"): RateLimit(5, 5.0),
+    ("DELETE", "/api/v10/channels/{channel_id}"): RateLimit(5, 5.0),
+    ("POST", "/api/v10/channels/{channel_id}/threads"): RateLimit(5, 5.0),
+    ("PUT", "/api/v10/channels/{channel_id}/thread-members/{user_id}"): RateLimit(5, 5.0),
+    ("GET", "/api/v10/channels/{channel_id}/messages"): RateLimit(5, 1.0),
+}
+DEFAULT_LIMIT = RateLimit(10, 1.0)
+GLOBAL_LIMIT = RateLimit(50, 1.0)
+
+
+class Bucket:
+    """固定ウィンドウのレートリミットバケット"""
+
+    def __init__(self, rate: RateLimit):
+        self.rate = rate
+        self.remaining = rate.limit
+        self.reset_at = 0.0
+
+    def hit(self, now: float) -> bool:
+        """1回分消費する。上限に達していたらFalse。"""
+        if now >= self.reset_at:
+            self.remaining = self.rate.limit
+            self.reset_at = now + self.rate.per
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+    def reset_after(self, now: float) -> float:
+        return max(self.reset_at - now, 0.0)
+
+
+# ─────────────────────────────────────────────────
+# 偽Discord本体
+# ─────────────────────────────────────────────────
+
+class FakeDiscord:
+    """偽Discordの状態（ギルド1つ・テキストチャンネル1つ・スレッド群）とaiohttpアプリ"""
+
+    def __init__(
+        self,
+        *,
+        threads: int = 0,
+        archived_ratio: float = 0.5,
+        max_age_days: int = 60,
+        latency_ms: float = 0.0,
+        rate_limits: bool = True,
+        route_limits: Optional[dict[tuple[str, str], RateLimit]] = None,
+        seed: int = 0,
+        header_case: str = "lower",
+    ):
+        if header_case not in HEADER_CASES:
+            raise ValueError(f"header_case は {HEADER_CASES} のいずれか: {header_case}")
+        self.header_case = header_case
+        self.latency_ms = latency_ms
+        self.rate_limits = rate_limits
+        self.route_limits = {**ROUTE_LIMITS, **(route_limits or {})}
+        self._sequence = 0
+        self._rng = random.Random(seed)
+        self._buckets: dict[tuple, Bucket] = {}
+        self._global = Bucket(GLOBAL_LIMIT)
+        self._gateways: set[web.WebSocketResponse] = set()
+        self.stats: Counter[str] = Counter()
+
+        now = datetime.now(tz=timezone.utc)
+        self.bot_user = {
+            "id": self._new_id(now),
+            "username": "EbiBot",
+            "global_name": "EbiBot",
+            "discriminator": "0",
+            "avatar": None,
+            "bot": True,
+        }
+        self.owner_user = {
+            "id": self._new_id(now),
+            "username": "owner",
+            "global_name": "owner",
+            "discriminator": "0",
+            "avatar": None,
+        }
+        self.application = {
+            "id": self._new_id(now),
+            "name": "EbiBot",
+            "description": "",
+            "icon": None,
+            "bot_public": False,
+            "bot_require_code_grant": False,
+            "owner": self.owner_user,
+            "verify_key": "0" * 64,
+            "flags": 0,
+        }
+        self.guild_id = "100000000000000000"
+        self.channel_id = "100000000000000001"
+        self.channels: dict[str, dict] = {
+            self.channel_id: {
+                "id": self.channel_id,
+                "type": GUILD_TEXT,
+                "guild_id": self.guild_id,
+                "name": "claudecode",
+                "position": 0,
+                "permission_overwrites": [],
+                "nsfw": False,
+                "parent_id": None,
+                "topic": None,
+                "last_message_id": None,
+                "rate_limit_per_user": 0,
+            }
+        }
+        self.messages: dict[str, list[dict]] = {self.channel_id: []}
+        self.thread_members: dict[str, set[str]] = {}
+
+        for _ in range(threads):
+            created = now - timedelta(seconds=self._rng.uniform(0, max_age_days * 86400))
+            archived = self._rng.random() < archived_ratio
+            self.add_thread(
+                f"thread-{len(self.channels)}",
+                created_at=created,
+                archived=archived,
+            )
+
+    def _new_id(self, at: Optional[datetime] = None) -> str:
+        self._sequence += 1
+        return snowflake(at or datetime.now(tz=timezone.utc), self._sequence)
+
+    def add_thread(
+        self,
+        name: str,
+        *,
+        parent_id: Optional[str] = None,
+        created_at: Optional[datetime] = None,
+        archived: bool = False,
+        thread_type: int = PUBLIC_THREAD,
+    ) -> dict:
+        """スレッドを追加する。"""
+        created_at = created_at or datetime.now(tz=timezone.utc)
+        thread_id = self._new_id(created_at)
+        thread = {
+            "id": thread_id,
+            "type": thread_type,
+            "guild_id": self.guild_id,
+            "parent_id": parent_id or self.channel_id,
+            "name": name[:100],
+            "owner_id": self.bot_user["id"],
+            "last_message_id": None,
+            "rate_limit_per_user": 0,
+            "message_count": 0,
+            "member_count": 1,
+            "flags": 0,
+            "thread_metadata": {
+                "archived": archived,
+                "archive_timestamp": iso(created_at),
+                "auto_archive_duration": 10080,
+                "locked": False,
+                "create_timestamp": iso(created_at),
+            },
+        }
+        self.channels[thread_id] = thread
+        self.messages[thread_id] = []
+        return thread
+
+    def add_message(self, channel_id: str, content: str = "", embeds: Optional[list] = None) -> dict:
+        """チャンネルにメッセージを追加する。"""
+        now = datetime.now(tz=timezone.utc)
+        message = {
+            "id": self._new_id(now),
+            "channel_id": channel_id,
+            "guild_id": self.guild_id,
+            "author": self.bot_user,
+            "content": content,
+            "timestamp": iso(now),
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": embeds or [],
+            "pinned": False,
+            "type": 0,
+            "flags": 0,
+        }
+        self.messages.setdefault(channel_id, []).append(message)
+        channel = self.channels[channel_id]
+        channel["last_message_id"] = message["id"]
+        if "message_count" in channel:
+            channel["message_count"] += 1
+        return message
+
+    # ── aiohttp アプリ ──
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        api = "/api/v10"
+        app.router.add_get(f"{api}/users/@me", self.get_me)
+        app.router.add_get(f"{api}/oauth2/applications/@me", self.get_application)
+        app.router.add_put(f"{api}/applications/{{app_id}}/commands", self.put_commands)
+        app.router.add_put(
+            f"{api}/applications/{{app_id}}/guilds/{{guild_id}}/commands", self.put_commands
+        )
+        app.router.add_get(f"{api}/gateway", self.get_gateway)
+        app.router.add_get(f"{api}/gateway/bot", self.get_gateway)
+        app.router.add_get(f"{api}/channels/{{channel_id}}", self.get_channel)
+        app.router.add_delete(f"{api}/channels/{{channel_id}}", self.delete_channel)
+        app.router.add_get(f"{api}/channels/{{channel_id}}/messages", self.get_messages)
+        app.router.add_post(f"{api}/channels/{{channel_id}}/messages", self.post_message)
+        app.router.add_post(f"{api}/channels/{{channel_id}}/threads", self.post_thread)
+        app.router.add_get(
+            f"{api}/channels/{{channel_id}}/threads/archived/{{kind}}", self.get_archived_threads
+        )
+        app.router.add_put(
+            f"{api}/channels/{{channel_id}}/thread-members/{{user_id}}", self.put_thread_member
+        )
+        app.router.add_get(f"{api}/guilds/{{guild_id}}/threads/active", self.get_active_threads)
+        app.router.add_get("/gateway", self.gateway)
+        app.router.add_get("/_fake/stats", self.get_stats)
+        return app
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        if not request.path.startswith("/api/"):
+            return await handler(request)
+
+        route = request.match_info.route.resource
+        template = route.canonical if route is not None else request.path
+        self.stats[f"{request.method} {template}"] += 1
+
+        if not request.headers.get("Authorization", "").startswith("Bot "):
+            return _error(401, "401: Unauthorized", 0)
+
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+        if not self.rate_limits:
+            return await handler(request)
+
+        now = time.monotonic()
+        if not self._global.hit(now):
+            self.stats["429 global"] += 1
+            return self._rate_limited(self._global.reset_after(now), is_global=True)
+
+        # メジャーパラメータ単位のバケット
+        major = request.match_info.get("channel_id") or request.match_info.get("guild_id") or ""
+        rate = self.route_limits.get((request.method, template), DEFAULT_LIMIT)
+        key = (request.method, template, major)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = Bucket(rate)
+
+        allowed = bucket.hit(now)
+        reset_after = bucket.reset_after(now)
+        headers = {
+            "X-RateLimit-Limit": str(rate.limit),
+            "X-RateLimit-Remaining": str(bucket.remaining),
+            "X-RateLimit-Reset": f"{time.time() + reset_after:.3f}",
+            "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+            "X-RateLimit-Bucket": hashlib.sha1(
+                f"{request.method} {template}".encode()
+            ).hexdigest()[:16],
+        }
+        if not allowed:
+            self.stats["429 route"] += 1
+            response = self._rate_limited(reset_after, is_global=False)
+        else:
+            response = await handler(request)
+        for name, value in headers.items():
+            response.headers[self._header_name(name)] = value
+        return response
+
+    def _header_name(self, name: str) -> str:
+        """本物の Discord はヘッダ名を小文字で返す。header_case="title" なら書いたまま。"""
+        return name.lower() if self.header_case == "lower" else name
+
+    def _rate_limited(self, retry_after: float, *, is_global: bool) -> web.Response:
+        headers = {
+            "Retry-After": f"{retry_after:.3f}",
+            "X-RateLimit-Scope": "global" if is_global else "user",
+        }
+        if is_global:
+            headers["X-RateLimit-Global"] = "true"
+        return _json(
+            {"message": "You are being rate limited.", "retry_after": retry_after, "global": is_global},
+            status=429,
+            headers={self._header_name(name): value for name, value in headers.items()},
+        )
+
+    # ── REST ハンドラ ──
+
+    async def get_me(self, request: web.Request) -> web.Response:
+        return _json(self.bot_user)
+
+    async def get_application(self, request: web.Request) -> web.Response:
+        return _json(self.application)
+
+    async def put_commands(self, request: web.Request) -> web.Response:
+        commands = await request.json()
+        for command in commands:
+            command.setdefault("id", self._new_id())
+            command.setdefault("application_id", self.application["id"])
+            command.setdefault("version", self._new_id())
+            command.setdefault("type", 1)
+        return _json(commands)
+
+    async def get_gateway(self, request: web.Request) -> web.Response:
+        url = f"ws://{request.host}/gateway"
+        return _json({
+            "url": url,
+            "shards": 1,
+            "session_start_limit": {
+                "total": 1000, "remaining": 1000, "reset_after": 0, "max_concurrency": 1,
+            },
+        })
+
+    async def get_channel(self, request: web.Request) -> web.Response:
+        channel = self.channels.get(request.match_info["channel_id"])
+        if channel is None:
+            return _error(404, "Unknown Channel", 10003)
+        return _json(channel)
+
+    async def delete_channel(self, request: web.Request) -> web.Response:
+        channel = self.channels.pop(request.match_info["channel_id"], None)
+        if channel is None:
+            return _error(404, "Unknown Channel", 10003)
+        self.messages.pop(channel["id"], None)
+        self.thread_members.pop(channel["id"], None)
+        return _json(channel)
+
+    async def get_messages(self, request: web.Request) -> web.Response:
+        channel_id = request.match_info["channel_id"]
+        if channel_id not in self.channels:
+            return _error(404, "Unknown Channel", 10003)
+
+        limit = min(max(int(request.query.get("limit", 50)), 1), 100)
+        messages = self.messages.get(channel_id, [])
+        if "before" in request.query:
+            before = int(request.query["before"])
+            messages = [m for m in messages if int(m["id"]) < before]
+        if "after" in request.query:
+            after = int(request.query["after"])
+            # after は古い順に limit 件（返すときは新しい順）
+            messages = [m for m in messages if int(m["id"]) > after][:limit]
+        return _json(list(reversed(messages[-limit:])))
+
+    async def post_message(self, request: web.Request) -> web.Response:
+        channel_id = request.match_info["channel_id"]
+        if channel_id not in self.channels:
+            return _error(404, "Unknown Channel", 10003)
+
+        payload = await _read_payload(request)
+        embeds = payload.get("embeds") or []
+        if len(embeds) > MAX_EMBEDS_PER_MESSAGE:
+            return _error(400, "Invalid Form Body", 50035)
+        if not payload.get("content") and not embeds:
+            return _error(400, "Cannot send an empty message", 50006)
+
+        message = self.add_message(channel_id, payload.get("content") or "", embeds)
+        self.stats["messages created"] += 1
+        return _json(message)
+
+    async def post_thread(self, request: web.Request) -> web.Response:
+        channel_id = request.match_info["channel_id"]
+        if channel_id not in self.channels:
+            return _error(404, "Unknown Channel", 10003)
+        payload = await request.json()
+        thread = self.add_thread(
+            payload.get("name", "thread"),
+            parent_id=channel_id,
+            thread_type=payload.get("type", PUBLIC_THREAD),
+        )
+        return _json(thread, status=201)
+
+    async def get_active_threads(self, request: web.Request) -> web.Response:
+        threads = [
+            channel for channel in self.channels.values()
+            if channel["type"] in (PUBLIC_THREAD, PRIVATE_THREAD)
+            and not channel["thread_metadata"]["archived"]
+        ]
+        return _json({"threads": threads, "members": []})
+
+    async def get_archived_threads(self, request: web.Request) -> web.Response:
+        """アーカイブ済みスレッドを archive_timestamp の新しい順に返す。
+
+        before は本物と同じISO8601タイムスタンプのほか、スレッドIDも受け付ける
+        （IDのときはそのスレッドの archive_timestamp より前）。
+        """
+        channel_id = request.match_info["channel_id"]
+        if channel_id not in self.channels:
+            return _error(404, "Unknown Channel", 10003)
+        thread_type = PRIVATE_THREAD if request.match_info["kind"] == "private" else PUBLIC_THREAD
+
+        limit = min(max(int(request.query.get("limit", 50)), 2), 100)
+        threads = sorted(
+            (
+                channel for channel in self.channels.values()
+                if channel["type"] == thread_type
+                and channel.get("parent_id") == channel_id
+                and channel["thread_metadata"]["archived"]
+            ),
+            key=lambda t: (t["thread_metadata"]["archive_timestamp"], t["id"]),
+            reverse=True,
+        )
+        before = request.query.get("before")
+        if before:
+            if before.isdigit():
+                cursor = self.channels.get(before)
+                before_ts = (
+                    cursor["thread_metadata"]["archive_timestamp"]
+                    if cursor else iso(snowflake_time(before))
+                )
+            else:
+                before_ts = iso(datetime.fromisoformat(before.replace("Z", "+00:00")))
+            threads = [t for t in threads if t["thread_metadata"]["archive_timestamp"] < before_ts]
+
+        return _json({
+            "threads": threads[:limit],
+            "members": [],
+            "has_more": len(threads) > limit,
+        })
+
+    async def put_thread_member(self, request: web.Request) -> web.Response:
+        channel_id = request.match_info["channel_id"]
+        if channel_id not in self.channels:
+            return _error(404, "Unknown Channel", 10003)
+        self.thread_members.setdefault(channel_id, set()).add(request.match_info["user_id"])
+        return web.Response(status=204)
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return _json(dict(self.stats))
+
+    # ── gateway ──
+
+    def _guild_payload(self) -> dict:
+        channels = [c for c in self.channels.values() if c["type"] == GUILD_TEXT]
+        threads = [
+            c for c in self.channels.values()
+            if c["type"] in (PUBLIC_THREAD, PRIVATE_THREAD)
+            and not c["thread_metadata"]["archived"]
+        ]
+        return {
+            "id": self.guild_id,
+            "name": "fake-guild",
+            "icon": None,
+            "owner_id": self.owner_user["id"],
+            "roles": [{
+                "id": self.guild_id, "name": "@everyone", "permissions": "0",
+                "position": 0, "color": 0, "hoist": False, "managed": False,
+                "mentionable": False, "flags": 0,
+            }],
+            "emojis": [],
+            "stickers": [],
+            "features": [],
+            "member_count": 2,
+            "members": [],
+            "channels": channels,
+            "threads": threads,
+            "voice_states": [],
+            "presences": [],
+            "stage_instances": [],
+            "guild_scheduled_events": [],
+            "large": False,
+            "unavailable": False,
+            "joined_at": iso(snowflake_time(self.guild_id)),
+            "premium_tier": 0,
+        }
+
+    async def gateway(self, request: web.Request) -> web.WebSocketResponse:
+        """HELLO → IDENTIFY → READY + GUILD_CREATE と heartbeat ACK だけを返すgateway。"""
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._gateways.add(ws)
+        sequence = 0
+
+        async def dispatch(event: str, data: dict) -> None:
+            nonlocal sequence
+            sequence += 1
+            await ws.send_str(json.dumps({"op": 0, "t": event, "s": sequence, "d": data}))
+
+        try:
+            await ws.send_str(json.dumps(
+                {"op": 10, "d": {"heartbeat_interval": HEARTBEAT_INTERVAL_MS}}
+            ))
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                payload = json.loads(msg.data)
+                op = payload.get("op")
+                if op == 1:
+                    await ws.send_str(json.dumps({"op": 11}))
+                elif op == 2:
+                    self.stats["gateway identify"] += 1
+                    await dispatch("READY", {
+                        "v": 10,
+                        "user": self.bot_user,
+                        "guilds": [{"id": self.guild_id, "unavailable": True}],
+                        "session_id": uuid.uuid4().hex,
+                        "resume_gateway_url": f"ws://{request.host}/gateway",
+                        "application": {"id": self.application["id"], "flags": 0},
+                    })
+                    await dispatch("GUILD_CREATE", self._guild_payload())
+                elif op == 6:
+                    await dispatch("RESUMED", {})
+        finally:
+            self._gateways.discard(ws)
+        return ws
+
+    async def close_gateways(self) -> None:
+        for ws in list(self._gateways):
+            await ws.close()
+
+
+def _json(data: Any, status: int = 200, headers: Optional[dict] = None) -> web.Response:
+    """本物と同じく charset なしの application/json で返す（discord.py は完全一致で判定する）。"""
+    return web.Response(
+        body=json.dumps(data).encode(),
+        status=status,
+        headers={**(headers or {}), "Content-Type": "application/json"},
+    )
+
+
+def _error(status: int, message: str, code: int) -> web.Response:
+    return _json({"message": message, "code": code}, status=status)
+
+
+async def _read_payload(request: web.Request) -> dict[str, Any]:
+    """JSON か multipart（payload_json）のどちらでもメッセージ本文を読む。"""
+    if request.content_type == "multipart/form-data":
+        form = await request.post()
+        return json.loads(form.get("payload_json", "{}"))
+    return await request.json()
+
+
+# ─────────────────────────────────────────────────
+# エントリーポイント
+# ─────────────────────────────────────────────────
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="偽Discord（REST v10 + gateway）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--threads", type=int, default=0, help="最初に作っておくスレッド数")
+    parser.add_argument("--archived-ratio", type=float, default=0.5,
+                        help="そのうちアーカイブ済みにする割合")
+    parser.add_argument("--max-age-days", type=int, default=60,
+                        help="スレッド作成日時を過去何日に散らすか")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="全リクエストに足す遅延（ミリ秒）")
+    parser.add_argument("--no-rate-limits", action="store_true", help="レートリミットを無効にする")
+    parser.add_argument("--header-case", choices=HEADER_CASES, default="lower",
+                        help="レートリミットのヘッダ名を小文字（本物と同じ）か X-RateLimit-* で返す")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    fake = FakeDiscord(
+        threads=args.threads,
+        archived_ratio=args.archived_ratio,
+        max_age_days=args.max_age_days,
+        latency_ms=args.latency_ms,
+        rate_limits=not args.no_rate_limits,
+        seed=args.seed,
+        header_case=args.header_case,
+    )
+    base = f"http://{args.host}:{args.port}"
+    print(f"DISCORD_API_BASE={base}/api/v10")
+    print(f"DISCORD_GATEWAY_URL=ws://{args.host}:{args.port}/gateway")
+    print(f"CLAUDE_CHANNEL_ID={fake.channel_id}")
+    web.run_app(fake.app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -18,12 +18,13 @@ import re
 import sys
 from pathlib import Path
 
-import aiohttp
 from dotenv import load_dotenv
 
+from discord_http import DiscordHTTP
+
 load_dotenv(Path(__file__).parent.parent / ".env")
 
-DISCORD_API = "https://discord.com/api/v10"
+DISCORD_API = os.getenv("DISCORD_API_BASE", "https://discord.com/api/v10")
 TOKEN = os.getenv("DISCORD_BOT_TOKEN", "")
 CHANNEL_ID = os.getenv("CLAUDE_CHANNEL_ID") or os.getenv("DISCORD_CHANNEL_ID", "")
 GUILD_ID = os.getenv("DISCORD_GUILD_ID", "")
@@ -35,11 +36,11 @@ PROJECTS_DIR = Path("/home/ebi/scheduler/obsidian/02_Projects")
 SKIP_FILES = {"_about.md"}
 
 
-def make_headers() -> dict[str, str]:
+def open_client() -> DiscordHTTP:
     if not TOKEN:
         print("ERROR: DISCORD_BOT_TOKEN が設定されていません", file=sys.stderr)
         sys.exit(1)
-    return {"Authorization": f"Bot {TOKEN}", "Content-Type": "application/json"}
+    return DiscordHTTP(TOKEN, base=DISCORD_API)
 
 
 def collect_projects() -> list[dict]:
@@ -124,68 +125,49 @@ def add_discord_thread_id_to_note(note_path: Path, thread_id: str) -> None:
         write_frontmatter(note_path, fm, body)
 
 
-async def get_guild_id(session: aiohttp.ClientSession) -> str:
+async def get_guild_id(client: DiscordHTTP) -> str:
     """チャンネル情報からGuild IDを取得する。"""
-    async with session.get(
-        f"{DISCORD_API}/channels/{CHANNEL_ID}",
-        headers=make_headers(),
-    ) as r:
-        if r.status != 200:
-            print(f"  ERROR: チャンネル情報取得失敗 {r.status}")
-            return ""
-        data = await r.json()
-        return data.get("guild_id", "")
-
-
-async def get_active_threads(session: aiohttp.ClientSession, guild_id: str) -> list[dict]:
+    r = await client.get(f"/channels/{CHANNEL_ID}")
+    if r.status != 200:
+        print(f"  ERROR: チャンネル情報取得失敗 {r.status}")
+        return ""
+    return r.data.get("guild_id", "")
+
+
+async def get_active_threads(client: DiscordHTTP, guild_id: str) -> list[dict]:
     """Guild内のアクティブスレッドを全取得。"""
-    async with session.get(
-        f"{DISCORD_API}/guilds/{guild_id}/threads/active",
-        headers=make_headers(),
-    ) as r:
-        if r.status != 200:
-            text = await r.text()
-            print(f"  ERROR: スレッド取得失敗 {r.status}: {text[:200]}")
-            return []
-        data = await r.json()
-        return data.get("threads", [])
-
-
-async def create_thread(session: aiohttp.ClientSession, name: str) -> dict | None:
+    r = await client.get(f"/guilds/{guild_id}/threads/active")
+    if r.status != 200:
+        print(f"  ERROR: スレッド取得失敗 {r.status}: {str(r.data)[:200]}")
+        return []
+    return r.data.get("threads", [])
+
+
+async def create_thread(client: DiscordHTTP, name: str) -> dict | None:
     """Discord にスレッドを作成する（スターターメッセージなし）。"""
     payload = {
         "name": name[:100],  # Discord: 最大100文字
         "type": 11,  # GUILD_PUBLIC_THREAD
         "auto_archive_duration": 10080,  # 7日
     }
-    async with session.post(
-        f"{DISCORD_API}/channels/{CHANNEL_ID}/threads",
-        headers=make_headers(),
-        json=payload,
-    ) as r:
-        if r.status in (200, 201):
-            return await r.json()
-        text = await r.text()
-        print(f"  ERROR: スレッド作成失敗 '{name}': {r.status} - {text[:200]}")
-        return None
-
-
-async def post_init_message(session: aiohttp.ClientSession, thread_id: str, project_name: str) -> bool:
+    r = await client.post(f"/channels/{CHANNEL_ID}/threads", json=payload)
+    if r.status in (200, 201):
+        return r.data
+    print(f"  ERROR: スレッド作成失敗 '{name}': {r.status} - {str(r.data)[:200]}")
+    return None
+
+
+async def post_init_message(client: DiscordHTTP, thread_id: str, project_name: str) -> bool:
     """スレッドにコンテキスト初期化メッセージを投稿する。
 
     /clear で前のセッション履歴を消去し、recall-context で最新状態に復元する。
     """
     message = f"/clear\n{project_name}に関して思い出して"
-    async with session.post(
-        f"{DISCORD_API}/channels/{thread_id}/messages",
-        headers=make_headers(),
-        json={"content": message},
-    ) as r:
-        if r.status in (200, 201):
-            return True
-        text = await r.text()
-        print(f"  ERROR: メッセージ投稿失敗 (thread {thread_id}): {r.status} - {text[:200]}")
-        return False
+    r = await client.post(f"/channels/{thread_id}/messages", json={"content": message})
+    if r.status in (200, 201):
+        return True
+    print(f"  ERROR: メッセージ投稿失敗 (thread {thread_id}): {r.status} - {str(r.data)[:200]}")
+    return False
 
 
 # 自動生成スレッドのプレフィックス（マッチング対象外）
@@ -246,12 +228,12 @@ async def sync(dry_run: bool, reinit: bool = False) -> None:
     if reinit:
         print("🔄 --reinit モード: 既存スレッドにもコンテキスト初期化メッセージを投稿します")
 
-    async with aiohttp.ClientSession() as session:
-        guild_id = await get_guild_id(session)
+    async with open_client() as client:
+        guild_id = await get_guild_id(client)
         if not guild_id:
             print("ERROR: Guild IDが取得できませんでした")
             return
-        threads = await get_active_threads(session, guild_id)
+        threads = await get_active_threads(client, guild_id)
         # claudecodeチャンネルのスレッドのみに絞る
         channel_threads = [t for t in threads if t.get("parent_id") == CHANNEL_ID]
         print(f"💬 既存スレッド数（claudecodeチャンネル）: {len(channel_threads)}")
@@ -272,8 +254,7 @@ async def sync(dry_run: bool, reinit: bool = False) -> None:
                 if matched:
                     if reinit and not dry_run:
                         print(f"  🔄 [{name}] → 既存スレッド '{matched['name']}' にコンテキスト初期化メッセージを投稿")
-                        await post_init_message(session, existing_id, name)
-                        await asyncio.sleep(0.5)
+                        await post_init_message(client, existing_id, name)
                         results.append({"project": name, "action": "reinited", "thread_id": existing_id})
                     elif reinit and dry_run:
                         print(f"  🔄 [{name}] → [dry-run] 既存スレッド '{matched['name']}' へ投稿予定")
@@ -298,13 +279,12 @@ async def sync(dry_run: bool, reinit: bool = False) -> None:
                 # 新規スレッド作成
                 print(f"  ➕ [{name}] → 新規スレッド作成")
                 if not dry_run:
-                    thread = await create_thread(session, name)
+                    thread = await create_thread(client, name)
                     if thread:
                         thread_id = thread["id"]
                         add_discord_thread_id_to_note(note_path, thread_id)
                         print(f"      → 作成完了 ID: {thread_id}")
-                        await asyncio.sleep(0.5)
-                        ok = await post_init_message(session, thread_id, name)
+                        ok = await post_init_message(client, thread_id, name)
                         if ok:
                             print(f"      → コンテキスト初期化メッセージを投稿しました")
                         results.append({"project": name, "action": "created", "thread_id": thread_id})
@@ -313,10 +293,6 @@ async def sync(dry_run: bool, reinit: bool = False) -> None:
                 else:
                     results.append({"project": name, "action": "would_create"})
 
-            # Rate limit対策
-            if not dry_run:
-                await asyncio.sleep(0.5)
-
         # サマリー
         print("\n📊 サマリー:")
         existing = sum(1 for r in results if r["action"] == "existing")
@@ -367,32 +343,21 @@ async def join_project_threads(dry_run: bool) -> None:
     thread_ids = get_project_thread_ids()
     print(f"\n👤 オーナー追加対象: {len(thread_ids)} スレッド (OWNER_ID: {OWNER_ID})")
 
-    async with aiohttp.ClientSession() as session:
-        ok = 0
-        for tid in sorted(thread_ids):
-            if dry_run:
-                print(f"  [dry-run] PUT thread-members/{OWNER_ID} → {tid}")
-                ok += 1
-                continue
-            for attempt in range(4):
-                async with session.put(
-                    f"{DISCORD_API}/channels/{tid}/thread-members/{OWNER_ID}",
-                    headers=make_headers(),
-                ) as r:
-                    if r.status == 204:
-                        print(f"  ✅ {tid}")
-                        ok += 1
-                        break
-                    elif r.status == 429:
-                        data = await r.json()
-                        wait = data.get("retry_after", 2.0) + 0.2
-                        print(f"  ⏳ rate limit, {wait:.1f}s 待機 (attempt {attempt+1})")
-                        await asyncio.sleep(wait)
-                    else:
-                        text = await r.text()
-                        print(f"  ❌ {tid}: {r.status} {text[:100]}")
-                        break
-            await asyncio.sleep(0.5)
+    async def join(client: DiscordHTTP, tid: str) -> bool:
+        if dry_run:
+            print(f"  [dry-run] PUT thread-members/{OWNER_ID} → {tid}")
+            return True
+        r = await client.put(f"/channels/{tid}/thread-members/{OWNER_ID}")
+        if r.status == 204:
+            print(f"  ✅ {tid}")
+            return True
+        print(f"  ❌ {tid}: {r.status} {str(r.data)[:100]}")
+        return False
+
+    # スレッドごとにバケットが分かれるので並行に投げる（待ち時間は DiscordHTTP が調整）
+    async with open_client() as client:
+        results = await asyncio.gather(*(join(client, tid) for tid in sorted(thread_ids)))
+    ok = sum(results)
 
     print(f"\n完了: {ok}/{len(thread_ids)}")
     if dry_run:
@@ -404,13 +369,13 @@ async def cleanup_threads(dry_run: bool) -> None:
     project_ids = get_project_thread_ids()
     print(f"\n🧹 保護スレッド数: {len(project_ids)}")
 
-    async with aiohttp.ClientSession() as session:
-        guild_id = await get_guild_id(session)
+    async with open_client() as client:
+        guild_id = await get_guild_id(client)
         if not guild_id:
             print("ERROR: Guild IDが取得できませんでした")
             return
 
-        all_threads = await get_active_threads(session, guild_id)
+        all_threads = await get_active_threads(client, guild_id)
         channel_threads = [t for t in all_threads if t.get("parent_id") == CHANNEL_ID]
         targets = [t for t in channel_threads if t["id"] not in project_ids]
 
@@ -428,35 +393,16 @@ async def cleanup_threads(dry_run: bool) -> None:
             print(f"\n⚠️  dry-run モード。実際には削除しません。")
             return
 
-        deleted = 0
-        for t in targets:
-            async with session.delete(
-                f"{DISCORD_API}/channels/{t['id']}",
-                headers=make_headers(),
-            ) as r:
-                if r.status in (200, 204):
-                    print(f"  ✅ 削除: {t['name'][:50]}")
-                    deleted += 1
-                elif r.status == 429:
-                    data = await r.json()
-                    wait = data.get("retry_after", 1.0)
-                    print(f"  ⏳ rate limit {wait}s 待機中...")
-                    await asyncio.sleep(wait + 0.2)
-                    # リトライ
-                    async with session.delete(
-                        f"{DISCORD_API}/channels/{t['id']}",
-                        headers=make_headers(),
-                    ) as r2:
-                        if r2.status in (200, 204):
-                            print(f"  ✅ 削除(retry): {t['name'][:50]}")
-                            deleted += 1
-                        else:
-                            text = await r2.text()
-                            print(f"  ❌ 失敗: {t['name'][:50]} ({r2.status})")
-                else:
-                    text = await r.text()
-                    print(f"  ❌ 失敗: {t['name'][:50]} ({r.status})")
-            await asyncio.sleep(0.4)
+        async def delete(t: dict) -> bool:
+            r = await client.delete(f"/channels/{t['id']}")
+            if r.ok:
+                print(f"  ✅ 削除: {t['name'][:50]}")
+                return True
+            print(f"  ❌ 失敗: {t['name'][:50]} ({r.status})")
+            return False
+
+        # 待ち時間はバケットごとに DiscordHTTP が調整する
+        deleted = sum(await asyncio.gather(*(delete(t) for t in targets)))
 
         print(f"\n完了: {deleted}/{len(targets)} 削除")
 
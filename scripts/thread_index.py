@@ -0,0 +1,217 @@
+"""スレッド索引 — discord_admin.py のスレッド一覧をローカルのSQLiteから引く
+
+スレッドID（snowflake）は作成時刻の順に増えるので、作成日時はIDから分かり、
+「N日より古い」「新しい順にN件を残す」はどちらも「あるIDより小さい」という
+IDの範囲で答えられる（(parent_id, id) の主キーを範囲で読むだけ）。
+
+Discordとの同期は discord_admin.sync_index() が行い、ここは保存と検索だけを持つ。
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional
+
+DISCORD_EPOCH = 1420070400000  # 2015-01-01T00:00:00Z ms
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS threads (
+    parent_id INTEGER NOT NULL,
+    id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    type INTEGER NOT NULL,
+    created_at_ms INTEGER NOT NULL,
+    archived INTEGER NOT NULL,
+    archived_at_ms INTEGER,
+    last_seen_ms INTEGER NOT NULL,
+    PRIMARY KEY (parent_id, id)
+) WITHOUT ROWID;
+
+-- 削除したスレッドを親チャンネルが分からなくても消せるように
+CREATE INDEX IF NOT EXISTS idx_threads_id ON threads(id);
+
+-- 親チャンネル・種別（public / private）ごとの同期位置
+CREATE TABLE IF NOT EXISTS sync_state (
+    parent_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    archived_cursor_ms INTEGER NOT NULL,
+    synced_at_ms INTEGER NOT NULL,
+    PRIMARY KEY (parent_id, kind)
+) WITHOUT ROWID;
+"""
+
+# 範囲読み出し1回あたりの件数
+CHUNK_SIZE = 1000
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def snowflake_to_ms(snowflake_id: int | str) -> int:
+    return (int(snowflake_id) >> 22) + DISCORD_EPOCH
+
+
+def datetime_to_snowflake(at: datetime) -> int:
+    """at 以降に作られたスレッドのIDはこれ以上になる、という境界のID"""
+    return (int(at.timestamp() * 1000) - DISCORD_EPOCH) << 22
+
+
+def timestamp_to_ms(timestamp: str) -> int:
+    """Discord の ISO8601 タイムスタンプをエポックミリ秒にする"""
+    return int(datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp() * 1000)
+
+
+def archived_at_ms(thread: dict) -> Optional[int]:
+    timestamp = thread.get("thread_metadata", {}).get("archive_timestamp")
+    return timestamp_to_ms(timestamp) if timestamp else None
+
+
+class ThreadIndex:
+    """スレッド索引（1ファイルのSQLite）"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self) -> "ThreadIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+    def commit(self) -> None:
+        self.conn.commit()
+
+    # ── 書き込み ──────────────────────────────────
+
+    def upsert(self, threads: list[dict], seen_ms: int) -> None:
+        """APIから取得したスレッドを書き込む（既にあれば名前・状態・last_seen を更新）"""
+        self.conn.executemany(
+            """
+            INSERT INTO threads
+                (parent_id, id, name, type, created_at_ms, archived, archived_at_ms, last_seen_ms)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (parent_id, id) DO UPDATE SET
+                name = excluded.name,
+                type = excluded.type,
+                archived = excluded.archived,
+                archived_at_ms = excluded.archived_at_ms,
+                last_seen_ms = excluded.last_seen_ms
+            """,
+            [
+                (
+                    int(t["parent_id"]),
+                    int(t["id"]),
+                    t.get("name", ""),
+                    t.get("type", 11),
+                    snowflake_to_ms(t["id"]),
+                    int(bool(t.get("thread_metadata", {}).get("archived"))),
+                    archived_at_ms(t),
+                    seen_ms,
+                )
+                for t in threads
+            ],
+        )
+
+    def remove(self, thread_id: str) -> None:
+        self.conn.execute("DELETE FROM threads WHERE id = ?", (int(thread_id),))
+
+    def prune(self, parent_id: str, seen_before_ms: int, *, active_only: bool) -> int:
+        """last_seen が seen_before_ms より前の行を消し、消した件数を返す。
+
+        差分同期では active_only=True で呼ぶ。前回アクティブだったスレッドは、
+        今もアクティブなら一覧に、アーカイブされたなら新しいアーカイブのページに
+        必ず出てくるので、どちらにもなければ削除されている。
+        """
+        sql = "DELETE FROM threads WHERE parent_id = ? AND last_seen_ms < ?"
+        if active_only:
+            sql += " AND archived = 0"
+        return self.conn.execute(sql, (int(parent_id), seen_before_ms)).rowcount
+
+    def set_cursor(self, parent_id: str, kind: str, cursor_ms: int, synced_at_ms: int) -> None:
+        self.conn.execute(
+            """
+            INSERT INTO sync_state (parent_id, kind, archived_cursor_ms, synced_at_ms)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (parent_id, kind) DO UPDATE SET
+                archived_cursor_ms = max(archived_cursor_ms, excluded.archived_cursor_ms),
+                synced_at_ms = excluded.synced_at_ms
+            """,
+            (int(parent_id), kind, cursor_ms, synced_at_ms),
+        )
+
+    # ── 読み出し ──────────────────────────────────
+
+    def cursor(self, parent_id: str, kind: str) -> Optional[int]:
+        """前回の同期で見た最新の archive_timestamp（エポックミリ秒）。未同期ならNone"""
+        row = self.conn.execute(
+            "SELECT archived_cursor_ms FROM sync_state WHERE parent_id = ? AND kind = ?",
+            (int(parent_id), kind),
+        ).fetchone()
+        return row[0] if row else None
+
+    def synced(self, parent_id: str) -> bool:
+        row = self.conn.execute(
+            "SELECT 1 FROM sync_state WHERE parent_id = ? LIMIT 1", (int(parent_id),)
+        ).fetchone()
+        return row is not None
+
+    def count(self, parent_id: str) -> int:
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM threads WHERE parent_id = ?", (int(parent_id),)
+        ).fetchone()[0]
+
+    def nth_newest_id(self, parent_id: str, n: int) -> Optional[int]:
+        """新しい順で n 番目（1始まり）のスレッドID。n 件に満たなければNone"""
+        row = self.conn.execute(
+            "SELECT id FROM threads WHERE parent_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?",
+            (int(parent_id), n - 1),
+        ).fetchone()
+        return row[0] if row else None
+
+    def threads(self, parent_id: str, *, below_id: Optional[int] = None) -> Iterator[dict]:
+        """parent_id 配下のスレッドを新しい順に返す（below_id より小さいIDだけ）。
+
+        CHUNK_SIZE 件ずつIDの範囲で読むので、読みながら remove() してもよい。
+        """
+        upper = below_id if below_id is not None else (1 << 63) - 1
+        while True:
+            rows = self.conn.execute(
+                """
+                SELECT id, parent_id, name, type, archived
+                FROM threads
+                WHERE parent_id = ? AND id < ?
+                ORDER BY id DESC
+                LIMIT ?
+                """,
+                (int(parent_id), upper, CHUNK_SIZE),
+            ).fetchall()
+            for row in rows:
+                yield _to_thread(row)
+            if len(rows) < CHUNK_SIZE:
+                return
+            upper = rows[-1][0]
+
+
+def _to_thread(row: tuple) -> dict:
+    """行を API のスレッドと同じ形の dict にする（discord_admin の表示処理をそのまま使うため）"""
+    thread_id, parent_id, name, thread_type, archived = row
+    return {
+        "id": str(thread_id),
+        "parent_id": str(parent_id),
+        "name": name,
+        "type": thread_type,
+        "thread_metadata": {"archived": bool(archived)},
+    }
@@ -8,5 +8,15 @@ from __future__ import annotations
 
 from claude_discord.ext.api_server import ApiServer
 
+from ..utils.metrics import metrics_handler
+
 # Re-export for backward compatibility
-__all__ = ["ApiServer"]
+__all__ = ["ApiServer", "add_metrics_route"]
+
+
+def add_metrics_route(api_server: ApiServer) -> None:
+    """GET /metrics（Prometheus テキスト形式）を ApiServer に追加する。
+
+    api_server.start() より前に呼ぶこと（起動後はルートを追加できない）。
+    """
+    api_server.app.router.add_get("/metrics", metrics_handler)
@@ -5,8 +5,11 @@ from discord.ext import commands
 
 from claude_discord.concurrency import SessionRegistry
 
+from .utils.channels import ChannelResolver
+from .utils.dispatcher import OutboundDispatcher, Priority, dispatch_send
 from .utils.embeds import build_startup_embed
 from .utils.logger import get_logger
+from .utils.metrics import OUTBOUND_QUEUE_DEPTH, discord_trace_config
 
 logger = get_logger(__name__)
 
@@ -21,15 +24,26 @@ class EbiBot(commands.Bot):
         super().__init__(
             command_prefix="!",
             intents=intents,
+            # REST API の応答時間を /metrics に出す
+            http_trace=discord_trace_config(),
         )
         self.default_channel_id = default_channel_id
         # Alias for bridge compatibility (ClaudeDiscordBot uses channel_id)
         self.channel_id = default_channel_id
         self.session_registry = SessionRegistry()
+        self.channel_resolver = ChannelResolver(self)
+        # 全Cogの送信はここを通す（優先度・チャンネルごとの公平性・上限付きキュー）
+        self.dispatcher = OutboundDispatcher()
+        OUTBOUND_QUEUE_DEPTH.set_function(lambda: len(self.dispatcher))
+
+    async def resolve_channel(self, channel_id: int):
+        """チャンネル/スレッドを解決する（TTLキャッシュ付き）。取得できなければNone。"""
+        return await self.channel_resolver.resolve(channel_id)
 
     async def setup_hook(self) -> None:
         """Cogのロードとスラッシュコマンドの同期。"""
         # Cogは main.py 側で追加済み
+        self.dispatcher.start()
         await self.tree.sync()
         logger.info("スラッシュコマンドを同期しました")
 
@@ -38,11 +52,17 @@ class EbiBot(commands.Bot):
 
         if self.default_channel_id:
             try:
-                channel = self.get_channel(self.default_channel_id)
-                if not channel:
-                    channel = await self.fetch_channel(self.default_channel_id)
+                # キャッシュのウォームアップを兼ねる
+                channel = await self.resolve_channel(self.default_channel_id)
+                if channel is None:
+                    logger.error(f"デフォルトチャンネル取得不可: {self.default_channel_id}")
+                    return
                 embed = build_startup_embed()
-                await channel.send(embed=embed)
+                await dispatch_send(self, channel, Priority.STARTUP, embed=embed)
                 logger.info("起動通知を送信しました")
             except Exception as e:
                 logger.error(f"起動通知送信失敗: {e}")
+
+    async def close(self) -> None:
+        await self.dispatcher.stop()
+        await super().close()
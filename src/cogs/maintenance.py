@@ -0,0 +1,62 @@
+"""DBメンテナンス — WALの定期チェックポイント & 古い通知のアーカイブ"""
+
+from typing import Optional
+
+from discord.ext import commands, tasks
+
+from ..database.models import Database
+from ..database.retention import NotificationRetention
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class MaintenanceCog(commands.Cog):
+    """bot.db の定期メンテナンス"""
+
+    def __init__(
+        self,
+        bot: commands.Bot,
+        db: Database,
+        checkpoint_interval: float = 300.0,
+        retention: Optional[NotificationRetention] = None,
+        retention_interval: float = 6 * 3600.0,
+    ):
+        self.bot = bot
+        self.db = db
+        self.retention = retention
+        self.checkpoint_loop.change_interval(seconds=checkpoint_interval)
+        self.retention_loop.change_interval(seconds=retention_interval)
+
+    async def cog_load(self) -> None:
+        if self.db.is_wal:
+            self.checkpoint_loop.start()
+            logger.info("MaintenanceCog loaded, WAL checkpoint loop started")
+        if self.retention is not None:
+            self.retention_loop.start()
+            logger.info("MaintenanceCog loaded, retention loop started")
+
+    async def cog_unload(self) -> None:
+        self.checkpoint_loop.cancel()
+        self.retention_loop.cancel()
+
+    @tasks.loop(seconds=300)
+    async def checkpoint_loop(self) -> None:
+        """WALをPASSIVEチェックポイントしてWALファイルの肥大化を防ぐ。"""
+        try:
+            busy, wal_pages, checkpointed = await self.db.run(self.db.checkpoint)
+        except Exception as e:
+            logger.error(f"WALチェックポイント失敗: {e}")
+            return
+        if busy or checkpointed < wal_pages:
+            logger.info(
+                f"WALチェックポイント: {checkpointed}/{wal_pages}ページ (busy={busy})"
+            )
+
+    @tasks.loop(hours=6)
+    async def retention_loop(self) -> None:
+        """保持期限を過ぎた送信済み・失敗・キャンセル通知をアーカイブする。"""
+        try:
+            await self.retention.run()
+        except Exception as e:
+            logger.error(f"通知アーカイブ失敗: {e}")
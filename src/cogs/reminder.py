@@ -1,32 +1,107 @@
-"""/remind スラッシュコマンド & 30秒送信ループ"""
+"""/remind スラッシュコマンド & 期限駆動の送信ループ"""
 
+import asyncio
+import os
 import re
+import socket
+import time
+from collections import defaultdict
 from datetime import datetime, timedelta
+from typing import Optional
 
 import discord
 from discord import app_commands
 from discord.ext import commands, tasks
 
-from ..database.repository import NotificationRepository
+from ..database.repository import AsyncNotificationRepository, NotificationStatusBuffer
+from ..utils.dispatcher import Priority, dispatch_send
 from ..utils.embeds import build_reminder_embed, build_schedule_confirm_embed
 from ..utils.logger import get_logger
+from ..utils.metrics import CHECK_SCHEDULED_DURATION, NOTIFICATION_LATENESS, NOTIFICATIONS
+from ..utils.retry import RetryPolicy, is_retryable
+from ..utils.scheduler import DeadlineScheduler, parse_scheduled_at
 
 logger = get_logger(__name__)
 
+SENT = NOTIFICATIONS.labels(outcome="sent")
+FAILED = NOTIFICATIONS.labels(outcome="failed")
+RETRIED = NOTIFICATIONS.labels(outcome="retry")
+DEAD = NOTIFICATIONS.labels(outcome="dead")
+
+# Discord の1メッセージあたりの上限
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
 
 class ReminderCog(commands.Cog):
     """リマインダー機能"""
 
-    def __init__(self, bot: commands.Bot, repo: NotificationRepository):
+    def __init__(
+        self,
+        bot: commands.Bot,
+        repo: AsyncNotificationRepository,
+        *,
+        status_batch_size: int = 50,
+        status_flush_interval: float = 1.0,
+        max_concurrent_sends: int = 4,
+        coalesce_embeds: bool = False,
+        claim_batch_size: int = 100,
+        lease_seconds: float = 300.0,
+        worker_id: Optional[str] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+    ):
         self.bot = bot
         self.repo = repo
+        self.claim_batch_size = claim_batch_size
+        self.lease_seconds = lease_seconds
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.max_concurrent_sends = max_concurrent_sends
+        self.coalesce_embeds = coalesce_embeds
+        self.status_batch_size = status_batch_size
+        self.status_flush_interval = status_flush_interval
+        self._scheduler = DeadlineScheduler()
 
     async def cog_load(self) -> None:
-        self.check_scheduled.start()
-        logger.info("ReminderCog loaded, check loop started")
+        self.scheduler_loop.start()
+        logger.info("ReminderCog loaded, scheduler loop started")
 
     async def cog_unload(self) -> None:
-        self.check_scheduled.cancel()
+        self.scheduler_loop.cancel()
+
+    async def _load_schedule(self) -> None:
+        """pending通知の期限をDBから読み込んでヒープを作り直す。"""
+        self._scheduler.clear()
+        await self.repo.recover_expired_leases()
+        for notif in await self.repo.get_pending():
+            if notif.get("next_attempt_at_ms"):
+                # 再試行待ちは次回試行時刻に起きる
+                self._scheduler.push(
+                    datetime.fromtimestamp(notif["next_attempt_at_ms"] / 1000), notif["id"]
+                )
+            else:
+                self._schedule(notif["id"], notif["scheduled_at"])
+        await self._schedule_lease_recheck()
+        logger.info(f"スケジュール読み込み: {len(self._scheduler)}件")
+
+    async def _schedule_lease_recheck(self) -> None:
+        """他のワーカーが確保中の通知があれば、そのリース期限にも起きるようにする。
+
+        確保したワーカーが落ちていたら、その時点でpendingに戻して送り直す。
+        """
+        expires_ms = await self.repo.next_lease_expiry_ms()
+        if expires_ms is not None:
+            self._scheduler.push(datetime.fromtimestamp(expires_ms / 1000), 0)
+
+    def _schedule(self, notification_id: int, scheduled_at: str) -> None:
+        """通知の期限をスケジューラに登録する。"""
+        try:
+            when = parse_scheduled_at(scheduled_at)
+        except ValueError:
+            # 解釈できない時刻は即座にDB側の判定に回す
+            logger.warning(f"scheduled_at解析失敗: id={notification_id}, at={scheduled_at}")
+            when = datetime.now()
+        self._scheduler.push(when, notification_id)
 
     @app_commands.command(
         name="remind",
@@ -67,13 +142,14 @@ class ReminderCog(commands.Cog):
 
         scheduled_str = scheduled.strftime("%Y-%m-%dT%H:%M:%S")
 
-        # DB に登録
-        self.repo.create(
+        # DB に登録し、スケジューラを起こす
+        row_id = await self.repo.create(
             message=message,
             scheduled_at=scheduled_str,
             source="slash_command",
             channel_id=interaction.channel_id,
         )
+        self._schedule(row_id, scheduled_str)
 
         embed = build_schedule_confirm_embed(
             message=message,
@@ -81,39 +157,189 @@ class ReminderCog(commands.Cog):
         )
         await interaction.response.send_message(embed=embed)
 
-    @tasks.loop(seconds=30)
+    @tasks.loop()
+    async def scheduler_loop(self) -> None:
+        """次の期限まで眠り、期限が来たら送信する。"""
+        await self._scheduler.wait_next()
+        await self.check_scheduled()
+
+    @scheduler_loop.before_loop
+    async def before_scheduler_loop(self) -> None:
+        await self.bot.wait_until_ready()
+        await self._load_schedule()
+
     async def check_scheduled(self) -> None:
-        """30秒ごとにpending通知をチェックして送信する。"""
-        now_str = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
-        pending = self.repo.get_pending(before=now_str)
+        """期限が来たpending通知を確保して送信する。
 
+        claim_due で sending に遷移させた行だけを送るので、同じDBを複数の
+        プロセスが見ていても二重送信しない。
+        """
+        with CHECK_SCHEDULED_DURATION.time():
+            await self._check_scheduled()
+
+    async def _check_scheduled(self) -> None:
+        now = datetime.now()
+        now_ms = int(now.timestamp() * 1000)
+        self._scheduler.pop_due(now)
+        await self.repo.recover_expired_leases(now_ms)
+
+        status = NotificationStatusBuffer(
+            self.repo,
+            max_batch=self.status_batch_size,
+            flush_interval=self.status_flush_interval,
+            worker_id=self.worker_id,
+        )
+        try:
+            while True:
+                claimed = await self.repo.claim_due(
+                    self.claim_batch_size, self.lease_seconds, self.worker_id, now_ms
+                )
+                if claimed:
+                    await self._deliver(claimed, status)
+                if len(claimed) < self.claim_batch_size:
+                    break
+        finally:
+            await status.flush()
+        await self._schedule_lease_recheck()
+
+    async def _deliver(
+        self, pending: list[dict], status: NotificationStatusBuffer
+    ) -> None:
+        """チャンネルごとにまとめて並行送信する。
+
+        同じチャンネル内は scheduled_at 順に1件ずつ、別チャンネル同士は
+        max_concurrent_sends を上限に同時に送る。遅いチャンネルが
+        他のチャンネルの通知を待たせない。
+        """
+        by_channel: dict[int, list[dict]] = defaultdict(list)
         for notif in pending:
-            try:
-                channel_id = notif.get("channel_id") or self.bot.default_channel_id
-                if not channel_id:
-                    logger.warning(f"チャンネルID不明: notif_id={notif['id']}")
-                    self.repo.mark_failed(notif["id"], "No channel ID")
-                    continue
-
-                channel = self.bot.get_channel(int(channel_id))
-                if not channel:
-                    channel = await self.bot.fetch_channel(int(channel_id))
-
-                embed = build_reminder_embed(
-                    message=notif["message"],
-                    title=notif.get("title"),
+            channel_id = notif.get("channel_id") or self.bot.default_channel_id
+            if not channel_id:
+                logger.warning(f"チャンネルID不明: notif_id={notif['id']}")
+                FAILED.inc()
+                await status.failed(notif["id"], "No channel ID")
+                continue
+            by_channel[int(channel_id)].append(notif)
+
+        semaphore = asyncio.Semaphore(self.max_concurrent_sends)
+
+        async def drain_channel(channel_id: int, notifs: list[dict]) -> None:
+            for batch in self._pack(notifs):
+                async with semaphore:
+                    await self._send_batch(channel_id, batch, status)
+
+        await asyncio.gather(*(
+            drain_channel(channel_id, notifs)
+            for channel_id, notifs in by_channel.items()
+        ))
+
+    def _pack(self, notifs: list[dict]) -> list[list[tuple[dict, discord.Embed]]]:
+        """通知をEmbedにし、1メッセージで送る単位に分ける。
+
+        coalesce_embeds が有効なら、Discordの上限（10 Embed / 合計6000文字）に
+        収まる範囲で同じチャンネルの通知を1メッセージにまとめる。
+        """
+        batches: list[list[tuple[dict, discord.Embed]]] = []
+        current: list[tuple[dict, discord.Embed]] = []
+        current_chars = 0
+        for notif in notifs:
+            embed = build_reminder_embed(
+                message=notif["message"],
+                title=notif.get("title"),
+            )
+            if notif.get("color"):
+                embed.color = notif["color"]
+
+            chars = len(embed)
+            if current and (
+                not self.coalesce_embeds
+                or len(current) >= MAX_EMBEDS_PER_MESSAGE
+                or current_chars + chars > MAX_EMBED_CHARS_PER_MESSAGE
+            ):
+                batches.append(current)
+                current, current_chars = [], 0
+            current.append((notif, embed))
+            current_chars += chars
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _send_batch(
+        self,
+        channel_id: int,
+        batch: list[tuple[dict, discord.Embed]],
+        status: NotificationStatusBuffer,
+    ) -> None:
+        """1メッセージ分の通知を送信し、各通知の結果をstatusに記録する。"""
+        ids = [notif["id"] for notif, _ in batch]
+        try:
+            channel = await self.bot.resolve_channel(channel_id)
+            if channel is None:
+                raise LookupError(f"Channel {channel_id} not found or inaccessible")
+
+            if len(batch) == 1:
+                await dispatch_send(self.bot, channel, Priority.REMINDER, embed=batch[0][1])
+            else:
+                await dispatch_send(
+                    self.bot, channel, Priority.REMINDER,
+                    embeds=[embed for _, embed in batch],
+                )
+
+        except Exception as e:
+            logger.error(f"通知送信失敗: ids={ids}, error={e}")
+            await self._record_failure([notif for notif, _ in batch], e, status)
+            return
+
+        sent_at_ms = time.time() * 1000
+        for notif, _ in batch:
+            SENT.inc()
+            if notif.get("scheduled_at_ms"):
+                NOTIFICATION_LATENESS.observe(
+                    max(0.0, (sent_at_ms - notif["scheduled_at_ms"]) / 1000)
                 )
-                if notif.get("color"):
-                    embed.color = notif["color"]
+            await status.sent(notif["id"])
+        logger.info(f"通知送信完了: ids={ids}", extra={"sample_key": "reminder.sent"})
+
+    async def _record_failure(
+        self,
+        notifs: list[dict],
+        error: Exception,
+        status: NotificationStatusBuffer,
+    ) -> None:
+        """送信失敗を記録する。
 
-                await channel.send(embed=embed)
-                self.repo.mark_sent(notif["id"])
-                logger.info(f"通知送信完了: id={notif['id']}")
+        一時的なエラー（429・5xx・接続エラー等）はバックオフして再試行し、
+        retry_policy の上限回数に達したらデッドレター（dead）にする。
+        それ以外のエラーは再試行せず failed にする。
+        """
+        message = str(error)
+        if not is_retryable(error):
+            for notif in notifs:
+                FAILED.inc()
+                await status.failed(notif["id"], message)
+            return
 
-            except Exception as e:
-                logger.error(f"通知送信失敗: id={notif['id']}, error={e}")
-                self.repo.mark_failed(notif["id"], str(e))
+        for notif in notifs:
+            attempts = notif.get("attempts") or 1
+            if self.retry_policy.exhausted(attempts):
+                logger.error(f"再試行上限に達したためデッドレターへ: id={notif['id']}, attempts={attempts}")
+                DEAD.inc()
+                await status.dead(notif["id"], message)
+                continue
 
-    @check_scheduled.before_loop
-    async def before_check_scheduled(self) -> None:
-        await self.bot.wait_until_ready()
+            RETRIED.inc()
+            next_attempt_at = time.time() + self.retry_policy.delay(attempts)
+            await status.retry(notif["id"], message, int(next_attempt_at * 1000))
+            self._scheduler.push(datetime.fromtimestamp(next_attempt_at), notif["id"])
+            logger.warning(
+                f"通知を再試行予定: id={notif['id']}, attempts={attempts}, "
+                f"at={datetime.fromtimestamp(next_attempt_at):%H:%M:%S}"
+            )
+
+    async def replay_dead_letter(self, notification_id: int) -> bool:
+        """デッドレター通知をpendingに戻し、すぐに送信を試みる。戻せたらTrue。"""
+        if not await self.repo.replay_dead_letter(notification_id):
+            return False
+        self._scheduler.push(datetime.now(), notification_id)
+        logger.info(f"デッドレターを再送キューへ: id={notification_id}")
+        return True
@@ -1,66 +1,261 @@
 """Todoist期限切れ30分チェックループ"""
 
+import asyncio
 import json
-import subprocess
-from datetime import datetime
+import os
+import signal
+from datetime import date, datetime
+from typing import Optional, Protocol
 
+import aiohttp
 from discord.ext import commands, tasks
 
+from ..database.watchdog_repository import WatchdogStateRepository
+from ..utils.dispatcher import Priority, dispatch_send
 from ..utils.embeds import build_watchdog_embed
 from ..utils.logger import get_logger
+from ..utils.metrics import WATCHDOG_FETCH_DURATION
 
 logger = get_logger(__name__)
 
 TODOIST_SH = "/home/ebi/.claude/skills/todoist/scripts/todoist.sh"
+FETCH_TIMEOUT = 30.0
+MAX_OUTPUT_BYTES = 16 * 1024 * 1024
+TODOIST_SYNC_URL = "https://api.todoist.com/api/v1/sync"
+
+
+class TaskSource(Protocol):
+    """Watchdogが期限切れタスクを取ってくる先。
+
+    fetch_overdue は {"id", "content", "due"} を持つdictのリストを返す。
+    取得に失敗したときは例外を投げずに空リストを返す。
+    """
+
+    async def fetch_overdue(self) -> list[dict]: ...
+
+    async def close(self) -> None: ...
+
+
+class TodoistScriptSource:
+    """todoist.sh を子プロセスで叩くタスクソース（従来方式）。"""
+
+    async def fetch_overdue(self) -> list[dict]:
+        """todoist.shで期限切れタスクを取得する。
+
+        子プロセスは非同期で起動し、stdout/stderr を並行して読むので
+        イベントループを止めない。タイムアウトやCog unloadによるキャンセル時は
+        プロセスグループごとkillしてから抜ける（todoist.sh が起動した curl 等が
+        パイプを握ったまま残らないように）。
+        """
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                TODOIST_SH, "tasks", "--filter", "(overdue)",
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=True,
+            )
+        except (FileNotFoundError, PermissionError) as e:
+            logger.error(f"Todoist取得エラー: {e}")
+            return []
+
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                asyncio.gather(
+                    self._read_stream(proc.stdout),
+                    self._read_stream(proc.stderr),
+                ),
+                timeout=FETCH_TIMEOUT,
+            )
+            returncode = await proc.wait()
+        except asyncio.TimeoutError:
+            logger.error(f"Todoist取得エラー: {FETCH_TIMEOUT}秒でタイムアウト")
+            return []
+        except ValueError as e:
+            logger.error(f"Todoist取得エラー: {e}")
+            return []
+        finally:
+            if proc.returncode is None:
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                await proc.wait()
+
+        if returncode != 0:
+            logger.error(f"todoist.sh失敗: {stderr.decode(errors='replace')}")
+            return []
+
+        try:
+            tasks = json.loads(stdout)
+        except json.JSONDecodeError as e:
+            logger.error(f"Todoist取得エラー: {e}")
+            return []
+        if isinstance(tasks, list):
+            return tasks
+        return []
+
+    @staticmethod
+    async def _read_stream(stream: asyncio.StreamReader) -> bytes:
+        """ストリームをEOFまでチャンク単位で読む。上限を超えたらValueError。"""
+        chunks = bytearray()
+        while True:
+            chunk = await stream.read(65536)
+            if not chunk:
+                return bytes(chunks)
+            chunks.extend(chunk)
+            if len(chunks) > MAX_OUTPUT_BYTES:
+                raise ValueError(f"出力が大きすぎます（>{MAX_OUTPUT_BYTES} bytes）")
+
+    async def close(self) -> None:
+        pass
+
+
+class TodoistSyncSource:
+    """Todoist Sync API を直接叩くタスクソース。
+
+    sync_token を使ったインクリメンタル同期で、2回目以降は変更のあった
+    タスクだけを受け取り、手元のインデックスに反映する。期限切れの判定は
+    インデックスから行う（Todoistの "(overdue)" フィルタと同じ基準）。
+    """
+
+    def __init__(
+        self,
+        token: str,
+        url: str = TODOIST_SYNC_URL,
+        timeout: float = FETCH_TIMEOUT,
+    ):
+        self.token = token
+        self.url = url
+        self.timeout = timeout
+        self._sync_token = "*"
+        self._items: dict[str, dict] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def fetch_overdue(self) -> list[dict]:
+        """同期してから期限切れタスクを返す。"""
+        try:
+            await self._sync()
+        except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, ValueError) as e:
+            logger.error(f"Todoist同期エラー: {e}")
+            return []
+
+        now = datetime.now()
+        overdue = [item for item in self._items.values() if self.is_overdue(item, now)]
+        overdue.sort(key=lambda item: item["due"]["date"])
+        return [
+            {"id": item["id"], "content": item.get("content", ""), "due": item["due"]["date"]}
+            for item in overdue
+        ]
+
+    async def _sync(self) -> None:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={"Authorization": f"Bearer {self.token}"},
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+
+        async with self._session.post(
+            self.url,
+            data={"sync_token": self._sync_token, "resource_types": '["items"]'},
+        ) as r:
+            r.raise_for_status()
+            data = await r.json()
+
+        if data.get("full_sync"):
+            self._items.clear()
+        for item in data.get("items", []):
+            item_id = str(item["id"])
+            if item.get("is_deleted") or item.get("checked"):
+                self._items.pop(item_id, None)
+            else:
+                self._items[item_id] = item
+        self._sync_token = data["sync_token"]
+        logger.info(
+            f"Todoist同期: {len(data.get('items', []))}件受信, "
+            f"インデックス{len(self._items)}件, full_sync={bool(data.get('full_sync'))}"
+        )
+
+    @staticmethod
+    def is_overdue(item: dict, now: datetime) -> bool:
+        """期限切れか判定する。日付のみは今日より前、時刻付きは現在時刻より前。"""
+        due = item.get("due")
+        if not due or not due.get("date"):
+            return False
+
+        value = due["date"]
+        try:
+            if "T" not in value:
+                return date.fromisoformat(value) < now.date()
+            due_at = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return False
+
+        if due_at.tzinfo is not None:
+            return due_at < now.astimezone()
+        return due_at < now
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
 
 
 class WatchdogCog(commands.Cog):
     """Todoist期限切れ監視"""
 
-    def __init__(self, bot: commands.Bot):
+    def __init__(
+        self,
+        bot: commands.Bot,
+        source: Optional[TaskSource] = None,
+        state_repo: Optional[WatchdogStateRepository] = None,
+    ):
         self.bot = bot
+        self.source = source or TodoistScriptSource()
+        self.state_repo = state_repo
         self._notified_today: set[str] = set()
         self._last_reset_date: str = ""
 
     async def cog_load(self) -> None:
+        await self._load_state()
         self.check_overdue.start()
         logger.info("WatchdogCog loaded, overdue check loop started")
 
+    async def _load_state(self) -> None:
+        """今日の通知済みタスクをDBから復元する（再起動で重複通知しないため）。"""
+        if self.state_repo is None:
+            return
+        today = datetime.now().strftime("%Y-%m-%d")
+        try:
+            await self.state_repo.purge_before(today)
+            self._notified_today = await self.state_repo.load(today)
+        except Exception as e:
+            logger.error(f"Watchdog通知済み記録の読み込み失敗: {e}")
+            return
+        self._last_reset_date = today
+        logger.info(f"Watchdog通知済み記録を復元: {len(self._notified_today)}件")
+
     async def cog_unload(self) -> None:
         self.check_overdue.cancel()
+        await self.source.close()
 
-    def _reset_daily(self) -> None:
-        """日付が変わったら通知済みセットをリセットする。"""
+    def _reset_daily(self) -> bool:
+        """日付が変わったら通知済みセットをリセットする。リセットしたらTrue。"""
         today = datetime.now().strftime("%Y-%m-%d")
         if self._last_reset_date != today:
             self._notified_today.clear()
             self._last_reset_date = today
+            return True
+        return False
 
     def _is_active_hours(self) -> bool:
         """8:00-23:00 JSTの間だけ動く。"""
         hour = datetime.now().hour
         return 8 <= hour < 23
 
-    def _fetch_overdue_tasks(self) -> list[dict]:
-        """todoist.shで期限切れタスクを取得する。"""
-        try:
-            result = subprocess.run(
-                [TODOIST_SH, "tasks", "--filter", "(overdue)"],
-                capture_output=True,
-                text=True,
-                timeout=30,
-            )
-            if result.returncode != 0:
-                logger.error(f"todoist.sh失敗: {result.stderr}")
-                return []
-
-            tasks = json.loads(result.stdout)
-            if isinstance(tasks, list):
-                return tasks
-            return []
-        except (subprocess.TimeoutExpired, json.JSONDecodeError, FileNotFoundError) as e:
-            logger.error(f"Todoist取得エラー: {e}")
-            return []
+    async def _fetch_overdue_tasks(self) -> list[dict]:
+        """タスクソースから期限切れタスクを取得する。"""
+        with WATCHDOG_FETCH_DURATION.time():
+            return await self.source.fetch_overdue()
 
     @tasks.loop(minutes=30)
     async def check_overdue(self) -> None:
@@ -68,19 +263,25 @@ class WatchdogCog(commands.Cog):
         if not self._is_active_hours():
             return
 
-        self._reset_daily()
+        if self._reset_daily() and self.state_repo is not None:
+            try:
+                await self.state_repo.purge_before(self._last_reset_date)
+            except Exception as e:
+                logger.error(f"Watchdog通知済み記録の削除失敗: {e}")
 
-        overdue_tasks = self._fetch_overdue_tasks()
+        overdue_tasks = await self._fetch_overdue_tasks()
         if not overdue_tasks:
             return
 
         # 未通知のタスクだけフィルタ
         new_tasks = []
+        new_ids: list[str] = []
         for task in overdue_tasks:
-            task_id = task.get("id", "")
-            if task_id and task_id not in self._notified_today:
+            # ソースによってIDが int のことがあるので、保存・復元と同じ文字列にそろえる
+            task_id = str(task.get("id") or "")
+            if task_id and task_id not in self._notified_today and task_id not in new_ids:
                 new_tasks.append(task)
-                self._notified_today.add(task_id)
+                new_ids.append(task_id)
 
         if not new_tasks:
             return
@@ -90,18 +291,32 @@ class WatchdogCog(commands.Cog):
             logger.warning("デフォルトチャンネルIDが未設定")
             return
 
-        channel = self.bot.get_channel(channel_id)
-        if not channel:
-            try:
-                channel = await self.bot.fetch_channel(channel_id)
-            except Exception as e:
-                logger.error(f"チャンネル取得失敗: {e}")
-                return
+        try:
+            channel = await self.bot.resolve_channel(channel_id)
+        except Exception as e:
+            logger.error(f"チャンネル取得失敗: {e}")
+            return
+        if channel is None:
+            logger.error(f"チャンネル取得失敗: id={channel_id}")
+            return
 
         embed = build_watchdog_embed(new_tasks)
-        await channel.send(embed=embed)
+        try:
+            await dispatch_send(self.bot, channel, Priority.WATCHDOG, embed=embed)
+        except Exception as e:
+            # 通知済みにしないので、次の30分ごとのチェックで再送する
+            logger.error(f"Watchdog通知送信失敗: {e}")
+            return
         logger.info(f"Watchdog通知送信: {len(new_tasks)}件")
 
+        # 送れたものだけ通知済みにする（送る前に記録すると、失敗しても今日は黙ってしまう）
+        self._notified_today.update(new_ids)
+        if self.state_repo is not None:
+            try:
+                await self.state_repo.add_many(self._last_reset_date, new_ids)
+            except Exception as e:
+                logger.error(f"Watchdog通知済み記録の保存失敗: {e}")
+
     @check_overdue.before_loop
     async def before_check_overdue(self) -> None:
         await self.bot.wait_until_ready()
@@ -1,13 +1,21 @@
 """SQLiteスキーマ & Databaseクラス"""
 
+import asyncio
+import functools
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Optional, TypeVar
 
 from ..utils.logger import get_logger
+from ..utils.metrics import DB_QUERY_DURATION
 
 logger = get_logger(__name__)
 
+T = TypeVar("T")
+
 SCHEMA = """
 CREATE TABLE IF NOT EXISTS scheduled_notifications (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -20,20 +28,164 @@ CREATE TABLE IF NOT EXISTS scheduled_notifications (
     status TEXT NOT NULL DEFAULT 'pending',
     sent_at TEXT,
     error_message TEXT,
-    created_at TEXT DEFAULT (datetime('now', 'localtime'))
+    created_at TEXT DEFAULT (datetime('now', 'localtime')),
+    scheduled_at_ms INTEGER,
+    lease_owner TEXT,
+    lease_expires_ms INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at_ms INTEGER
 );
 
-CREATE INDEX IF NOT EXISTS idx_notif_status_scheduled
-    ON scheduled_notifications(status, scheduled_at);
+CREATE TABLE IF NOT EXISTS watchdog_notified (
+    notified_date TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    PRIMARY KEY (notified_date, task_id)
+) WITHOUT ROWID;
+"""
+
+# マイグレーション後に作るインデックス（既存DBでは列追加を待つ必要があるため分ける）
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_notif_pending_due
+    ON scheduled_notifications(scheduled_at_ms)
+    WHERE status = 'pending';
+
+-- claim_due の「試行回数の少ない順 → 期限順」をソートなしで先頭から読むため
+CREATE INDEX IF NOT EXISTS idx_notif_pending_claim
+    ON scheduled_notifications(attempts, scheduled_at_ms)
+    WHERE status = 'pending';
+
+CREATE INDEX IF NOT EXISTS idx_notif_sending_lease
+    ON scheduled_notifications(lease_expires_ms)
+    WHERE status = 'sending';
+
+CREATE INDEX IF NOT EXISTS idx_notif_dead
+    ON scheduled_notifications(id)
+    WHERE status = 'dead';
 """
 
+BACKFILL_BATCH_SIZE = 5000
+
+# claim_due の UPDATE ... RETURNING に必要なSQLiteのバージョン
+MIN_SQLITE_VERSION = (3, 35, 0)
+
+
+def to_epoch_ms(scheduled_at: str) -> int:
+    """scheduled_at 文字列（ISO形式・タイムゾーンなしはローカル時刻）をエポックミリ秒にする。"""
+    return int(datetime.fromisoformat(scheduled_at).timestamp() * 1000)
+
+
+def _migrate_scheduled_at_ms(conn: sqlite3.Connection) -> None:
+    """v1: scheduled_at_ms 列を追加して埋め、pending専用の部分インデックスに切り替える。"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(scheduled_notifications)")}
+    if "scheduled_at_ms" not in columns:
+        conn.execute("ALTER TABLE scheduled_notifications ADD COLUMN scheduled_at_ms INTEGER")
+
+    backfilled = 0
+    while True:
+        rows = conn.execute(
+            """
+            SELECT id, scheduled_at FROM scheduled_notifications
+            WHERE scheduled_at_ms IS NULL
+            LIMIT ?
+            """,
+            (BACKFILL_BATCH_SIZE,),
+        ).fetchall()
+        if not rows:
+            break
+        updates = []
+        for row_id, scheduled_at in rows:
+            try:
+                ms = to_epoch_ms(scheduled_at)
+            except (TypeError, ValueError):
+                # 解釈できない時刻は即時扱い（従来の文字列比較でも送信対象になっていた）
+                logger.warning(f"scheduled_at解析失敗: id={row_id}, at={scheduled_at}")
+                ms = 0
+            updates.append((ms, row_id))
+        conn.executemany(
+            "UPDATE scheduled_notifications SET scheduled_at_ms = ? WHERE id = ?",
+            updates,
+        )
+        backfilled += len(updates)
+
+    conn.execute("DROP INDEX IF EXISTS idx_notif_status_scheduled")
+    if backfilled:
+        logger.info(f"scheduled_at_ms バックフィル: {backfilled}件")
+
+
+def _migrate_leases(conn: sqlite3.Connection) -> None:
+    """v2: 送信中の行を複数ワーカーで取り合わないためのリース列を追加する。"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(scheduled_notifications)")}
+    if "lease_owner" not in columns:
+        conn.execute("ALTER TABLE scheduled_notifications ADD COLUMN lease_owner TEXT")
+    if "lease_expires_ms" not in columns:
+        conn.execute("ALTER TABLE scheduled_notifications ADD COLUMN lease_expires_ms INTEGER")
+
+
+def _migrate_retries(conn: sqlite3.Connection) -> None:
+    """v3: 再試行のための試行回数と次回試行時刻の列を追加する。"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(scheduled_notifications)")}
+    if "attempts" not in columns:
+        conn.execute(
+            "ALTER TABLE scheduled_notifications ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0"
+        )
+    if "next_attempt_at_ms" not in columns:
+        conn.execute("ALTER TABLE scheduled_notifications ADD COLUMN next_attempt_at_ms INTEGER")
+
+
+# (バージョン, マイグレーション関数)。PRAGMA user_version で適用済みを管理する
+MIGRATIONS: list[tuple[int, Callable[[sqlite3.Connection], None]]] = [
+    (1, _migrate_scheduled_at_ms),
+    (2, _migrate_leases),
+    (3, _migrate_retries),
+]
+
+
+@dataclass(frozen=True)
+class SQLiteProfile:
+    """接続時に適用するSQLiteの性能設定"""
+
+    journal_mode: str = "DELETE"
+    synchronous: str = "FULL"
+    busy_timeout_ms: int = 5000
+    cache_size_kib: int = 2000
+    mmap_size: int = 0
+
+
+PROFILES: dict[str, SQLiteProfile] = {
+    # SQLite / sqlite3 モジュールの既定値と同じ（ロールバックジャーナル）
+    "default": SQLiteProfile(),
+    # WAL + synchronous=NORMAL: commitごとのfsyncを省き、読み取りと書き込みが並行できる。
+    # 電源断時に直近のcommitを失う可能性はあるがDBは壊れない
+    "wal": SQLiteProfile(
+        journal_mode="WAL",
+        synchronous="NORMAL",
+        busy_timeout_ms=5000,
+        cache_size_kib=16384,
+        mmap_size=64 * 1024 * 1024,
+    ),
+}
+
+
+def _timed(timer, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """DB専用スレッド上で func を実行し、所要時間を記録する（キュー待ちは含めない）。"""
+    with timer.time():
+        return func(*args, **kwargs)
+
 
 class Database:
     """SQLiteデータベース管理クラス"""
 
-    def __init__(self, db_path: str = "data/bot.db"):
+    def __init__(
+        self,
+        db_path: str = "data/bot.db",
+        profile: Optional[SQLiteProfile] = None,
+    ):
         self.db_path = db_path
+        self.profile = profile or PROFILES["default"]
         self._connection: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # SQLite が実際に適用した journal_mode（WALを断られることがあるので設定値とは別）
+        self.journal_mode: Optional[str] = None
 
     def connect(self) -> sqlite3.Connection:
         """接続を取得（なければ作成）。"""
@@ -45,18 +197,87 @@ class Database:
             self.db_path, check_same_thread=False
         )
         self._connection.row_factory = sqlite3.Row
-        logger.info(f"DB接続: {self.db_path}")
+        self.journal_mode = self._apply_profile(self._connection)
+        if self.journal_mode.upper() != self.profile.journal_mode.upper():
+            logger.warning(
+                f"journal_mode={self.profile.journal_mode} が適用されず {self.journal_mode} で動作"
+            )
+        logger.info(f"DB接続: {self.db_path} (journal_mode={self.journal_mode})")
         return self._connection
 
+    def _apply_profile(self, conn: sqlite3.Connection) -> str:
+        """性能設定をPRAGMAで適用する。実際のjournal_modeを返す。"""
+        profile = self.profile
+        journal_mode = conn.execute(
+            f"PRAGMA journal_mode={profile.journal_mode}"
+        ).fetchone()[0]
+        conn.execute(f"PRAGMA synchronous={profile.synchronous}")
+        conn.execute(f"PRAGMA busy_timeout={int(profile.busy_timeout_ms)}")
+        conn.execute(f"PRAGMA cache_size={-int(profile.cache_size_kib)}")
+        conn.execute(f"PRAGMA mmap_size={int(profile.mmap_size)}")
+        return journal_mode
+
+    @property
+    def is_wal(self) -> bool:
+        """実際にWALで動いているか（未接続ならFalse）。"""
+        return (self.journal_mode or "").upper() == "WAL"
+
+    def checkpoint(self) -> tuple[int, int, int]:
+        """WALをPASSIVEモードでチェックポイントする。
+
+        書き込み中のトランザクションを待たずに進められる分だけ書き戻す。
+        (busy, WALのページ数, 書き戻したページ数) を返す。
+        """
+        row = self.connection.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+        return row[0], row[1], row[2]
+
     def initialize(self) -> None:
-        """スキーマを初期化する。"""
+        """スキーマを初期化し、未適用のマイグレーションを流す。"""
+        if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+            required = ".".join(map(str, MIN_SQLITE_VERSION))
+            raise RuntimeError(
+                f"SQLite {sqlite3.sqlite_version} は古すぎます（{required} 以上が必要: "
+                "UPDATE ... RETURNING を使うため）"
+            )
         conn = self.connect()
         conn.executescript(SCHEMA)
         conn.commit()
+        self._migrate(conn)
+        conn.executescript(INDEXES)
+        conn.commit()
         logger.info("DBスキーマ初期化完了")
 
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for target, migration in MIGRATIONS:
+            if version >= target:
+                continue
+            with conn:
+                migration(conn)
+                conn.execute(f"PRAGMA user_version = {target}")
+            logger.info(f"DBマイグレーション適用: v{target}")
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """DB専用スレッドで func を実行する。
+
+        SQLiteの呼び出し（commit時のfsyncを含む）がイベントループを止めないよう、
+        全てのクエリを1本のスレッドに直列化して流す。
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="ebibot-db"
+            )
+        loop = asyncio.get_running_loop()
+        timer = DB_QUERY_DURATION.labels(op=getattr(func, "__name__", "other"))
+        return await loop.run_in_executor(
+            self._executor, functools.partial(_timed, timer, func, *args, **kwargs)
+        )
+
     def close(self) -> None:
         """接続を閉じる。"""
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
         if self._connection:
             self._connection.close()
             self._connection = None
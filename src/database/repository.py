@@ -1,9 +1,11 @@
 """scheduled_notifications CRUD"""
 
+import asyncio
+import time
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Sequence
 
-from .models import Database
+from .models import Database, to_epoch_ms
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -30,10 +32,13 @@ class NotificationRepository:
         cursor = conn.execute(
             """
             INSERT INTO scheduled_notifications
-                (message, title, color, scheduled_at, source, channel_id)
-            VALUES (?, ?, ?, ?, ?, ?)
+                (message, title, color, scheduled_at, source, channel_id, scheduled_at_ms)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
             """,
-            (message, title, color, scheduled_at, source, channel_id),
+            (
+                message, title, color, scheduled_at, source, channel_id,
+                to_epoch_ms(scheduled_at),
+            ),
         )
         conn.commit()
         row_id = cursor.lastrowid
@@ -42,25 +47,107 @@ class NotificationRepository:
 
     def get_pending(self, before: Optional[str] = None) -> list[dict]:
         """pending状態の通知を取得する。beforeを指定すると、その時刻以前のみ。"""
-        conn = self.db.connection
         if before:
+            return self.get_due(to_epoch_ms(before))
+        conn = self.db.connection
+        rows = conn.execute(
+            """
+            SELECT * FROM scheduled_notifications
+            WHERE status = 'pending'
+            ORDER BY scheduled_at_ms
+            """,
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_due(self, before_ms: int, limit: Optional[int] = None) -> list[dict]:
+        """scheduled_at_ms が before_ms 以前のpending通知を古い順に取得する。
+
+        pending行だけの部分インデックスを使うので、履歴がどれだけ増えても
+        O(log n + k) で済む。再試行待ちの行は next_attempt_at_ms が来るまで除く。
+        """
+        conn = self.db.connection
+        rows = conn.execute(
+            """
+            SELECT * FROM scheduled_notifications
+            WHERE status = 'pending' AND scheduled_at_ms <= ?
+                AND (next_attempt_at_ms IS NULL OR next_attempt_at_ms <= ?)
+            ORDER BY scheduled_at_ms
+            LIMIT ?
+            """,
+            (before_ms, before_ms, -1 if limit is None else limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def claim_due(
+        self,
+        limit: int,
+        lease_seconds: float,
+        worker_id: str,
+        now_ms: Optional[int] = None,
+    ) -> list[dict]:
+        """期限が来たpending通知を最大limit件、送信中（sending）として確保する。
+
+        選択と状態遷移を1つの UPDATE ... RETURNING で行うので、同じDBを見ている
+        別プロセスと同じ行を取り合うことはない。確保した行には worker_id と
+        リース期限を付ける。送信前にワーカーが落ちても、リース切れの行は
+        recover_expired_leases で pending に戻る。
+
+        確保するたびに attempts を1増やす。試行回数の少ない行から確保するので、
+        失敗を繰り返している通知が新しい通知を押しのけることはない。
+        """
+        if now_ms is None:
+            now_ms = int(time.time() * 1000)
+        conn = self.db.connection
+        with conn:
             rows = conn.execute(
                 """
-                SELECT * FROM scheduled_notifications
-                WHERE status = 'pending' AND scheduled_at <= ?
-                ORDER BY scheduled_at
+                UPDATE scheduled_notifications
+                SET status = 'sending', lease_owner = ?, lease_expires_ms = ?,
+                    attempts = attempts + 1
+                WHERE id IN (
+                    SELECT id FROM scheduled_notifications
+                    WHERE status = 'pending' AND scheduled_at_ms <= ?
+                        AND (next_attempt_at_ms IS NULL OR next_attempt_at_ms <= ?)
+                    ORDER BY attempts, scheduled_at_ms
+                    LIMIT ?
+                )
+                RETURNING *
                 """,
-                (before,),
+                (worker_id, now_ms + int(lease_seconds * 1000), now_ms, now_ms, limit),
             ).fetchall()
-        else:
-            rows = conn.execute(
+        # RETURNING の順序は保証されないので並べ直す
+        return sorted(
+            (dict(row) for row in rows),
+            key=lambda r: (r["attempts"], r["scheduled_at_ms"], r["id"]),
+        )
+
+    def recover_expired_leases(self, now_ms: Optional[int] = None) -> int:
+        """リースが切れたsending行をpendingに戻す。戻した件数を返す。"""
+        if now_ms is None:
+            now_ms = int(time.time() * 1000)
+        conn = self.db.connection
+        with conn:
+            cursor = conn.execute(
                 """
-                SELECT * FROM scheduled_notifications
-                WHERE status = 'pending'
-                ORDER BY scheduled_at
+                UPDATE scheduled_notifications
+                SET status = 'pending', lease_owner = NULL, lease_expires_ms = NULL
+                WHERE status = 'sending' AND lease_expires_ms <= ?
                 """,
-            ).fetchall()
-        return [dict(row) for row in rows]
+                (now_ms,),
+            )
+        if cursor.rowcount:
+            logger.warning(f"リース切れの通知をpendingに戻した: {cursor.rowcount}件")
+        return cursor.rowcount
+
+    def next_lease_expiry_ms(self) -> Optional[int]:
+        """送信中の行のうち最も早いリース期限を返す（なければNone）。"""
+        row = self.db.connection.execute(
+            """
+            SELECT MIN(lease_expires_ms) FROM scheduled_notifications
+            WHERE status = 'sending'
+            """,
+        ).fetchone()
+        return row[0]
 
     def mark_sent(self, notification_id: int) -> None:
         """送信済みにマークする。"""
@@ -88,6 +175,93 @@ class NotificationRepository:
         )
         conn.commit()
 
+    def record_outcomes(
+        self,
+        sent: list[int],
+        failed: list[tuple[int, str]],
+        retries: Sequence[tuple[int, str, int]] = (),
+        dead: Sequence[tuple[int, str]] = (),
+        *,
+        worker_id: Optional[str] = None,
+    ) -> list[int]:
+        """送信済み・失敗・再試行・デッドレターをまとめて1トランザクションで反映する。
+
+        retries は (id, エラー, 次回試行のエポックミリ秒)。pending に戻して
+        その時刻まで確保されないようにする。
+
+        worker_id を渡すと、そのワーカーがまだリースを持っている sending 行だけを
+        更新する。リースが切れて別のワーカーが確保し直した行を上書きしないため。
+        更新できなかった（リースを失った）IDのリストを返す。
+        """
+        guard = "" if worker_id is None else " AND status = 'sending' AND lease_owner = ?"
+        owner = () if worker_id is None else (worker_id,)
+        updates = [
+            (
+                "status = 'sent', sent_at = datetime('now', 'localtime')",
+                [(notification_id, ()) for notification_id in sent],
+            ),
+            (
+                "status = 'failed', error_message = ?",
+                [(notification_id, (error,)) for notification_id, error in failed],
+            ),
+            (
+                "status = 'pending', error_message = ?, next_attempt_at_ms = ?",
+                [
+                    (notification_id, (error, next_attempt_at_ms))
+                    for notification_id, error, next_attempt_at_ms in retries
+                ],
+            ),
+            (
+                "status = 'dead', error_message = ?",
+                [(notification_id, (error,)) for notification_id, error in dead],
+            ),
+        ]
+        lost: list[int] = []
+        conn = self.db.connection
+        with conn:
+            for assignments, rows in updates:
+                sql = f"""
+                    UPDATE scheduled_notifications
+                    SET {assignments}, lease_owner = NULL, lease_expires_ms = NULL
+                    WHERE id = ?{guard}
+                    """
+                for notification_id, values in rows:
+                    cursor = conn.execute(sql, (*values, notification_id, *owner))
+                    if cursor.rowcount == 0:
+                        lost.append(notification_id)
+        if lost:
+            logger.warning(f"リースを失った通知の結果を捨てた: worker={worker_id}, ids={lost}")
+        return lost
+
+    def list_dead_letters(self, limit: int = 100) -> list[dict]:
+        """再試行を使い切ったデッドレター通知を古い順に取得する。"""
+        conn = self.db.connection
+        rows = conn.execute(
+            """
+            SELECT * FROM scheduled_notifications
+            WHERE status = 'dead'
+            ORDER BY id
+            LIMIT ?
+            """,
+            (limit,),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def replay_dead_letter(self, notification_id: int) -> bool:
+        """デッドレター通知を試行回数0のpendingに戻す。戻せたらTrue。"""
+        conn = self.db.connection
+        cursor = conn.execute(
+            """
+            UPDATE scheduled_notifications
+            SET status = 'pending', attempts = 0, next_attempt_at_ms = NULL,
+                error_message = NULL
+            WHERE id = ? AND status = 'dead'
+            """,
+            (notification_id,),
+        )
+        conn.commit()
+        return cursor.rowcount > 0
+
     def cancel(self, notification_id: int) -> bool:
         """キャンセルする。成功したらTrue。"""
         conn = self.db.connection
@@ -105,3 +279,207 @@ class NotificationRepository:
     def get_all_pending(self) -> list[dict]:
         """全pending通知を取得する（API用）。"""
         return self.get_pending()
+
+
+class AsyncNotificationRepository:
+    """NotificationRepository の非同期版。
+
+    メソッドは同期版と同じで、SQLiteの呼び出しは Database.run 経由で
+    DB専用スレッドに流すため、イベントループをブロックしない。
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+        self._repo = NotificationRepository(db)
+
+    async def create(
+        self,
+        message: str,
+        scheduled_at: str,
+        *,
+        title: Optional[str] = None,
+        color: int = 0x00BFFF,
+        source: str = "api",
+        channel_id: Optional[int] = None,
+    ) -> int:
+        """通知をスケジュールする。作成されたIDを返す。"""
+        return await self.db.run(
+            self._repo.create,
+            message,
+            scheduled_at,
+            title=title,
+            color=color,
+            source=source,
+            channel_id=channel_id,
+        )
+
+    async def get_pending(self, before: Optional[str] = None) -> list[dict]:
+        """pending状態の通知を取得する。beforeを指定すると、その時刻以前のみ。"""
+        return await self.db.run(self._repo.get_pending, before)
+
+    async def get_due(self, before_ms: int, limit: Optional[int] = None) -> list[dict]:
+        """scheduled_at_ms が before_ms 以前のpending通知を古い順に取得する。"""
+        return await self.db.run(self._repo.get_due, before_ms, limit)
+
+    async def claim_due(
+        self,
+        limit: int,
+        lease_seconds: float,
+        worker_id: str,
+        now_ms: Optional[int] = None,
+    ) -> list[dict]:
+        """期限が来たpending通知を最大limit件、送信中（sending）として確保する。"""
+        return await self.db.run(
+            self._repo.claim_due, limit, lease_seconds, worker_id, now_ms
+        )
+
+    async def recover_expired_leases(self, now_ms: Optional[int] = None) -> int:
+        """リースが切れたsending行をpendingに戻す。戻した件数を返す。"""
+        return await self.db.run(self._repo.recover_expired_leases, now_ms)
+
+    async def next_lease_expiry_ms(self) -> Optional[int]:
+        """送信中の行のうち最も早いリース期限を返す（なければNone）。"""
+        return await self.db.run(self._repo.next_lease_expiry_ms)
+
+    async def mark_sent(self, notification_id: int) -> None:
+        """送信済みにマークする。"""
+        await self.db.run(self._repo.mark_sent, notification_id)
+
+    async def mark_failed(self, notification_id: int, error: str) -> None:
+        """失敗にマークする。"""
+        await self.db.run(self._repo.mark_failed, notification_id, error)
+
+    async def record_outcomes(
+        self,
+        sent: list[int],
+        failed: list[tuple[int, str]],
+        retries: Sequence[tuple[int, str, int]] = (),
+        dead: Sequence[tuple[int, str]] = (),
+        *,
+        worker_id: Optional[str] = None,
+    ) -> list[int]:
+        """送信済み・失敗・再試行・デッドレターをまとめて1トランザクションで反映する。
+
+        worker_id を渡すとリースを持つ行だけを更新し、リースを失ったIDを返す。
+        """
+        return await self.db.run(
+            self._repo.record_outcomes, sent, failed, retries, dead, worker_id=worker_id
+        )
+
+    async def list_dead_letters(self, limit: int = 100) -> list[dict]:
+        """再試行を使い切ったデッドレター通知を古い順に取得する。"""
+        return await self.db.run(self._repo.list_dead_letters, limit)
+
+    async def replay_dead_letter(self, notification_id: int) -> bool:
+        """デッドレター通知を試行回数0のpendingに戻す。戻せたらTrue。"""
+        return await self.db.run(self._repo.replay_dead_letter, notification_id)
+
+    async def cancel(self, notification_id: int) -> bool:
+        """キャンセルする。成功したらTrue。"""
+        return await self.db.run(self._repo.cancel, notification_id)
+
+    async def get_all_pending(self) -> list[dict]:
+        """全pending通知を取得する（API用）。"""
+        return await self.get_pending()
+
+
+class NotificationStatusBuffer:
+    """送信結果を溜めて、件数か経過時間の上限に達したらまとめて書き込む。
+
+    通知ごとにcommit（=fsync）せず、1バッチ1トランザクションにする。
+    クラッシュ時に失われる状態は最大でも1バッチ分。
+    worker_id を渡すと、そのワーカーがリースを持つ行だけに書き込む。
+    経過時間はタイマーでも見るので、後続の結果が来なくても flush_interval 以内に書き込む
+    （書き込みが遅れてリースが切れ、送信済みの通知を再送するのを防ぐ）。
+    """
+
+    def __init__(
+        self,
+        repo: AsyncNotificationRepository,
+        max_batch: int = 50,
+        flush_interval: float = 1.0,
+        worker_id: Optional[str] = None,
+    ):
+        self.repo = repo
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.worker_id = worker_id
+        # リースを失っていて書き込めなかった通知のID
+        self.lost: list[int] = []
+        self._sent: list[int] = []
+        self._failed: list[tuple[int, str]] = []
+        self._retries: list[tuple[int, str, int]] = []
+        self._dead: list[tuple[int, str]] = []
+        self._first_at: Optional[float] = None
+        self._timer: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._sent) + len(self._failed) + len(self._retries) + len(self._dead)
+
+    async def sent(self, notification_id: int) -> None:
+        """送信済みとして記録する。"""
+        self._sent.append(notification_id)
+        await self._record()
+
+    async def failed(self, notification_id: int, error: str) -> None:
+        """失敗として記録する。"""
+        self._failed.append((notification_id, error))
+        await self._record()
+
+    async def retry(self, notification_id: int, error: str, next_attempt_at_ms: int) -> None:
+        """next_attempt_at_ms に再試行するものとして記録する。"""
+        self._retries.append((notification_id, error, next_attempt_at_ms))
+        await self._record()
+
+    async def dead(self, notification_id: int, error: str) -> None:
+        """再試行を使い切ったデッドレターとして記録する。"""
+        self._dead.append((notification_id, error))
+        await self._record()
+
+    async def _record(self) -> None:
+        if self._first_at is None:
+            self._first_at = time.monotonic()
+        if (
+            len(self) >= self.max_batch
+            or time.monotonic() - self._first_at >= self.flush_interval
+        ):
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        self._timer = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"送信結果の書き込み失敗（{len(self)}件を再試行）: {e}")
+            if self._timer is None:
+                self._timer = asyncio.create_task(self._flush_later())
+
+    async def flush(self) -> None:
+        """溜まっている結果を書き込む。
+
+        書き込みに失敗したら結果をバッファに戻して例外を送出する（次の flush で再試行）。
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not len(self):
+            return
+        sent, failed, retries, dead = self._sent, self._failed, self._retries, self._dead
+        self._sent, self._failed, self._retries, self._dead = [], [], [], []
+        first_at, self._first_at = self._first_at, None
+        try:
+            lost = await self.repo.record_outcomes(
+                sent, failed, retries, dead, worker_id=self.worker_id
+            )
+        except Exception:
+            # 捨てると送信済みの通知がリース切れで再送されるので、先頭に戻す
+            self._sent[:0] = sent
+            self._failed[:0] = failed
+            self._retries[:0] = retries
+            self._dead[:0] = dead
+            self._first_at = first_at
+            raise
+        self.lost.extend(lost)
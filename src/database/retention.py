@@ -0,0 +1,195 @@
+"""scheduled_notifications の保持期限 & アーカイブ"""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from .models import Database
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 送信処理が終わった状態（dead は手動で再送しない限りこのまま）
+TERMINAL_STATUSES = ("sent", "failed", "cancelled", "dead")
+
+ARCHIVE_COLUMNS = (
+    "id, message, title, color, scheduled_at, source, channel_id, "
+    "status, sent_at, error_message, created_at, "
+    "scheduled_at_ms, attempts, next_attempt_at_ms"
+)
+
+# 最初のアーカイブ形式の後に増えた列（既存のアーカイブファイルには ALTER TABLE で足す）
+ARCHIVE_ADDED_COLUMNS = (
+    ("scheduled_at_ms", "INTEGER"),
+    ("attempts", "INTEGER"),
+    ("next_attempt_at_ms", "INTEGER"),
+)
+
+ARCHIVE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archive.scheduled_notifications_archive (
+    id INTEGER PRIMARY KEY,
+    message TEXT NOT NULL,
+    title TEXT,
+    color INTEGER,
+    scheduled_at TEXT NOT NULL,
+    source TEXT,
+    channel_id INTEGER,
+    status TEXT NOT NULL,
+    sent_at TEXT,
+    error_message TEXT,
+    created_at TEXT,
+    archived_at TEXT DEFAULT (datetime('now', 'localtime')),
+    scheduled_at_ms INTEGER,
+    attempts INTEGER,
+    next_attempt_at_ms INTEGER
+)
+"""
+
+
+@dataclass
+class RetentionReport:
+    """1回のアーカイブ実行の結果"""
+
+    rows_archived: int = 0
+    payload_bytes: int = 0
+    bytes_reclaimed: int = 0
+    batches: int = 0
+
+
+class NotificationRetention:
+    """古い終端状態の通知をアーカイブDBへ移す。
+
+    archive_path は strftime 形式で、月ごと等にアーカイブファイルを
+    ローテーションできる（例: data/archive/notifications-%Y%m.db）。
+    1バッチ1トランザクションの小さな単位で移すので、書き込みロックを
+    長く握らない。別ファイル間のcommitはWALでは原子的でないが、
+    アーカイブ側は INSERT OR IGNORE なので途中で落ちても再実行で揃う。
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        max_age_days: int = 30,
+        archive_path: str = "data/archive/notifications-%Y%m.db",
+        batch_size: int = 500,
+        pause_seconds: float = 0.05,
+    ):
+        self.db = db
+        self.max_age_days = max_age_days
+        self.archive_path = archive_path
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self._attached_path: Optional[str] = None
+
+    async def run(self, max_batches: Optional[int] = None) -> RetentionReport:
+        """保持期限を過ぎた行がなくなるまで（またはmax_batchesまで）アーカイブする。"""
+        cutoff = (datetime.now() - timedelta(days=self.max_age_days)).strftime(
+            "%Y-%m-%d %H:%M:%S"
+        )
+        report = RetentionReport()
+        free_before = await self.db.run(self._freelist_bytes)
+
+        while max_batches is None or report.batches < max_batches:
+            rows, payload = await self.db.run(self._archive_batch, cutoff)
+            if rows == 0:
+                break
+            report.rows_archived += rows
+            report.payload_bytes += payload
+            report.batches += 1
+            if rows < self.batch_size:
+                break
+            # 他のクエリにDBスレッドを譲る
+            await asyncio.sleep(self.pause_seconds)
+
+        report.bytes_reclaimed = max(
+            0, await self.db.run(self._freelist_bytes) - free_before
+        )
+        if report.rows_archived:
+            logger.info(
+                f"通知アーカイブ: {report.rows_archived}件, "
+                f"{report.bytes_reclaimed}バイト解放 ({report.batches}バッチ)"
+            )
+        return report
+
+    def _attach_archive(self) -> None:
+        path = datetime.now().strftime(self.archive_path)
+        if path == self._attached_path:
+            return
+
+        conn = self.db.connection
+        if self._attached_path is not None:
+            conn.execute("DETACH DATABASE archive")
+            self._attached_path = None
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn.execute("ATTACH DATABASE ? AS archive", (path,))
+        conn.execute(ARCHIVE_SCHEMA)
+        columns = {
+            row[1]
+            for row in conn.execute("PRAGMA archive.table_info(scheduled_notifications_archive)")
+        }
+        for name, column_type in ARCHIVE_ADDED_COLUMNS:
+            if name not in columns:
+                conn.execute(
+                    f"ALTER TABLE archive.scheduled_notifications_archive ADD COLUMN {name} {column_type}"
+                )
+        conn.commit()
+        self._attached_path = path
+        logger.info(f"アーカイブDB: {path}")
+
+    def _archive_batch(self, cutoff: str) -> tuple[int, int]:
+        """1バッチ分を移す。(移した件数, 移したデータのおおよそのバイト数) を返す。"""
+        self._attach_archive()
+        conn = self.db.connection
+        statuses = ", ".join("?" for _ in TERMINAL_STATUSES)
+        ids = [
+            row[0]
+            for row in conn.execute(
+                f"""
+                SELECT id FROM main.scheduled_notifications
+                WHERE status IN ({statuses})
+                  AND COALESCE(sent_at, created_at) < ?
+                ORDER BY id
+                LIMIT ?
+                """,
+                (*TERMINAL_STATUSES, cutoff, self.batch_size),
+            )
+        ]
+        if not ids:
+            return 0, 0
+
+        placeholders = ", ".join("?" for _ in ids)
+        with conn:
+            payload = conn.execute(
+                f"""
+                SELECT COALESCE(SUM(
+                    length(CAST(message AS BLOB))
+                    + COALESCE(length(CAST(title AS BLOB)), 0)
+                    + COALESCE(length(CAST(error_message AS BLOB)), 0)
+                    + length(scheduled_at)
+                ), 0)
+                FROM main.scheduled_notifications WHERE id IN ({placeholders})
+                """,
+                ids,
+            ).fetchone()[0]
+            conn.execute(
+                f"""
+                INSERT OR IGNORE INTO archive.scheduled_notifications_archive
+                    ({ARCHIVE_COLUMNS})
+                SELECT {ARCHIVE_COLUMNS} FROM main.scheduled_notifications
+                WHERE id IN ({placeholders})
+                """,
+                ids,
+            )
+            conn.execute(
+                f"DELETE FROM main.scheduled_notifications WHERE id IN ({placeholders})",
+                ids,
+            )
+        return len(ids), payload
+
+    def _freelist_bytes(self) -> int:
+        conn = self.db.connection
+        free_pages = conn.execute("PRAGMA main.freelist_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA main.page_size").fetchone()[0]
+        return free_pages * page_size
@@ -0,0 +1,58 @@
+"""watchdog_notified — Watchdogの通知済みタスク（再起動しても重複通知しない）"""
+
+from .models import Database
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class WatchdogStateRepository:
+    """日付ごとの通知済みタスクIDを保持する。
+
+    クエリは Database.run 経由でDB専用スレッドで実行する。
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    async def load(self, notified_date: str) -> set[str]:
+        """指定日に通知済みのタスクIDを取得する。"""
+        return await self.db.run(self._load, notified_date)
+
+    async def add_many(self, notified_date: str, task_ids: list[str]) -> None:
+        """通知済みタスクIDをまとめて記録する。"""
+        if task_ids:
+            await self.db.run(self._add_many, notified_date, task_ids)
+
+    async def purge_before(self, notified_date: str) -> int:
+        """指定日より前の記録を削除する。削除件数を返す。"""
+        return await self.db.run(self._purge_before, notified_date)
+
+    def _load(self, notified_date: str) -> set[str]:
+        rows = self.db.connection.execute(
+            "SELECT task_id FROM watchdog_notified WHERE notified_date = ?",
+            (notified_date,),
+        ).fetchall()
+        return {row["task_id"] for row in rows}
+
+    def _add_many(self, notified_date: str, task_ids: list[str]) -> None:
+        conn = self.db.connection
+        with conn:
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO watchdog_notified (notified_date, task_id)
+                VALUES (?, ?)
+                """,
+                [(notified_date, task_id) for task_id in task_ids],
+            )
+
+    def _purge_before(self, notified_date: str) -> int:
+        conn = self.db.connection
+        with conn:
+            cursor = conn.execute(
+                "DELETE FROM watchdog_notified WHERE notified_date < ?",
+                (notified_date,),
+            )
+        if cursor.rowcount:
+            logger.info(f"Watchdog通知済み記録を削除: {cursor.rowcount}件")
+        return cursor.rowcount
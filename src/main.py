@@ -7,6 +7,9 @@ import logging
 import os
 import signal
 
+import discord.http
+import yarl
+from discord.gateway import DiscordWebSocket
 from dotenv import load_dotenv
 
 from claude_discord.claude.runner import ClaudeRunner
@@ -16,41 +19,62 @@ from claude_discord.database.notification_repo import NotificationRepository
 from claude_discord.ext.api_server import ApiServer
 from claude_discord.setup import setup_bridge
 
+from .api.server import add_metrics_route
 from .bot import EbiBot
 from .cogs.auto_upgrade import EBIBOT_UPGRADE_CONFIG
 from .cogs.docs_sync import DOCS_SYNC_TRIGGERS
+from .cogs.maintenance import MaintenanceCog
 from .cogs.reminder import ReminderCog
-from .cogs.watchdog import WatchdogCog
-from .database.models import Database
-from .database.repository import NotificationRepository as EbiBotNotificationRepo
-from .utils.logger import get_logger
+from .cogs.watchdog import TodoistScriptSource, TodoistSyncSource, WatchdogCog
+from .database.models import PROFILES, Database
+from .database.repository import AsyncNotificationRepository as EbiBotNotificationRepo
+from .database.retention import NotificationRetention
+from .database.watchdog_repository import WatchdogStateRepository
+from .utils.logger import configure_logging, get_logger, shared_handler, stop_logging
+from .utils.loop_monitor import LoopLagMonitor
+from .utils.retry import RetryPolicy
 
 logger = get_logger(__name__)
 
 
 def _configure_ccdb_logging() -> None:
-    """claude_discord.* ロガーを src.* と同じハンドラ・レベルで設定する。
+    """claude_discord.* ロガーを src.* と同じハンドラで設定する。
 
     ccdb パッケージは独自のハンドラを持たず root ロガーに伝播するため、
     デフォルトの WARNING レベルでフィルタされて INFO/DEBUG が消える。
     discord-bot 側で明示的に有効化する。
     """
-    handler = logging.StreamHandler(__import__("sys").stdout)
-    handler.setFormatter(
-        logging.Formatter(
-            "%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S",
-        )
-    )
     ccdb_logger = logging.getLogger("claude_discord")
     ccdb_logger.setLevel(logging.DEBUG)
-    ccdb_logger.addHandler(handler)
+    ccdb_logger.addHandler(shared_handler())
     ccdb_logger.propagate = False
 
 
+def _apply_discord_endpoint_overrides() -> None:
+    """DISCORD_API_BASE / DISCORD_GATEWAY_URL が設定されていれば接続先を差し替える。
+
+    scripts/fake_discord.py（偽Discord）に向けて負荷試験をするためのもの。
+    """
+    api_base = os.getenv("DISCORD_API_BASE", "")
+    if api_base:
+        discord.http.Route.BASE = api_base.rstrip("/")
+        logger.warning(f"Discord REST API の接続先を差し替え: {api_base}")
+    gateway_url = os.getenv("DISCORD_GATEWAY_URL", "")
+    if gateway_url:
+        DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(gateway_url)
+        logger.warning(f"Discord gateway の接続先を差し替え: {gateway_url}")
+
+
 def main() -> None:
     load_dotenv()
+    # ログはキュー経由で別スレッドが書き出す（stdout が詰まってもループを止めない）
+    configure_logging(
+        json_output=os.getenv("LOG_JSON", "").lower() in ("1", "true", "yes"),
+        queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+        sample_every=int(os.getenv("LOG_SAMPLE_EVERY", "1")),
+    )
     _configure_ccdb_logging()
+    _apply_discord_endpoint_overrides()
 
     token = os.getenv("DISCORD_BOT_TOKEN")
     if not token or token == "YOUR_BOT_TOKEN_HERE":
@@ -72,8 +96,12 @@ def main() -> None:
     api_host = os.getenv("API_HOST", "127.0.0.1")
     api_port = int(os.getenv("API_PORT", "8099"))
 
-    # DB初期化（通知用 — EbiBot独自のsyncリポ）
-    db = Database(db_path="data/bot.db")
+    # DB初期化（通知用 — EbiBot独自リポ。クエリはDB専用スレッドで実行）
+    db_profile = os.getenv("DB_PROFILE", "wal")
+    if db_profile not in PROFILES:
+        logger.error(f"DB_PROFILE が不正です: {db_profile}（{', '.join(PROFILES)}）")
+        raise SystemExit(1)
+    db = Database(db_path="data/bot.db", profile=PROFILES[db_profile])
     db.initialize()
     ebibot_repo = EbiBotNotificationRepo(db)
 
@@ -109,15 +137,65 @@ def main() -> None:
         host=api_host,
         port=api_port,
     )
+    # 同じポートで Bot 内部のメトリクスも公開する
+    add_metrics_route(api_server)
+
+    # イベントループ遅延モニタ（ループを止めている処理のスタックをログに出す）
+    loop_monitor = (
+        LoopLagMonitor(
+            interval=int(os.getenv("LOOP_LAG_INTERVAL_MS", "500")) / 1000,
+            threshold=int(os.getenv("LOOP_LAG_THRESHOLD_MS", "250")) / 1000,
+        )
+        if os.getenv("LOOP_LAG_MONITOR", "true").lower() in ("1", "true", "yes")
+        else None
+    )
 
     async def start_all() -> None:
+        if loop_monitor is not None:
+            loop_monitor.start()
+
         # 通知DBスキーマ初期化
         await notification_repo.init_db()
 
         async with bot:
             # EbiBot独自 Cog
-            await bot.add_cog(ReminderCog(bot, ebibot_repo))
-            await bot.add_cog(WatchdogCog(bot))
+            await bot.add_cog(ReminderCog(
+                bot,
+                ebibot_repo,
+                max_concurrent_sends=int(os.getenv("REMINDER_MAX_CONCURRENT_SENDS", "4")),
+                coalesce_embeds=os.getenv(
+                    "REMINDER_COALESCE_EMBEDS", "",
+                ).lower() in ("1", "true", "yes"),
+                retry_policy=RetryPolicy(
+                    max_attempts=int(os.getenv("REMINDER_MAX_ATTEMPTS", "5")),
+                ),
+            ))
+            todoist_token = os.getenv("TODOIST_API_TOKEN", "")
+            watchdog_source = (
+                TodoistSyncSource(todoist_token) if todoist_token else TodoistScriptSource()
+            )
+            await bot.add_cog(WatchdogCog(
+                bot,
+                watchdog_source,
+                state_repo=WatchdogStateRepository(db),
+            ))
+            retention_days = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "0"))
+            retention = (
+                NotificationRetention(
+                    db,
+                    max_age_days=retention_days,
+                    archive_path=os.getenv(
+                        "NOTIFICATION_ARCHIVE_PATH", "data/archive/notifications-%Y%m.db",
+                    ),
+                )
+                if retention_days > 0 else None
+            )
+            await bot.add_cog(MaintenanceCog(
+                bot,
+                db,
+                checkpoint_interval=float(os.getenv("DB_CHECKPOINT_INTERVAL_SECONDS", "300")),
+                retention=retention,
+            ))
 
             # ccdb コア Cog 一括セットアップ（auto-discovery）
             # api_server を渡すと ccdb が自動でリポを紐付け、runner.api_port も設定してくれる
@@ -176,6 +254,8 @@ def main() -> None:
         await api_server.stop()
         if not bot.is_closed():
             await bot.close()
+        if loop_monitor is not None:
+            await loop_monitor.stop()
         db.close()
         logger.info("シャットダウン完了")
 
@@ -192,6 +272,7 @@ def main() -> None:
     finally:
         loop.run_until_complete(shutdown())
         loop.close()
+        stop_logging()
 
 
 if __name__ == "__main__":
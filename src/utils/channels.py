@@ -0,0 +1,65 @@
+"""チャンネル解決 — get_channel に無いチャンネル/スレッドのTTLキャッシュ"""
+
+import asyncio
+import time
+from typing import Any, Optional
+
+import discord
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ChannelResolver:
+    """チャンネルIDからチャンネル/スレッドを解決する。
+
+    gateway キャッシュ（get_channel）に無いものだけ REST で取得し、結果を
+    TTL付きでキャッシュする。存在しない（404）・権限がない（403）チャンネルも
+    negative_ttl の間は覚えておき、毎回 REST を叩いて失敗するのを防ぐ。
+    """
+
+    def __init__(
+        self,
+        bot: discord.Client,
+        ttl: float = 600.0,
+        negative_ttl: float = 300.0,
+    ):
+        self.bot = bot
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._cache: dict[int, tuple[float, Optional[Any]]] = {}
+        self._inflight: dict[int, asyncio.Task] = {}
+
+    async def resolve(self, channel_id: int) -> Optional[Any]:
+        """チャンネルを返す。存在しない・アクセスできない場合はNone。"""
+        channel = self.bot.get_channel(channel_id)
+        if channel is not None:
+            return channel
+
+        cached = self._cache.get(channel_id)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        # 同じIDへの同時ミスは1回のfetchにまとめる
+        task = self._inflight.get(channel_id)
+        if task is None:
+            task = asyncio.create_task(self._fetch(channel_id))
+            self._inflight[channel_id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(channel_id, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, channel_id: int) -> Optional[Any]:
+        try:
+            channel = await self.bot.fetch_channel(channel_id)
+        except (discord.NotFound, discord.Forbidden) as e:
+            logger.warning(f"チャンネル取得不可（キャッシュ）: id={channel_id}, error={e}")
+            self._cache[channel_id] = (time.monotonic() + self.negative_ttl, None)
+            return None
+
+        self._cache[channel_id] = (time.monotonic() + self.ttl, channel)
+        return channel
+
+    def invalidate(self, channel_id: int) -> None:
+        """キャッシュを破棄する。"""
+        self._cache.pop(channel_id, None)
@@ -0,0 +1,163 @@
+"""送信ディスパッチャ — 全Cogの channel.send を優先度付きキューで捌く"""
+
+import asyncio
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Optional
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class Priority(IntEnum):
+    """送信の優先度（小さいほど先に送る）"""
+
+    INTERACTIVE = 0
+    REMINDER = 1
+    WATCHDOG = 2
+    STARTUP = 3
+
+
+@dataclass
+class _Job:
+    channel: Any
+    kwargs: dict
+    future: asyncio.Future = field(repr=False)
+
+
+class OutboundDispatcher:
+    """Bot全体の送信を1か所に集めるキュー。
+
+    - 優先度の高いクラスに送信待ちがある間は、低いクラスを送らない
+    - 同じ優先度の中ではチャンネルをラウンドロビンで回し、1チャンネルにつき
+      同時に送るのは1件だけ（1つのチャンネルへの大量送信が他を待たせない）
+    - 優先度ごとに待ち件数の上限があり、上限に達すると send() が空きを待つ
+      （あるCogのバーストが他の優先度のキューを埋めない）
+    """
+
+    def __init__(self, max_pending_per_priority: int = 500, workers: int = 4):
+        self.max_pending_per_priority = max_pending_per_priority
+        self.workers = workers
+        self._queues: dict[Priority, OrderedDict[int, deque[_Job]]] = {
+            priority: OrderedDict() for priority in Priority
+        }
+        self._pending: dict[Priority, int] = {priority: 0 for priority in Priority}
+        self._busy: set[int] = set()
+        self._cond = asyncio.Condition()
+        self._tasks: list[asyncio.Task] = []
+
+    def __len__(self) -> int:
+        return sum(self._pending.values())
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        """送信ワーカーを起動する。"""
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"outbound-dispatcher-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"送信ディスパッチャ起動: workers={self.workers}")
+
+    async def stop(self) -> None:
+        """ワーカーを止め、送れなかった送信を CancelledError で終わらせる。"""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for channels in self._queues.values():
+            for jobs in channels.values():
+                for job in jobs:
+                    job.future.cancel()
+            channels.clear()
+        self._pending = {priority: 0 for priority in Priority}
+        self._busy.clear()
+
+    async def send(self, channel: Any, priority: Priority, **kwargs: Any) -> Any:
+        """channel.send(**kwargs) をキューに積み、送信されるまで待つ。"""
+        loop = asyncio.get_running_loop()
+        job = _Job(channel=channel, kwargs=kwargs, future=loop.create_future())
+        key = _channel_key(channel)
+
+        async with self._cond:
+            await self._cond.wait_for(
+                lambda: self._pending[priority] < self.max_pending_per_priority
+            )
+            self._queues[priority].setdefault(key, deque()).append(job)
+            self._pending[priority] += 1
+            self._cond.notify_all()
+        return await job.future
+
+    def _take(self) -> Optional[tuple[int, Priority, _Job]]:
+        """次に送るジョブを選ぶ。送れるものがなければNone。
+
+        送信待ちのある最も高い優先度からだけ選ぶ。そのチャンネルがすべて送信中でも
+        低い優先度には回さず、送信が終わるのを待つ。
+        """
+        for priority in Priority:
+            channels = self._queues[priority]
+            if not channels:
+                continue
+            for key in list(channels):
+                if key in self._busy:
+                    continue
+                jobs = channels.pop(key)
+                job = jobs.popleft()
+                if jobs:
+                    # 残りがあれば末尾に回す（ラウンドロビン）
+                    channels[key] = jobs
+                self._pending[priority] -= 1
+                return key, priority, job
+            return None
+        return None
+
+    async def _worker(self) -> None:
+        while True:
+            async with self._cond:
+                picked = self._take()
+                while picked is None:
+                    await self._cond.wait()
+                    picked = self._take()
+                key, priority, job = picked
+                self._busy.add(key)
+                # 待ち件数が減ったので、空きを待っている send() を起こす
+                self._cond.notify_all()
+
+            try:
+                if not job.future.done():
+                    result = await job.channel.send(**job.kwargs)
+                    if not job.future.done():
+                        job.future.set_result(result)
+            except asyncio.CancelledError:
+                if not job.future.done():
+                    job.future.cancel()
+                raise
+            except Exception as e:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            finally:
+                async with self._cond:
+                    self._busy.discard(key)
+                    self._cond.notify_all()
+
+
+def _channel_key(channel: Any) -> int:
+    channel_id = getattr(channel, "id", None)
+    return channel_id if isinstance(channel_id, int) else id(channel)
+
+
+async def dispatch_send(bot: Any, channel: Any, priority: Priority, **kwargs: Any) -> Any:
+    """Botのディスパッチャ経由で送信する。
+
+    ディスパッチャがない・動いていないときは channel.send を直接呼ぶ。
+    """
+    dispatcher = getattr(bot, "dispatcher", None)
+    if isinstance(dispatcher, OutboundDispatcher) and dispatcher.running:
+        return await dispatcher.send(channel, priority, **kwargs)
+    return await channel.send(**kwargs)
@@ -1,20 +1,195 @@
-"""ロガー設定"""
+"""ロガー設定
 
+get_logger() のロガーは全て1つの共有ハンドラに出力する。起動直後は stdout への
+StreamHandler だが、configure_logging() を呼ぶと上限付きキュー経由に切り替わり、
+実際の書き込みは QueueListener のスレッドで行う（stdout が詰まってもイベントループを
+止めない）。キューが一杯のときはレコードを捨てて数える。
+"""
+
+import atexit
+import copy
+import itertools
+import json
 import logging
+import logging.handlers
+import queue
 import sys
+from datetime import datetime
+from typing import Optional
+
+from .metrics import LOG_RECORDS_DROPPED
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# LogRecord が標準で持つ属性（JSON出力で extra と区別するため）
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """1レコードを1行のJSONにする。extra で渡した項目もそのまま含める。"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """extra={"sample_key": ...} 付きのレコードを、キーごとに every 件に1件だけ通す。
+
+    1件目は必ず通す。通したレコードには sampled=every を付ける。
+    sample_key のないレコードは全て通す。
+    """
+
+    def __init__(self, every: int):
+        super().__init__()
+        self.every = max(1, every)
+        self._counters: dict[str, itertools.count] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "sample_key", None)
+        if key is None or self.every == 1:
+            return True
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = self._counters.setdefault(key, itertools.count())
+        if next(counter) % self.every:
+            return False
+        record.sampled = self.every
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """キューが一杯なら待たずにレコードを捨てる QueueHandler。
+
+    捨てた件数は dropped と ebibot_log_records_dropped_total に数え、
+    次に積めたときに「N件破棄した」という警告を1件差し込む。
+    例外情報は message に畳み込まず exc_text に残し、出力側のフォーマッタに任せる。
+    """
+
+    _exc_formatter = logging.Formatter()
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._unreported = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """キューに積めるようにする。
+
+        標準の QueueHandler.prepare は traceback を message に足して exc_info を消すので、
+        JsonFormatter の "exc" が出ない。traceback は文字列にして exc_text に移す。
+        """
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self._exc_formatter.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if self._unreported:
+                self.queue.put_nowait(self._drop_notice())
+                self._unreported = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self._unreported += 1
+            LOG_RECORDS_DROPPED.inc()
+
+    def _drop_notice(self) -> logging.LogRecord:
+        return logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            f"ログキューが一杯のため{self._unreported}件を破棄しました",
+            None, None,
+        )
+
+
+def _output_handler(json_output: bool) -> logging.Handler:
+    handler = logging.StreamHandler(sys.stdout)
+    if json_output:
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT))
+    return handler
+
+
+_handler: logging.Handler = _output_handler(json_output=False)
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def shared_handler() -> logging.Handler:
+    """get_logger() のロガーが使っている共有ハンドラを返す。"""
+    return _handler
+
+
+def configure_logging(
+    json_output: bool = False,
+    queue_size: int = 10000,
+    sample_every: int = 1,
+) -> DroppingQueueHandler:
+    """ログ出力を上限付きキュー経由に切り替える。
+
+    既に get_logger() で作られたロガーも含めて共有ハンドラを差し替え、
+    stdout への書き込みは QueueListener のスレッドに任せる。
+    """
+    global _listener
+    stop_logging()
+    atexit.unregister(stop_logging)
+
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    if sample_every > 1:
+        queue_handler.addFilter(SamplingFilter(sample_every))
+    _listener = logging.handlers.QueueListener(
+        queue_handler.queue, _output_handler(json_output), respect_handler_level=True
+    )
+    _listener.start()
+    # SystemExit 等で main() の後始末を通らなくても、キューの残りを書き出す
+    atexit.register(stop_logging)
+
+    _swap_handler(queue_handler)
+    return queue_handler
+
+
+def stop_logging() -> None:
+    """キューに残ったログを書き出してリスナーを止め、stdout への直接出力に戻す。"""
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    listener.stop()
+    _swap_handler(listener.handlers[0])
+
+
+def _swap_handler(new: logging.Handler) -> None:
+    """共有ハンドラを差し替える（既存のロガーに付いているものも含めて）。"""
+    global _handler
+    previous, _handler = _handler, new
+    for logger in [logging.getLogger(), *logging.Logger.manager.loggerDict.values()]:
+        if isinstance(logger, logging.Logger) and previous in logger.handlers:
+            logger.removeHandler(previous)
+            logger.addHandler(new)
 
 
 def get_logger(name: str) -> logging.Logger:
     """名前付きロガーを取得する。"""
     logger = logging.getLogger(name)
     if not logger.handlers:
-        handler = logging.StreamHandler(sys.stdout)
-        handler.setFormatter(
-            logging.Formatter(
-                "%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-                datefmt="%Y-%m-%d %H:%M:%S",
-            )
-        )
-        logger.addHandler(handler)
+        logger.addHandler(_handler)
         logger.setLevel(logging.INFO)
     return logger
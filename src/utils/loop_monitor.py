@@ -0,0 +1,105 @@
+"""イベントループ遅延モニタ — ループを止めている処理のスタックをログに出す"""
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from .logger import get_logger
+from .metrics import EVENT_LOOP_LAG, EVENT_LOOP_STALLS
+
+logger = get_logger(__name__)
+
+
+class LoopLagMonitor:
+    """イベントループのスケジューリング遅延を測る。
+
+    - ループ上のティッカーが interval ごとに起き、予定より遅れた分をヒストグラムに記録する
+    - 別スレッドの見張りがティッカーの心拍を監視し、threshold 以上途切れたら
+      その時点のループスレッドのスタック（＝ループを止めている処理）をログに出す
+
+    ティッカーは interval ごと、見張りは threshold/2 ごとに起きるだけなので、
+    本番で常時動かしても負荷はほぼない。
+    """
+
+    def __init__(self, interval: float = 0.5, threshold: float = 0.25):
+        self.interval = interval
+        self.threshold = threshold
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> None:
+        """実行中のループでティッカーと見張りスレッドを起動する。"""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._tick(), name="loop-lag-monitor")
+        self._thread = threading.Thread(
+            target=self._watch, name="loop-lag-watchdog", daemon=True
+        )
+        self._thread.start()
+        logger.info(
+            f"イベントループ遅延モニタ起動: interval={self.interval * 1000:.0f}ms, "
+            f"threshold={self.threshold * 1000:.0f}ms"
+        )
+
+    async def stop(self) -> None:
+        """ティッカーと見張りスレッドを止める。"""
+        task, self._task = self._task, None
+        self._stopping.set()
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        if self._thread is not None:
+            self._thread.join(timeout=self.threshold)
+            self._thread = None
+
+    async def _tick(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self._last_beat = time.monotonic()
+            EVENT_LOOP_LAG.observe(lag)
+            if lag >= self.threshold:
+                EVENT_LOOP_STALLS.inc()
+                logger.warning(f"イベントループ遅延: {lag * 1000:.0f}ms")
+
+    def _watch(self) -> None:
+        """心拍が途切れたら、止まっている間にループスレッドのスタックを取る。"""
+        reported_beat = None
+        while not self._stopping.wait(self.threshold / 2):
+            beat = self._last_beat
+            stalled = time.monotonic() - beat - self.interval
+            if stalled >= self.threshold and beat != reported_beat:
+                # 同じ停止につき1回だけ出す
+                reported_beat = beat
+                self._dump_stack(stalled)
+
+    def _dump_stack(self, stalled: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        stack = "".join(traceback.format_stack(frame))
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        name = task.get_name() if task is not None else "(タスク外のコールバック)"
+        logger.warning(
+            f"イベントループが{stalled * 1000:.0f}ms以上止まっています: task={name}\n{stack}"
+        )
@@ -0,0 +1,375 @@
+"""メトリクス — Prometheus テキスト形式で公開するカウンタ・ヒストグラム
+
+インクリメントはロックを取らない。各メトリクスはスレッドごとに自分専用のセルを持ち、
+値を足すのはそのスレッドだけなので、イベントループとDB専用スレッドが同時に
+記録しても競合しない。ロックを取るのはスレッドが初めて記録するとき（セルの登録）と、
+ラベル付きの子メトリクスを初めて作るときだけ。/metrics の描画時に全セルを合計する。
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+import aiohttp
+from aiohttp import web
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 秒単位の既定バケット（Prometheus クライアントと同じ）
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0,
+)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(
+            key, value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        )
+        for key, value in labels
+    )
+    return "{" + body + "}"
+
+
+class _Sharded:
+    """スレッドごとのセルを持つ値の基底クラス。"""
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._cells: list = []
+        self._lock = threading.Lock()
+
+    def _new_cell(self):
+        raise NotImplementedError
+
+    def _cell(self):
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = self._new_cell()
+            with self._lock:
+                self._cells.append(cell)
+            self._local.cell = cell
+            return cell
+
+
+class _CounterValue(_Sharded):
+    def _new_cell(self) -> list[float]:
+        return [0.0]
+
+    def inc(self, amount: float = 1.0) -> None:
+        """カウンタを amount 増やす。"""
+        self._cell()[0] += amount
+
+    def get(self) -> float:
+        return sum(cell[0] for cell in list(self._cells))
+
+
+class _GaugeValue:
+    def __init__(self) -> None:
+        self._value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        """値を設定する。"""
+        self._value = value
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """描画のたびに function() の値を使うようにする。"""
+        self._function = function
+
+    def get(self) -> float:
+        if self._function is not None:
+            try:
+                return float(self._function())
+            except Exception:
+                return float("nan")
+        return self._value
+
+
+class _HistogramValue(_Sharded):
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        super().__init__()
+        self._buckets = buckets
+
+    def _new_cell(self) -> list:
+        # [バケットごとの件数（最後は +Inf）, 合計, 件数]
+        return [[0] * (len(self._buckets) + 1), 0.0, 0]
+
+    def observe(self, value: float) -> None:
+        """観測値を1つ記録する。"""
+        cell = self._cell()
+        cell[0][bisect_left(self._buckets, value)] += 1
+        cell[1] += value
+        cell[2] += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """with ブロックの所要時間（秒）を記録する。"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def snapshot(self) -> tuple[list[int], float, int]:
+        """(累積バケット件数, 合計, 件数) を返す。"""
+        counts = [0] * (len(self._buckets) + 1)
+        total = 0.0
+        count = 0
+        for cell in list(self._cells):
+            for i, n in enumerate(cell[0]):
+                counts[i] += n
+            total += cell[1]
+            count += cell[2]
+        cumulative = []
+        running = 0
+        for n in counts:
+            running += n
+            cumulative.append(running)
+        return cumulative, total, count
+
+
+class _Metric:
+    """ラベル付きの子を持てるメトリクスの基底クラス。"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, **labels: str):
+        """ラベルの値を指定した子メトリクスを返す（初回だけ作成）。"""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"ラベルが一致しません: {sorted(labels)} != {sorted(self.labelnames)}")
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _unlabelled(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} はラベル指定が必要です: {self.labelnames}")
+        return self._children[()]
+
+    def _samples(self) -> Iterator[tuple[tuple[tuple[str, str], ...], object]]:
+        for key, child in list(self._children.items()):
+            yield tuple(zip(self.labelnames, key)), child
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for labels, child in self._samples():
+            lines.extend(self._render_child(labels, child))
+        return lines
+
+    def _render_child(self, labels, child) -> list[str]:
+        return [f"{self.name}{_format_labels(labels)} {_format_value(child.get())}"]
+
+
+class Counter(_Metric):
+    """単調に増えるカウンタ"""
+
+    type_name = "counter"
+
+    def _new_child(self) -> _CounterValue:
+        return _CounterValue()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabelled().inc(amount)
+
+    def get(self) -> float:
+        return self._unlabelled().get()
+
+
+class Gauge(_Metric):
+    """増減する現在値"""
+
+    type_name = "gauge"
+
+    def _new_child(self) -> _GaugeValue:
+        return _GaugeValue()
+
+    def set(self, value: float) -> None:
+        self._unlabelled().set(value)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._unlabelled().set_function(function)
+
+    def get(self) -> float:
+        return self._unlabelled().get()
+
+
+class Histogram(_Metric):
+    """値の分布（バケットごとの件数・合計・件数）"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._unlabelled().observe(value)
+
+    def time(self):
+        return self._unlabelled().time()
+
+    def snapshot(self) -> tuple[list[int], float, int]:
+        return self._unlabelled().snapshot()
+
+    def _render_child(self, labels, child) -> list[str]:
+        cumulative, total, count = child.snapshot()
+        lines = []
+        for bound, n in zip(self.buckets + (float("inf"),), cumulative):
+            bucket_labels = labels + (("le", _format_value(bound)),)
+            lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {n}")
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class Registry:
+    """メトリクスの登録先。render() で Prometheus テキスト形式にする。"""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"メトリクス名が重複しています: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+NOTIFICATIONS = REGISTRY.counter(
+    "ebibot_notifications_total",
+    "リマインダー通知の送信結果（sent / failed / retry / dead）",
+    ("outcome",),
+)
+NOTIFICATION_LATENESS = REGISTRY.histogram(
+    "ebibot_notification_lateness_seconds",
+    "scheduled_at から実際に送信するまでの遅れ",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0),
+)
+CHECK_SCHEDULED_DURATION = REGISTRY.histogram(
+    "ebibot_check_scheduled_duration_seconds",
+    "ReminderCog.check_scheduled 1回の所要時間",
+)
+WATCHDOG_FETCH_DURATION = REGISTRY.histogram(
+    "ebibot_watchdog_fetch_duration_seconds",
+    "Watchdog の期限切れタスク取得の所要時間",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+DISCORD_REST_LATENCY = REGISTRY.histogram(
+    "ebibot_discord_rest_latency_seconds",
+    "Discord REST API 1リクエストの応答時間",
+    ("method",),
+)
+OUTBOUND_QUEUE_DEPTH = REGISTRY.gauge(
+    "ebibot_outbound_queue_depth",
+    "送信ディスパッチャで送信待ちの件数",
+)
+DB_QUERY_DURATION = REGISTRY.histogram(
+    "ebibot_db_query_seconds",
+    "DB専用スレッドでのクエリ1回の所要時間",
+    ("op",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+EVENT_LOOP_LAG = REGISTRY.histogram(
+    "ebibot_event_loop_lag_seconds",
+    "イベントループのスケジューリング遅延（予定より遅れて起きた時間）",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+EVENT_LOOP_STALLS = REGISTRY.counter(
+    "ebibot_event_loop_stalls_total",
+    "遅延がしきい値を超えた回数",
+)
+LOG_RECORDS_DROPPED = REGISTRY.counter(
+    "ebibot_log_records_dropped_total",
+    "ログキューが一杯で破棄したログの件数",
+)
+
+
+def discord_trace_config() -> aiohttp.TraceConfig:
+    """Discord REST の応答時間を DISCORD_REST_LATENCY に記録する TraceConfig を返す。
+
+    discord.Client(http_trace=...) に渡す。
+    """
+
+    async def on_start(session, context, params) -> None:
+        context.start = time.perf_counter()
+
+    async def on_end(session, context, params) -> None:
+        DISCORD_REST_LATENCY.labels(method=params.method).observe(
+            time.perf_counter() - context.start
+        )
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_start)
+    trace.on_request_end.append(on_end)
+    return trace
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    """GET /metrics — REGISTRY を Prometheus テキスト形式で返す。"""
+    return web.Response(body=REGISTRY.render().encode(), headers={"Content-Type": CONTENT_TYPE})
@@ -0,0 +1,43 @@
+"""送信失敗時の再試行ポリシー — 一時的なエラーだけ指数バックオフで送り直す"""
+
+import asyncio
+import random
+from dataclasses import dataclass
+
+import aiohttp
+import discord
+
+
+def is_retryable(error: BaseException) -> bool:
+    """時間を置けば成功しうるエラーか判定する。
+
+    429・5xx・接続エラー・タイムアウトは再試行する。404/403 やチャンネル不明など、
+    何度送っても同じ結果になるものは再試行しない。
+    """
+    if isinstance(error, discord.RateLimited):
+        return True
+    if isinstance(error, discord.HTTPException):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError))
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """再試行の回数とバックオフの設定"""
+
+    max_attempts: int = 5
+    base_delay: float = 30.0
+    max_delay: float = 3600.0
+
+    def delay(self, attempt: int) -> float:
+        """attempt 回目の失敗後に待つ秒数を返す。
+
+        base_delay * 2^(attempt-1) を上限 max_delay で切り、その半分から全体の間で
+        ランダムに揺らす（同時に失敗した通知が同じ瞬間に再送されないように）。
+        """
+        ceiling = min(self.max_delay, self.base_delay * 2 ** max(attempt - 1, 0))
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+    def exhausted(self, attempt: int) -> bool:
+        """attempt 回試して、もう再試行しないならTrue。"""
+        return attempt >= self.max_attempts
@@ -0,0 +1,68 @@
+"""期限駆動スケジューラ — 次の scheduled_at まで正確に眠る"""
+
+import asyncio
+import heapq
+from datetime import datetime
+from typing import Optional
+
+
+def parse_scheduled_at(value: str) -> datetime:
+    """scheduled_at 文字列（ISO形式）をローカル時刻のnaiveなdatetimeにする。"""
+    when = datetime.fromisoformat(value)
+    if when.tzinfo is not None:
+        when = when.astimezone().replace(tzinfo=None)
+    return when
+
+
+class DeadlineScheduler:
+    """scheduled_at のmin-heapを持ち、先頭の期限まで眠るスケジューラ。
+
+    ポーリングせずに次の期限まで待ち、先頭より早い期限が追加されたら
+    即座に起きて待ち時間を計算し直す。空のときは追加されるまで眠り続ける。
+    """
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[datetime, int]] = []
+        self._wakeup = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, when: datetime, notification_id: int) -> None:
+        """期限を登録する。先頭が変わったら待機中のループを起こす。"""
+        head = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, (when, notification_id))
+        if head is None or when < head:
+            self._wakeup.set()
+
+    def next_deadline(self) -> Optional[datetime]:
+        """次の期限を返す（なければNone）。"""
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime) -> list[int]:
+        """now 以前の期限をすべて取り出し、そのIDを返す。"""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[1])
+        return due
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self._wakeup.set()
+
+    async def wait_next(self) -> None:
+        """先頭の期限が来るまで待つ。"""
+        while True:
+            self._wakeup.clear()
+            deadline = self.next_deadline()
+            if deadline is None:
+                await self._wakeup.wait()
+                continue
+
+            delay = (deadline - datetime.now()).total_seconds()
+            if delay <= 0:
+                return
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                return
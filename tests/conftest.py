@@ -6,7 +6,7 @@ import tempfile
 import pytest
 
 from src.database.models import Database
-from src.database.repository import NotificationRepository
+from src.database.repository import AsyncNotificationRepository, NotificationRepository
 
 
 @pytest.fixture
@@ -26,3 +26,9 @@ def tmp_db():
 def repo(tmp_db):
     """NotificationRepositoryのfixture。"""
     return NotificationRepository(tmp_db)
+
+
+@pytest.fixture
+def async_repo(tmp_db):
+    """AsyncNotificationRepositoryのfixture（repoと同じDBを共有）。"""
+    return AsyncNotificationRepository(tmp_db)
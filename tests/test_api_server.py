@@ -9,7 +9,7 @@ import pytest
 from aiohttp.test_utils import TestClient, TestServer
 
 from claude_discord.database.notification_repo import NotificationRepository
-from src.api.server import ApiServer
+from src.api.server import ApiServer, add_metrics_route
 
 
 async def _make_fixtures():
@@ -170,3 +170,18 @@ async def test_notify_invalid_json():
             assert resp.status == 400
     finally:
         os.unlink(db_path)
+
+
+@pytest.mark.asyncio
+async def test_metrics():
+    db_path, api_server = await _make_fixtures()
+    add_metrics_route(api_server)
+    try:
+        server = TestServer(api_server.app)
+        async with TestClient(server) as client:
+            resp = await client.get("/metrics")
+            assert resp.status == 200
+            assert resp.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert "# TYPE ebibot_notifications_total counter" in await resp.text()
+    finally:
+        os.unlink(db_path)
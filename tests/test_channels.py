@@ -0,0 +1,95 @@
+"""ChannelResolver テスト"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import discord
+import pytest
+
+from src.utils.channels import ChannelResolver
+
+
+def _http_error(cls, status):
+    response = MagicMock(status=status, reason="error")
+    return cls(response, "error")
+
+
+@pytest.fixture
+def bot():
+    bot = MagicMock()
+    bot.get_channel = MagicMock(return_value=None)
+    bot.fetch_channel = AsyncMock(return_value=MagicMock(id=1))
+    return bot
+
+
+class TestChannelResolver:
+    @pytest.mark.asyncio
+    async def test_prefers_gateway_cache(self, bot):
+        cached = MagicMock()
+        bot.get_channel.return_value = cached
+        resolver = ChannelResolver(bot)
+
+        assert await resolver.resolve(1) is cached
+        bot.fetch_channel.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_caches_fetched_channel(self, bot):
+        resolver = ChannelResolver(bot)
+
+        first = await resolver.resolve(1)
+        second = await resolver.resolve(1)
+
+        assert first is second
+        bot.fetch_channel.assert_awaited_once_with(1)
+
+    @pytest.mark.asyncio
+    async def test_refetches_after_ttl(self, bot):
+        resolver = ChannelResolver(bot, ttl=0)
+
+        await resolver.resolve(1)
+        await resolver.resolve(1)
+
+        assert bot.fetch_channel.await_count == 2
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("cls,status", [(discord.NotFound, 404), (discord.Forbidden, 403)])
+    async def test_negative_caching(self, bot, cls, status):
+        bot.fetch_channel.side_effect = _http_error(cls, status)
+        resolver = ChannelResolver(bot)
+
+        assert await resolver.resolve(1) is None
+        assert await resolver.resolve(1) is None
+        bot.fetch_channel.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_other_errors_are_not_cached(self, bot):
+        bot.fetch_channel.side_effect = _http_error(discord.HTTPException, 500)
+        resolver = ChannelResolver(bot)
+
+        with pytest.raises(discord.HTTPException):
+            await resolver.resolve(1)
+        with pytest.raises(discord.HTTPException):
+            await resolver.resolve(1)
+        assert bot.fetch_channel.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_fetch(self, bot):
+        async def slow_fetch(channel_id):
+            await asyncio.sleep(0.05)
+            return MagicMock(id=channel_id)
+
+        bot.fetch_channel.side_effect = slow_fetch
+        resolver = ChannelResolver(bot)
+
+        results = await asyncio.gather(*(resolver.resolve(1) for _ in range(5)))
+
+        assert all(r is results[0] for r in results)
+        bot.fetch_channel.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_invalidate(self, bot):
+        resolver = ChannelResolver(bot)
+        await resolver.resolve(1)
+        resolver.invalidate(1)
+        await resolver.resolve(1)
+        assert bot.fetch_channel.await_count == 2
@@ -0,0 +1,160 @@
+"""Database テスト"""
+
+import os
+import sqlite3
+import tempfile
+
+import pytest
+
+from src.database.models import MIGRATIONS, PROFILES, Database, SQLiteProfile, to_epoch_ms
+
+
+@pytest.fixture
+def db_path():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    yield path
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.unlink(path + suffix)
+
+
+def _pragma(db: Database, name: str):
+    return db.connection.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+class TestSQLiteProfile:
+    def test_default_profile(self, db_path):
+        db = Database(db_path=db_path)
+        db.initialize()
+        try:
+            assert _pragma(db, "journal_mode") == "delete"
+            assert _pragma(db, "synchronous") == 2
+            assert db.is_wal is False
+        finally:
+            db.close()
+
+    def test_wal_profile(self, db_path):
+        db = Database(db_path=db_path, profile=PROFILES["wal"])
+        db.initialize()
+        try:
+            assert _pragma(db, "journal_mode") == "wal"
+            assert _pragma(db, "synchronous") == 1
+            assert _pragma(db, "busy_timeout") == 5000
+            assert _pragma(db, "cache_size") == -16384
+            assert db.is_wal is True
+        finally:
+            db.close()
+
+    def test_is_wal_reflects_applied_journal_mode(self):
+        # :memory: は WAL を黙って断り memory のままになる
+        db = Database(db_path=":memory:", profile=PROFILES["wal"])
+        db.initialize()
+        try:
+            assert db.journal_mode == "memory"
+            assert db.is_wal is False
+        finally:
+            db.close()
+
+    def test_custom_profile(self, db_path):
+        profile = SQLiteProfile(journal_mode="WAL", synchronous="OFF", busy_timeout_ms=250, cache_size_kib=512)
+        db = Database(db_path=db_path, profile=profile)
+        try:
+            assert _pragma(db, "synchronous") == 0
+            assert _pragma(db, "busy_timeout") == 250
+            assert _pragma(db, "cache_size") == -512
+        finally:
+            db.close()
+
+    def test_checkpoint(self, db_path):
+        db = Database(db_path=db_path, profile=PROFILES["wal"])
+        db.initialize()
+        try:
+            db.connection.execute(
+                "INSERT INTO scheduled_notifications (message, scheduled_at) VALUES ('x', '2026-01-01T00:00:00')"
+            )
+            db.connection.commit()
+            busy, wal_pages, checkpointed = db.checkpoint()
+            assert busy == 0
+            assert checkpointed == wal_pages
+        finally:
+            db.close()
+
+
+LEGACY_SCHEMA = """
+CREATE TABLE scheduled_notifications (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    message TEXT NOT NULL,
+    title TEXT,
+    color INTEGER DEFAULT 49151,
+    scheduled_at TEXT NOT NULL,
+    source TEXT NOT NULL DEFAULT 'api',
+    channel_id INTEGER,
+    status TEXT NOT NULL DEFAULT 'pending',
+    sent_at TEXT,
+    error_message TEXT,
+    created_at TEXT DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX idx_notif_status_scheduled ON scheduled_notifications(status, scheduled_at);
+"""
+
+
+class TestSQLiteVersion:
+    def test_rejects_sqlite_without_returning(self, db_path, monkeypatch):
+        monkeypatch.setattr(sqlite3, "sqlite_version_info", (3, 34, 1))
+        db = Database(db_path=db_path)
+
+        with pytest.raises(RuntimeError, match="3.35.0"):
+            db.initialize()
+        db.close()
+
+
+class TestMigrations:
+    def test_fresh_database_is_at_latest_version(self, db_path):
+        db = Database(db_path=db_path)
+        db.initialize()
+        try:
+            assert _pragma(db, "user_version") == MIGRATIONS[-1][0]
+        finally:
+            db.close()
+
+    def test_migrates_legacy_database(self, db_path):
+        legacy = sqlite3.connect(db_path)
+        legacy.executescript(LEGACY_SCHEMA)
+        legacy.executemany(
+            "INSERT INTO scheduled_notifications (message, scheduled_at, status) VALUES (?, ?, ?)",
+            [
+                ("pending", "2026-02-13T14:30:00", "pending"),
+                ("sent", "2026-02-12T09:00:00", "sent"),
+                ("broken", "not a date", "pending"),
+            ],
+        )
+        legacy.commit()
+        legacy.close()
+
+        db = Database(db_path=db_path)
+        db.initialize()
+        try:
+            rows = {
+                row["message"]: row["scheduled_at_ms"]
+                for row in db.connection.execute("SELECT * FROM scheduled_notifications")
+            }
+            assert rows["pending"] == to_epoch_ms("2026-02-13T14:30:00")
+            assert rows["sent"] == to_epoch_ms("2026-02-12T09:00:00")
+            assert rows["broken"] == 0
+
+            indexes = {row[1] for row in db.connection.execute("PRAGMA index_list(scheduled_notifications)")}
+            assert "idx_notif_pending_due" in indexes
+            assert "idx_notif_status_scheduled" not in indexes
+            assert "idx_notif_sending_lease" in indexes
+
+            columns = {row[1] for row in db.connection.execute("PRAGMA table_info(scheduled_notifications)")}
+            assert {"lease_owner", "lease_expires_ms"} <= columns
+            assert _pragma(db, "user_version") == MIGRATIONS[-1][0]
+        finally:
+            db.close()
+
+        # 2回目の初期化では何もしない
+        db = Database(db_path=db_path)
+        db.initialize()
+        db.close()
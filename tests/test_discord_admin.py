@@ -0,0 +1,316 @@
+"""Discord Admin CLI（scripts/discord_admin.py）テスト — 偽Discordに対して動かす"""
+
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from aiohttp.test_utils import TestServer
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import discord_admin  # noqa: E402
+from discord_http import DiscordHTTP  # noqa: E402
+from fake_discord import FakeDiscord  # noqa: E402
+from thread_index import ThreadIndex  # noqa: E402
+
+
+@pytest.fixture
+def fake():
+    return FakeDiscord(threads=120, archived_ratio=0.5, seed=2)
+
+
+@pytest_asyncio.fixture
+async def client(fake):
+    server = TestServer(fake.app())
+    await server.start_server()
+    async with DiscordHTTP("fake", base=str(server.make_url("/api/v10"))) as client:
+        yield client
+    await server.close()
+
+
+ARCHIVED_ROUTE = "GET /api/v10/channels/{channel_id}/threads/archived/{kind}"
+
+
+def _threads(fake) -> list[dict]:
+    return [c for c in fake.channels.values() if c.get("thread_metadata")]
+
+
+async def _stream(items):
+    for item in items:
+        yield item
+
+
+class TestIterThreads:
+    @pytest.mark.asyncio
+    async def test_yields_active_public_and_private_threads_once(self, fake, client):
+        for i in range(30):
+            fake.add_thread(f"private-{i}", archived=True, thread_type=discord_admin.PRIVATE_THREAD)
+
+        threads = [
+            t async for t in discord_admin.iter_threads(client, fake.channel_id, fake.guild_id)
+        ]
+
+        ids = [t["id"] for t in threads]
+        assert len(ids) == len(set(ids))
+        assert set(ids) == {t["id"] for t in _threads(fake)}
+        # アクティブが先に来る
+        active = [discord_admin.is_archived(t) for t in threads].index(True)
+        assert not any(discord_admin.is_archived(t) for t in threads[:active])
+
+    @pytest.mark.asyncio
+    async def test_streams_before_pagination_finishes(self):
+        fake = FakeDiscord(threads=2000, archived_ratio=1.0, seed=3)
+        server = TestServer(fake.app())
+        await server.start_server()
+        try:
+            async with DiscordHTTP("fake", base=str(server.make_url("/api/v10"))) as client:
+                threads = discord_admin.iter_threads(client, fake.channel_id, fake.guild_id)
+                first = await anext(threads)
+                await threads.aclose()
+        finally:
+            await server.close()
+
+        assert discord_admin.is_archived(first)
+        # 20ページあるが、先読みの分しか取得していない
+        assert fake.stats[ARCHIVED_ROUTE] <= discord_admin.PREFETCH_PAGES + 3
+
+
+class TestTargetSelection:
+    @pytest.mark.asyncio
+    async def test_keep_newest_yields_everything_else(self, fake):
+        threads = _threads(fake)
+        selection = discord_admin.TargetSelection(keep_newest=10)
+
+        targets = [t async for t in selection.select(_stream(threads))]
+
+        newest = sorted(threads, key=lambda t: int(t["id"]), reverse=True)
+        assert selection.kept == newest[:10]
+        assert {t["id"] for t in targets} == {t["id"] for t in newest[10:]}
+        assert selection.seen == len(threads)
+
+    @pytest.mark.asyncio
+    async def test_older_than(self, fake):
+        threads = _threads(fake)
+        selection = discord_admin.TargetSelection(older_than_days=30)
+
+        targets = [t async for t in selection.select(_stream(threads))]
+
+        now = datetime.now(tz=timezone.utc)
+        expected = {
+            t["id"] for t in threads
+            if (now - discord_admin.snowflake_to_datetime(t["id"])).days >= 30
+        }
+        assert 0 < len(expected) < len(threads)
+        assert {t["id"] for t in targets} == expected
+
+
+class TestDeleteThreads:
+    @pytest.mark.asyncio
+    async def test_deletes_all_targets_concurrently(self, fake, client, tmp_path):
+        targets = _threads(fake)
+        checkpoint = discord_admin.Checkpoint(tmp_path / "done.txt")
+
+        summary = await discord_admin.delete_threads(
+            client, targets, concurrency=16, checkpoint=checkpoint,
+        )
+        checkpoint.close()
+
+        assert summary.deleted == len(targets)
+        assert summary.failed == 0
+        assert not _threads(fake)
+        assert fake.stats["429 route"] == fake.stats["429 global"] == 0
+        # 偽Discordは本物と同じ小文字のヘッダ名で返す。それでもバケットを覚えている
+        assert fake.header_case == "lower"
+        assert client.bucket_for("DELETE", f"/channels/{targets[-1]['id']}").known
+        assert set((tmp_path / "done.txt").read_text().split()) == {t["id"] for t in targets}
+
+    @pytest.mark.asyncio
+    async def test_resumes_from_checkpoint(self, fake, client, tmp_path):
+        targets = _threads(fake)
+        path = tmp_path / "done.txt"
+        # 前回の実行で先頭40件まで消えていた
+        for t in targets[:40]:
+            del fake.channels[t["id"]]
+        path.write_text("".join(f"{t['id']}\n" for t in targets[:40]))
+
+        checkpoint = discord_admin.Checkpoint(path)
+        checkpoint.load()
+        summary = await discord_admin.delete_threads(client, targets, checkpoint=checkpoint)
+        checkpoint.close()
+
+        assert summary.skipped == 40
+        assert summary.deleted == len(targets) - 40
+        assert summary.missing == 0
+        assert fake.stats["DELETE /api/v10/channels/{channel_id}"] == len(targets) - 40
+
+    @pytest.mark.asyncio
+    async def test_counts_already_deleted(self, fake, client):
+        targets = _threads(fake)[:3] + [{"id": "1", "name": "消えたスレッド"}]
+
+        summary = await discord_admin.delete_threads(client, targets)
+
+        assert summary.deleted == 3
+        assert summary.missing == 1
+        assert summary.done == 4
+
+    @pytest.mark.asyncio
+    async def test_deletes_while_enumerating(self, fake, client):
+        threads = _threads(fake)
+        selection = discord_admin.TargetSelection(keep_newest=5)
+        targets = selection.select(
+            discord_admin.iter_threads(client, fake.channel_id, fake.guild_id)
+        )
+
+        summary = await discord_admin.delete_threads(client, targets, concurrency=8)
+
+        newest = sorted(threads, key=lambda t: int(t["id"]), reverse=True)[:5]
+        assert summary.total == summary.deleted == len(threads) - 5
+        assert {t["id"] for t in _threads(fake)} == {t["id"] for t in newest}
+        assert fake.stats["429 route"] == 0
+
+
+class TestSyncIndex:
+    @pytest_asyncio.fixture
+    async def index(self, tmp_path):
+        with ThreadIndex(tmp_path / "threads.db") as index:
+            yield index
+
+    @pytest.mark.asyncio
+    async def test_first_sync_is_full_then_delta(self, fake, client, index):
+        old = datetime.now(tz=timezone.utc) - timedelta(days=90)
+        for i in range(300):
+            fake.add_thread(f"old-{i}", archived=True, created_at=old - timedelta(minutes=i))
+
+        first = await discord_admin.sync_index(client, index, fake.channel_id, fake.guild_id)
+        assert first.full
+        assert index.count(fake.channel_id) == len(_threads(fake))
+
+        fake.stats.clear()
+        new = fake.add_thread("new-archived", archived=True)
+        second = await discord_admin.sync_index(client, index, fake.channel_id, fake.guild_id)
+
+        assert not second.full
+        # アーカイブは先頭ページ（public / private）だけ読んで止まる
+        assert fake.stats[ARCHIVED_ROUTE] == 2
+        assert index.count(fake.channel_id) == len(_threads(fake))
+        assert next(index.threads(fake.channel_id))["id"] == new["id"]
+
+    @pytest.mark.asyncio
+    async def test_delta_sync_drops_deleted_active_threads(self, fake, client, index):
+        await discord_admin.sync_index(client, index, fake.channel_id, fake.guild_id)
+        active = next(t for t in _threads(fake) if not discord_admin.is_archived(t))
+        del fake.channels[active["id"]]
+
+        result = await discord_admin.sync_index(client, index, fake.channel_id, fake.guild_id)
+
+        assert result.pruned == 1
+        assert active["id"] not in {t["id"] for t in index.threads(fake.channel_id)}
+
+    @pytest.mark.asyncio
+    async def test_delete_from_index_matches_streaming_selection(self, fake, client, index):
+        await discord_admin.sync_index(client, index, fake.channel_id, fake.guild_id)
+        streamed = discord_admin.TargetSelection(keep_newest=20)
+        expected = [t["id"] async for t in streamed.select(_stream(_threads(fake)))]
+
+        selection = discord_admin.TargetSelection(keep_newest=20)
+        summary = await discord_admin.delete_threads(
+            client, selection.from_index(index, fake.channel_id), on_removed=index.remove,
+        )
+
+        assert [t["id"] for t in selection.kept] == [t["id"] for t in streamed.kept]
+        assert summary.deleted == len(expected)
+        assert len(_threads(fake)) == index.count(fake.channel_id) == 20
+
+    @pytest.mark.asyncio
+    async def test_keep_newest_above_count_selects_nothing_from_index(self, fake, client, index):
+        await discord_admin.sync_index(client, index, fake.channel_id, fake.guild_id)
+
+        selection = discord_admin.TargetSelection(keep_newest=len(_threads(fake)) + 1)
+        targets = list(selection.from_index(index, fake.channel_id))
+
+        assert targets == []
+        assert len(selection.kept) == len(_threads(fake))
+
+
+class TestExport:
+    @pytest.fixture
+    def fake(self):
+        fake = FakeDiscord(threads=6, seed=5)
+        for i, t in enumerate(_threads(fake)):
+            for n in range(50 * i + 10):
+                fake.add_message(t["id"], f"{t['name']} message {n}")
+        return fake
+
+    @pytest.mark.asyncio
+    async def test_exports_every_message_newest_first(self, fake, client, tmp_path):
+        summary = await discord_admin.export_threads(client, _threads(fake), tmp_path, concurrency=3)
+
+        assert summary.exported == 6
+        assert summary.messages == sum(len(fake.messages[t["id"]]) for t in _threads(fake))
+        for t in _threads(fake):
+            exported = list(discord_admin.read_export(tmp_path / f"{t['id']}.jsonl.gz"))
+            assert [m["id"] for m in exported] == [m["id"] for m in reversed(fake.messages[t["id"]])]
+            state = json.loads((tmp_path / f"{t['id']}.json").read_text())
+            assert state["done"] and state["thread"]["name"] == t["name"]
+        assert fake.stats["429 route"] == 0
+
+    @pytest.mark.asyncio
+    async def test_paced_by_lowercase_rate_limit_headers(self, fake, client, tmp_path):
+        # 本物と同じ小文字のヘッダ名で、1秒5ページの上限を超える数のページを読む
+        assert fake.header_case == "lower"
+        thread = _threads(fake)[0]
+        for n in range(700):
+            fake.add_message(thread["id"], f"extra {n}")
+
+        summary = await discord_admin.export_threads(client, [thread], tmp_path)
+
+        assert summary.messages == len(fake.messages[thread["id"]])
+        assert fake.stats["GET /api/v10/channels/{channel_id}/messages"] > 5
+        assert fake.stats["429 route"] == fake.stats["429 global"] == 0
+        bucket = client.bucket_for("GET", f"/channels/{thread['id']}/messages")
+        assert bucket.known and bucket.limit == 5
+
+    @pytest.mark.asyncio
+    async def test_resumes_after_interruption(self, fake, client, tmp_path, monkeypatch):
+        thread = max(_threads(fake), key=lambda t: len(fake.messages[t["id"]]))
+        get = client.get
+        calls = 0
+
+        async def interrupted_get(path, **kwargs):
+            nonlocal calls
+            calls += 1
+            if calls == 3:
+                raise RuntimeError("中断")
+            return await get(path, **kwargs)
+
+        monkeypatch.setattr(client, "get", interrupted_get)
+        with pytest.raises(RuntimeError):
+            await discord_admin.export_thread(client, thread, tmp_path)
+        # 書きかけのページが残っている
+        with (tmp_path / f"{thread['id']}.jsonl.gz").open("ab") as f:
+            f.write(b"\x1f\x8b partial")
+        monkeypatch.setattr(client, "get", get)
+
+        fake.stats.clear()
+        outcome, written = await discord_admin.export_thread(client, thread, tmp_path)
+
+        messages = fake.messages[thread["id"]]
+        exported = list(discord_admin.read_export(tmp_path / f"{thread['id']}.jsonl.gz"))
+        assert outcome == discord_admin.EXPORTED
+        assert written == len(messages) - 200
+        assert [m["id"] for m in exported] == [m["id"] for m in reversed(messages)]
+        assert fake.stats["GET /api/v10/channels/{channel_id}/messages"] == 1
+
+    @pytest.mark.asyncio
+    async def test_skips_finished_threads(self, fake, client, tmp_path):
+        await discord_admin.export_threads(client, _threads(fake), tmp_path)
+        fake.stats.clear()
+
+        summary = await discord_admin.export_threads(client, _threads(fake), tmp_path)
+
+        assert summary.skipped == 6
+        assert summary.messages == 0
+        assert fake.stats["GET /api/v10/channels/{channel_id}/messages"] == 0
@@ -0,0 +1,195 @@
+"""Discord REST 共有クライアント（scripts/discord_http.py）テスト"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from discord_http import DiscordHTTP, DiscordHTTPError, route_key  # noqa: E402
+from fake_discord import FakeDiscord, RateLimit  # noqa: E402
+
+MESSAGES_ROUTE = ("POST", "/api/v10/channels/{channel_id}/messages")
+
+
+@pytest_asyncio.fixture
+async def fake_server():
+    """(FakeDiscord, DiscordHTTP) を作るファクトリ。"""
+    servers = []
+    clients = []
+
+    async def make(**kwargs):
+        fake = FakeDiscord(**kwargs)
+        server = TestServer(fake.app())
+        await server.start_server()
+        client = DiscordHTTP("fake", base=str(server.make_url("/api/v10")))
+        servers.append(server)
+        clients.append(client)
+        return fake, client
+
+    yield make
+    for client in clients:
+        await client.close()
+    for server in servers:
+        await server.close()
+
+
+class TestRouteKey:
+    def test_major_parameter_is_kept_separately(self):
+        assert route_key("GET", "/channels/123/messages") == (
+            "GET", "/channels/{major}/messages", "123",
+        )
+
+    def test_minor_ids_are_masked(self):
+        method, route, major = route_key(
+            "PUT", "/channels/1234567890123456789/thread-members/9876543210987654321"
+        )
+        assert route == "/channels/{major}/thread-members/{id}"
+        assert major == "1234567890123456789"
+
+
+class TestDiscordHTTP:
+    @pytest.mark.asyncio
+    async def test_burst_stays_within_bucket_without_429(self, fake_server):
+        fake, client = await fake_server(route_limits={MESSAGES_ROUTE: RateLimit(3, 0.2)})
+
+        start = time.monotonic()
+        responses = await asyncio.gather(*(
+            client.post(f"/channels/{fake.channel_id}/messages", json={"content": f"m{i}"})
+            for i in range(10)
+        ))
+        elapsed = time.monotonic() - start
+
+        assert all(r.ok for r in responses)
+        assert len(fake.messages[fake.channel_id]) == 10
+        assert fake.stats["429 route"] == 0
+        # 3件/0.2秒なので最低3ウィンドウ分は待つ
+        assert elapsed >= 0.55
+
+    @pytest.mark.asyncio
+    async def test_retries_after_429(self, fake_server):
+        fake, client = await fake_server(route_limits={MESSAGES_ROUTE: RateLimit(1, 0.2)})
+        # 別クライアントで枠を使い切っておく
+        async with DiscordHTTP("fake", base=client.base) as other:
+            await other.post(f"/channels/{fake.channel_id}/messages", json={"content": "x"})
+
+        r = await client.post(f"/channels/{fake.channel_id}/messages", json={"content": "y"})
+        assert r.ok
+        assert client.rate_limited == 1
+        assert len(fake.messages[fake.channel_id]) == 2
+
+    @pytest.mark.asyncio
+    async def test_buckets_are_per_major_parameter(self, fake_server):
+        fake, client = await fake_server(route_limits={MESSAGES_ROUTE: RateLimit(1, 1.0)})
+        threads = [fake.add_thread(f"t{i}") for i in range(5)]
+
+        start = time.monotonic()
+        responses = await asyncio.gather(*(
+            client.post(f"/channels/{t['id']}/messages", json={"content": "x"})
+            for t in threads
+        ))
+        # チャンネルごとに別バケットなので互いに待たない
+        assert time.monotonic() - start < 0.5
+        assert all(r.ok for r in responses)
+
+    @pytest.mark.asyncio
+    async def test_error_status_is_returned(self, fake_server):
+        fake, client = await fake_server()
+        r = await client.get("/channels/1")
+        assert r.status == 404
+        with pytest.raises(DiscordHTTPError):
+            r.json_or_raise()
+
+
+class TestLowercaseHeaders:
+    """本物の Discord はヘッダ名を小文字で返す"""
+
+    @pytest_asyncio.fixture
+    async def server(self):
+        calls = {"n": 0}
+
+        async def handler(request: web.Request) -> web.Response:
+            calls["n"] += 1
+            if calls["n"] == 2:
+                return web.json_response(
+                    {"message": "You are being rate limited.", "retry_after": 0.05, "global": False},
+                    status=429,
+                    headers={"retry-after": "0.05", "x-ratelimit-scope": "user"},
+                )
+            return web.json_response({}, headers={
+                "x-ratelimit-limit": "5",
+                "x-ratelimit-remaining": "4",
+                "x-ratelimit-reset-after": "1.0",
+                "x-ratelimit-bucket": "abc123",
+            })
+
+        app = web.Application()
+        app.router.add_get("/api/v10/channels/{channel_id}", handler)
+        server = TestServer(app)
+        await server.start_server()
+        yield server, calls
+        await server.close()
+
+    @pytest.mark.asyncio
+    async def test_bucket_is_learned_from_lowercase_headers(self, server):
+        server, calls = server
+        async with DiscordHTTP("x", base=str(server.make_url("/api/v10"))) as client:
+            r = await client.get("/channels/123")
+            bucket = client.bucket_for("GET", "/channels/123")
+
+            assert r.headers["X-RateLimit-Limit"] == "5"
+            assert bucket.known
+            assert bucket.limit == 5
+            assert ("abc123", "123") in client._buckets
+
+            # 2回目は 429（小文字の retry-after）→ 再送して成功する
+            r = await client.get("/channels/123")
+            assert r.ok
+            assert client.rate_limited == 1
+            assert calls["n"] == 3
+
+
+class TestSharedBucketHash:
+    """2つのルートが同じ X-RateLimit-Bucket を返す"""
+
+    @pytest_asyncio.fixture
+    async def server(self):
+        async def handler(request: web.Request) -> web.Response:
+            await asyncio.sleep(0.01)
+            return web.json_response({}, headers={
+                "x-ratelimit-limit": "5",
+                "x-ratelimit-remaining": "4",
+                "x-ratelimit-reset-after": "1.0",
+                "x-ratelimit-bucket": "shared",
+            })
+
+        app = web.Application()
+        app.router.add_get("/api/v10/channels/{channel_id}", handler)
+        app.router.add_get("/api/v10/channels/{channel_id}/pins", handler)
+        server = TestServer(app)
+        await server.start_server()
+        yield server
+        await server.close()
+
+    @pytest.mark.asyncio
+    async def test_waiters_on_route_bucket_move_to_shared_bucket(self, server):
+        async with DiscordHTTP("x", base=str(server.make_url("/api/v10"))) as client:
+            await client.get("/channels/123")
+
+            # 2つ目のルートは最初バケットが分からないので1件ずつ。残りは待っている間に
+            # 共有バケットへ移されるが、取り残されずに送られる
+            responses = await asyncio.wait_for(
+                asyncio.gather(*(client.get("/channels/123/pins") for _ in range(3))),
+                timeout=5,
+            )
+
+            assert all(r.ok for r in responses)
+            assert client.bucket_for("GET", "/channels/123/pins") is client.bucket_for(
+                "GET", "/channels/123"
+            )
@@ -0,0 +1,201 @@
+"""OutboundDispatcher テスト"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.utils.dispatcher import OutboundDispatcher, Priority, dispatch_send
+
+
+class FakeChannel:
+    """送信内容を記録するチャンネル。gate をセットするまで送信を止められる。"""
+
+    def __init__(self, channel_id: int, log: list, gate: asyncio.Event | None = None):
+        self.id = channel_id
+        self.log = log
+        self.gate = gate
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def send(self, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.gate is not None:
+                await self.gate.wait()
+            await asyncio.sleep(0)
+            self.log.append(kwargs["content"])
+            return kwargs["content"]
+        finally:
+            self.in_flight -= 1
+
+
+class TestOutboundDispatcher:
+    @pytest.mark.asyncio
+    async def test_higher_priority_goes_first(self):
+        log: list = []
+        gate = asyncio.Event()
+        dispatcher = OutboundDispatcher(workers=1)
+        dispatcher.start()
+        try:
+            blocker = asyncio.create_task(
+                dispatcher.send(FakeChannel(1, log, gate), Priority.STARTUP, content="blocker")
+            )
+            await asyncio.sleep(0.01)
+            channel = FakeChannel(2, log)
+            sends = [
+                asyncio.create_task(dispatcher.send(channel, priority, content=priority.name))
+                for priority in (Priority.STARTUP, Priority.WATCHDOG, Priority.REMINDER, Priority.INTERACTIVE)
+            ]
+            await asyncio.sleep(0.01)
+            gate.set()
+            await asyncio.gather(blocker, *sends)
+        finally:
+            await dispatcher.stop()
+
+        assert log == ["blocker", "INTERACTIVE", "REMINDER", "WATCHDOG", "STARTUP"]
+
+    @pytest.mark.asyncio
+    async def test_lower_priority_waits_while_higher_is_queued(self):
+        log: list = []
+        gate = asyncio.Event()
+        dispatcher = OutboundDispatcher(workers=2)
+        dispatcher.start()
+        try:
+            busy = FakeChannel(1, log, gate)
+            # 同じチャンネルに2件: 1件目が送信中の間、2件目は待ち行列に残る
+            reminders = [
+                asyncio.create_task(dispatcher.send(busy, Priority.REMINDER, content=f"reminder{i}"))
+                for i in range(2)
+            ]
+            await asyncio.sleep(0.01)
+            watchdog = asyncio.create_task(
+                dispatcher.send(FakeChannel(2, log), Priority.WATCHDOG, content="watchdog")
+            )
+            await asyncio.sleep(0.01)
+            # 空いているワーカーとチャンネルがあっても、REMINDER が残っている間は送らない
+            assert log == []
+            gate.set()
+            await asyncio.gather(*reminders, watchdog)
+        finally:
+            await dispatcher.stop()
+
+        assert log == ["reminder0", "reminder1", "watchdog"]
+
+    @pytest.mark.asyncio
+    async def test_round_robin_across_channels(self):
+        log: list = []
+        gate = asyncio.Event()
+        dispatcher = OutboundDispatcher(workers=1)
+        dispatcher.start()
+        try:
+            blocker = asyncio.create_task(
+                dispatcher.send(FakeChannel(0, log, gate), Priority.REMINDER, content="blocker")
+            )
+            await asyncio.sleep(0.01)
+            noisy, quiet = FakeChannel(1, log), FakeChannel(2, log)
+            sends = [
+                asyncio.create_task(dispatcher.send(noisy, Priority.REMINDER, content=f"noisy{i}"))
+                for i in range(5)
+            ]
+            await asyncio.sleep(0)
+            sends.append(asyncio.create_task(dispatcher.send(quiet, Priority.REMINDER, content="quiet")))
+            await asyncio.sleep(0.01)
+            gate.set()
+            await asyncio.gather(blocker, *sends)
+        finally:
+            await dispatcher.stop()
+
+        assert log.index("quiet") == 2
+
+    @pytest.mark.asyncio
+    async def test_one_send_in_flight_per_channel(self):
+        log: list = []
+        dispatcher = OutboundDispatcher(workers=4)
+        dispatcher.start()
+        channel = FakeChannel(1, log)
+        try:
+            results = await asyncio.gather(*(
+                dispatcher.send(channel, Priority.REMINDER, content=i) for i in range(6)
+            ))
+        finally:
+            await dispatcher.stop()
+
+        assert results == list(range(6))
+        assert log == list(range(6))
+        assert channel.max_in_flight == 1
+
+    @pytest.mark.asyncio
+    async def test_backpressure_when_priority_queue_is_full(self):
+        log: list = []
+        dispatcher = OutboundDispatcher(max_pending_per_priority=2, workers=1)
+        channel = FakeChannel(1, log)
+        sends = [
+            asyncio.create_task(dispatcher.send(channel, Priority.WATCHDOG, content=i))
+            for i in range(3)
+        ]
+        await asyncio.sleep(0.01)
+        assert len(dispatcher) == 2
+
+        # 別の優先度は埋まっていないので積める
+        reminder = asyncio.create_task(dispatcher.send(channel, Priority.REMINDER, content="r"))
+        await asyncio.sleep(0.01)
+        assert len(dispatcher) == 3
+
+        dispatcher.start()
+        try:
+            await asyncio.gather(*sends, reminder)
+        finally:
+            await dispatcher.stop()
+        assert log == ["r", 0, 1, 2]
+
+    @pytest.mark.asyncio
+    async def test_send_error_is_raised_to_caller(self):
+        dispatcher = OutboundDispatcher(workers=1)
+        dispatcher.start()
+        channel = MagicMock(id=1)
+        channel.send = AsyncMock(side_effect=RuntimeError("送信エラー"))
+        try:
+            with pytest.raises(RuntimeError):
+                await dispatcher.send(channel, Priority.REMINDER, content="x")
+        finally:
+            await dispatcher.stop()
+
+    @pytest.mark.asyncio
+    async def test_stop_cancels_queued_sends(self):
+        dispatcher = OutboundDispatcher(workers=1)
+        send = asyncio.create_task(
+            dispatcher.send(FakeChannel(1, []), Priority.REMINDER, content="x")
+        )
+        await asyncio.sleep(0)
+
+        await dispatcher.stop()
+
+        with pytest.raises(asyncio.CancelledError):
+            await send
+
+
+class TestDispatchSend:
+    @pytest.mark.asyncio
+    async def test_falls_back_to_channel_send(self):
+        bot = MagicMock()
+        channel = AsyncMock()
+
+        await dispatch_send(bot, channel, Priority.REMINDER, content="直接")
+
+        channel.send.assert_awaited_once_with(content="直接")
+
+    @pytest.mark.asyncio
+    async def test_uses_running_dispatcher(self):
+        log: list = []
+        bot = MagicMock()
+        bot.dispatcher = OutboundDispatcher(workers=1)
+        bot.dispatcher.start()
+        try:
+            result = await dispatch_send(bot, FakeChannel(1, log), Priority.REMINDER, content="経由")
+        finally:
+            await bot.dispatcher.stop()
+
+        assert result == "経由"
+        assert log == ["経由"]
@@ -0,0 +1,175 @@
+"""偽Discord（scripts/fake_discord.py）テスト"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import aiohttp
+import discord
+import pytest
+import pytest_asyncio
+import yarl
+from aiohttp.test_utils import TestServer
+from discord.gateway import DiscordWebSocket
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import discord_admin  # noqa: E402
+from discord_http import DiscordHTTP  # noqa: E402
+from fake_discord import FakeDiscord, RateLimit  # noqa: E402
+
+MESSAGES_ROUTE = ("POST", "/api/v10/channels/{channel_id}/messages")
+HEADERS = {"Authorization": "Bot fake"}
+
+
+@pytest.fixture
+def fake():
+    return FakeDiscord(threads=250, archived_ratio=0.8, seed=1)
+
+
+@pytest_asyncio.fixture
+async def server(fake):
+    server = TestServer(fake.app())
+    await server.start_server()
+    yield server
+    await fake.close_gateways()
+    await server.close()
+
+
+class TestRest:
+    @pytest.mark.asyncio
+    async def test_requires_bot_token(self, server, fake):
+        async with aiohttp.ClientSession() as session:
+            async with session.get(server.make_url(f"/api/v10/channels/{fake.channel_id}")) as r:
+                assert r.status == 401
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_returns_429_with_bucket_headers(self, server, fake):
+        url = server.make_url(f"/api/v10/channels/{fake.channel_id}/messages")
+        async with aiohttp.ClientSession(headers=HEADERS) as session:
+            statuses = []
+            for i in range(6):
+                async with session.post(url, json={"content": f"msg{i}"}) as r:
+                    statuses.append(r.status)
+                    last_headers = r.headers
+                    last_body = await r.json()
+
+        assert statuses == [200] * 5 + [429]
+        assert last_body["retry_after"] > 0
+        assert last_body["global"] is False
+        assert last_headers["X-RateLimit-Remaining"] == "0"
+        assert "X-RateLimit-Bucket" in last_headers
+        assert len(fake.messages[fake.channel_id]) == 5
+
+    @pytest.mark.asyncio
+    async def test_buckets_are_per_channel(self, server, fake):
+        thread = fake.add_thread("別チャンネル")
+        async with aiohttp.ClientSession(headers=HEADERS) as session:
+            for _ in range(5):
+                async with session.post(
+                    server.make_url(f"/api/v10/channels/{fake.channel_id}/messages"),
+                    json={"content": "x"},
+                ) as r:
+                    assert r.status == 200
+            async with session.post(
+                server.make_url(f"/api/v10/channels/{thread['id']}/messages"),
+                json={"content": "x"},
+            ) as r:
+                assert r.status == 200
+
+    @pytest.mark.asyncio
+    async def test_admin_script_lists_all_archived_threads(self, server, fake):
+        expected = {
+            t["id"] for t in fake.channels.values()
+            if t.get("thread_metadata", {}).get("archived")
+        }
+
+        async with DiscordHTTP("fake", base=str(server.make_url("/api/v10"))) as client:
+            threads = await discord_admin.get_archived_threads(client, fake.channel_id)
+            active = await discord_admin.get_active_threads(client, fake.guild_id)
+
+        assert len(expected) > 100  # ページネーションを通る
+        assert {t["id"] for t in threads} == expected
+        assert all(not t["thread_metadata"]["archived"] for t in active)
+        assert len(threads) + len(active) == 250
+
+
+class TestHeaderCase:
+    @pytest.mark.parametrize(
+        "header_case, expected",
+        [
+            ("lower", {"x-ratelimit-bucket", "x-ratelimit-remaining", "retry-after"}),
+            ("title", {"X-RateLimit-Bucket", "X-RateLimit-Remaining", "Retry-After"}),
+        ],
+    )
+    @pytest.mark.asyncio
+    async def test_rate_limit_header_names(self, header_case, expected):
+        fake = FakeDiscord(threads=1, header_case=header_case)
+        server = TestServer(fake.app())
+        await server.start_server()
+        try:
+            url = server.make_url(f"/api/v10/channels/{fake.channel_id}/messages")
+            async with aiohttp.ClientSession(headers=HEADERS) as session:
+                for i in range(6):
+                    async with session.post(url, json={"content": f"msg{i}"}) as r:
+                        names = {k.decode() for k, _ in r.raw_headers}
+            assert r.status == 429
+            assert expected <= names
+        finally:
+            await server.close()
+
+    @pytest.mark.parametrize("header_case", ["lower", "title"])
+    @pytest.mark.asyncio
+    async def test_client_learns_bucket_in_either_case(self, header_case):
+        fake = FakeDiscord(threads=1, header_case=header_case)
+        server = TestServer(fake.app())
+        await server.start_server()
+        try:
+            async with DiscordHTTP("fake", base=str(server.make_url("/api/v10"))) as client:
+                await client.get(f"/channels/{fake.channel_id}/messages")
+                bucket = client.bucket_for("GET", f"/channels/{fake.channel_id}/messages")
+            assert bucket.known
+            assert bucket.limit == 5
+        finally:
+            await server.close()
+
+    def test_rejects_unknown_header_case(self):
+        with pytest.raises(ValueError):
+            FakeDiscord(threads=1, header_case="upper")
+
+
+class TestDiscordPyClient:
+    @pytest.mark.asyncio
+    async def test_client_connects_and_sends_through_rate_limits(self, monkeypatch):
+        fake = FakeDiscord(threads=3, route_limits={MESSAGES_ROUTE: RateLimit(2, 0.2)})
+        server = TestServer(fake.app())
+        await server.start_server()
+        monkeypatch.setattr(discord.http.Route, "BASE", str(server.make_url("/api/v10")))
+        monkeypatch.setattr(
+            DiscordWebSocket, "DEFAULT_GATEWAY",
+            yarl.URL(str(server.make_url("/gateway"))).with_scheme("ws"),
+        )
+
+        client = discord.Client(intents=discord.Intents.default())
+        ready = asyncio.Event()
+
+        @client.event
+        async def on_ready():
+            ready.set()
+
+        task = asyncio.create_task(client.start("fake"))
+        try:
+            await asyncio.wait_for(ready.wait(), timeout=10)
+            channel = client.get_channel(int(fake.channel_id))
+            assert channel is not None
+
+            for i in range(5):
+                await channel.send(embed=discord.Embed(title=f"通知{i}"))
+        finally:
+            await client.close()
+            await task
+            await server.close()
+
+        sent = fake.messages[fake.channel_id]
+        assert [m["embeds"][0]["title"] for m in sent] == [f"通知{i}" for i in range(5)]
+        assert fake.stats["gateway identify"] == 1
@@ -0,0 +1,132 @@
+"""ロガー設定 テスト"""
+
+import json
+import logging
+import queue
+
+import pytest
+
+from src.utils import metrics
+from src.utils.logger import (
+    DroppingQueueHandler,
+    JsonFormatter,
+    SamplingFilter,
+    configure_logging,
+    get_logger,
+    shared_handler,
+    stop_logging,
+)
+
+
+def _record(msg: str = "テスト", **extra) -> logging.LogRecord:
+    record = logging.LogRecord("src.test", logging.INFO, __file__, 1, msg, None, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+@pytest.fixture
+def queued_logging():
+    """テスト後にキュー経由の出力を止める。"""
+    yield
+    stop_logging()
+
+
+class TestDroppingQueueHandler:
+    def test_drops_when_full_and_reports_later(self):
+        handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+        dropped_before = metrics.LOG_RECORDS_DROPPED.get()
+
+        for i in range(5):
+            handler.handle(_record(f"msg {i}"))
+        assert handler.dropped == 3
+        assert metrics.LOG_RECORDS_DROPPED.get() == dropped_before + 3
+
+        handler.queue.get_nowait()
+        handler.queue.get_nowait()
+        handler.handle(_record("next"))
+        notice = handler.queue.get_nowait()
+        assert notice.levelno == logging.WARNING
+        assert "3件を破棄" in notice.getMessage()
+        assert handler.queue.get_nowait().getMessage() == "next"
+
+
+class TestSamplingFilter:
+    def test_passes_one_in_every_n_per_key(self):
+        sampler = SamplingFilter(every=10)
+        passed = [sampler.filter(_record(sample_key="a")) for _ in range(25)]
+        assert passed.count(True) == 3
+        assert passed[0] is True
+
+        # キーが違えば別に数える
+        assert sampler.filter(_record(sample_key="b")) is True
+
+    def test_unkeyed_records_always_pass(self):
+        sampler = SamplingFilter(every=10)
+        assert all(sampler.filter(_record()) for _ in range(5))
+
+
+class TestJsonFormatter:
+    def test_includes_extra_fields(self):
+        line = JsonFormatter().format(_record("通知送信完了", sample_key="reminder.sent"))
+        entry = json.loads(line)
+        assert entry["message"] == "通知送信完了"
+        assert entry["level"] == "INFO"
+        assert entry["logger"] == "src.test"
+        assert entry["sample_key"] == "reminder.sent"
+
+
+class TestConfigureLogging:
+    def test_existing_loggers_are_switched_to_queue(self, queued_logging, capsys):
+        log = get_logger("src.test_logger_switch")
+        queue_handler = configure_logging(json_output=True)
+        assert shared_handler() is queue_handler
+        assert queue_handler in log.handlers
+
+        log.info("キュー経由")
+        stop_logging()
+
+        entry = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+        assert entry["message"] == "キュー経由"
+        # 停止後は直接出力に戻る
+        assert queue_handler not in log.handlers
+        assert shared_handler() in log.handlers
+
+    def test_sampling_applies_to_keyed_messages(self, queued_logging, capsys):
+        log = get_logger("src.test_logger_sampling")
+        configure_logging(sample_every=5)
+        for i in range(10):
+            log.info(f"通知送信完了: {i}", extra={"sample_key": "reminder.sent"})
+        log.info("通常のログ")
+        stop_logging()
+
+        lines = capsys.readouterr().out.splitlines()
+        assert sum("通知送信完了" in line for line in lines) == 2
+        assert any("通常のログ" in line for line in lines)
+
+    def test_exception_is_kept_in_json_output(self, queued_logging, capsys):
+        log = get_logger("src.test_logger_exception")
+        configure_logging(json_output=True)
+        try:
+            raise ValueError("壊れた")
+        except ValueError:
+            log.exception("処理失敗")
+        stop_logging()
+
+        entry = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+        assert entry["message"] == "処理失敗"
+        assert "Traceback" in entry["exc"]
+        assert "ValueError: 壊れた" in entry["exc"]
+
+    def test_exception_is_appended_in_text_output(self, queued_logging, capsys):
+        log = get_logger("src.test_logger_exception_text")
+        configure_logging()
+        try:
+            raise ValueError("壊れた")
+        except ValueError:
+            log.exception("処理失敗")
+        stop_logging()
+
+        out = capsys.readouterr().out
+        assert "処理失敗" in out
+        assert out.count("ValueError: 壊れた") == 1
@@ -0,0 +1,58 @@
+"""LoopLagMonitor テスト"""
+
+import asyncio
+import logging
+import time
+
+import pytest
+
+from src.utils import metrics
+from src.utils.loop_monitor import LoopLagMonitor
+
+
+def blocking_call(seconds: float) -> None:
+    """ループを止める同期処理（スタックに名前が出ることを確認する）。"""
+    time.sleep(seconds)
+
+
+class TestLoopLagMonitor:
+    @pytest.mark.asyncio
+    async def test_records_lag_samples(self):
+        before = metrics.EVENT_LOOP_LAG.snapshot()[2]
+        monitor = LoopLagMonitor(interval=0.01, threshold=0.5)
+        monitor.start()
+        try:
+            await asyncio.sleep(0.1)
+        finally:
+            await monitor.stop()
+        assert metrics.EVENT_LOOP_LAG.snapshot()[2] > before
+        assert not monitor.running
+
+    @pytest.mark.asyncio
+    async def test_logs_stack_of_blocking_call(self, caplog):
+        stalls_before = metrics.EVENT_LOOP_STALLS.get()
+        monitor = LoopLagMonitor(interval=0.01, threshold=0.05)
+        monitor.start()
+        try:
+            await asyncio.sleep(0.03)
+            with caplog.at_level(logging.WARNING, logger="src.utils.loop_monitor"):
+                blocking_call(0.3)
+                await asyncio.sleep(0.05)
+        finally:
+            await monitor.stop()
+
+        dumps = [r.getMessage() for r in caplog.records if "止まっています" in r.getMessage()]
+        assert len(dumps) == 1
+        assert "blocking_call" in dumps[0]
+        assert metrics.EVENT_LOOP_STALLS.get() == stalls_before + 1
+
+    @pytest.mark.asyncio
+    async def test_quiet_when_loop_is_healthy(self, caplog):
+        monitor = LoopLagMonitor(interval=0.01, threshold=0.2)
+        with caplog.at_level(logging.WARNING, logger="src.utils.loop_monitor"):
+            monitor.start()
+            try:
+                await asyncio.sleep(0.1)
+            finally:
+                await monitor.stop()
+        assert not caplog.records
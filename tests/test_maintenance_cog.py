@@ -0,0 +1,49 @@
+"""MaintenanceCog テスト"""
+
+import sqlite3
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.cogs.maintenance import MaintenanceCog
+
+
+class TestMaintenanceCog:
+    @pytest.mark.asyncio
+    async def test_checkpoint_loop_runs_checkpoint(self, tmp_db):
+        tmp_db.checkpoint = MagicMock(return_value=(0, 3, 3))
+        cog = MaintenanceCog(MagicMock(), tmp_db)
+
+        await cog.checkpoint_loop()
+
+        tmp_db.checkpoint.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_checkpoint_error_does_not_escape(self, tmp_db):
+        tmp_db.checkpoint = MagicMock(side_effect=sqlite3.OperationalError("database is locked"))
+        cog = MaintenanceCog(MagicMock(), tmp_db)
+
+        # 例外が外に出ると tasks.loop が止まる
+        await cog.checkpoint_loop()
+
+        tmp_db.checkpoint.assert_called_once()
+
+    def test_interval_is_configurable(self, tmp_db):
+        cog = MaintenanceCog(MagicMock(), tmp_db, checkpoint_interval=42)
+        assert cog.checkpoint_loop.seconds == 42
+
+    @pytest.mark.asyncio
+    async def test_not_started_without_wal(self, tmp_db):
+        cog = MaintenanceCog(MagicMock(), tmp_db)
+        await cog.cog_load()
+        assert not cog.checkpoint_loop.is_running()
+
+    @pytest.mark.asyncio
+    async def test_retention_loop_runs_retention(self, tmp_db):
+        retention = MagicMock()
+        retention.run = AsyncMock()
+        cog = MaintenanceCog(MagicMock(), tmp_db, retention=retention)
+
+        await cog.retention_loop()
+
+        retention.run.assert_awaited_once()
@@ -0,0 +1,107 @@
+"""メトリクス テスト"""
+
+import threading
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.utils import metrics
+from src.utils.metrics import Registry
+
+
+class TestRegistry:
+    def test_counter_render(self):
+        registry = Registry()
+        counter = registry.counter("jobs_total", "処理件数", ("outcome",))
+        counter.labels(outcome="ok").inc()
+        counter.labels(outcome="ok").inc(2)
+        counter.labels(outcome='a"b').inc()
+
+        text = registry.render()
+        assert "# HELP jobs_total 処理件数" in text
+        assert "# TYPE jobs_total counter" in text
+        assert 'jobs_total{outcome="ok"} 3' in text
+        assert 'jobs_total{outcome="a\\"b"} 1' in text
+
+    def test_labels_must_match(self):
+        registry = Registry()
+        counter = registry.counter("jobs_total", "処理件数", ("outcome",))
+        with pytest.raises(ValueError):
+            counter.labels(status="ok")
+        with pytest.raises(ValueError):
+            counter.inc()
+
+    def test_duplicate_name_rejected(self):
+        registry = Registry()
+        registry.counter("jobs_total", "処理件数")
+        with pytest.raises(ValueError):
+            registry.gauge("jobs_total", "重複")
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = Registry()
+        histogram = registry.histogram("latency_seconds", "遅延", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+
+        cumulative, total, count = histogram.snapshot()
+        assert cumulative == [2, 3, 4]
+        assert total == pytest.approx(2.65)
+        assert count == 4
+
+        text = registry.render()
+        assert 'latency_seconds_bucket{le="0.1"} 2' in text
+        assert 'latency_seconds_bucket{le="1"} 3' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+        assert "latency_seconds_count 4" in text
+
+    def test_gauge_function(self):
+        registry = Registry()
+        gauge = registry.gauge("depth", "待ち件数")
+        items = [1, 2, 3]
+        gauge.set_function(lambda: len(items))
+        assert "depth 3" in registry.render()
+        items.clear()
+        assert "depth 0" in registry.render()
+
+    def test_increments_from_many_threads_are_not_lost(self):
+        registry = Registry()
+        counter = registry.counter("hits_total", "回数")
+        histogram = registry.histogram("work_seconds", "時間")
+
+        def work():
+            for _ in range(10_000):
+                counter.inc()
+                histogram.observe(0.01)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert counter.get() == 80_000
+        assert histogram.snapshot()[2] == 80_000
+
+
+class TestMetricsEndpoint:
+    @pytest.mark.asyncio
+    async def test_metrics_handler(self):
+        metrics.NOTIFICATIONS.labels(outcome="sent").inc()
+        app = web.Application()
+        app.router.add_get("/metrics", metrics.metrics_handler)
+
+        async with TestClient(TestServer(app)) as client:
+            resp = await client.get("/metrics")
+            assert resp.status == 200
+            assert resp.headers["Content-Type"] == metrics.CONTENT_TYPE
+            text = await resp.text()
+
+        assert 'ebibot_notifications_total{outcome="sent"}' in text
+        assert "# TYPE ebibot_db_query_seconds histogram" in text
+
+    @pytest.mark.asyncio
+    async def test_db_queries_are_timed(self, async_repo):
+        before = metrics.DB_QUERY_DURATION.labels(op="create").snapshot()[2]
+        await async_repo.create(message="計測", scheduled_at="2099-01-01T00:00:00")
+        assert metrics.DB_QUERY_DURATION.labels(op="create").snapshot()[2] == before + 1
@@ -1,13 +1,18 @@
 """ReminderCog テスト"""
 
+import asyncio
+import time
 from datetime import datetime, timedelta
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import discord
 import pytest
 
 from src.cogs.reminder import ReminderCog
 from src.database.models import Database
-from src.database.repository import NotificationRepository
+from src.database.repository import AsyncNotificationRepository, NotificationRepository
+from src.utils import metrics
+from src.utils.retry import RetryPolicy
 
 
 @pytest.fixture
@@ -19,13 +24,14 @@ def mock_bot():
     mock_channel = AsyncMock()
     mock_channel.send = AsyncMock()
     bot.get_channel = MagicMock(return_value=mock_channel)
+    bot.resolve_channel = AsyncMock(return_value=mock_channel)
     bot.fetch_channel = AsyncMock(return_value=mock_channel)
     return bot
 
 
 @pytest.fixture
-def cog(mock_bot, repo):
-    return ReminderCog(mock_bot, repo)
+def cog(mock_bot, async_repo):
+    return ReminderCog(mock_bot, async_repo)
 
 
 class TestCheckScheduled:
@@ -67,3 +73,267 @@ class TestCheckScheduled:
 
         pending = repo.get_all_pending()
         assert len(pending) == 0
+
+
+class TestSchedule:
+    @pytest.mark.asyncio
+    async def test_load_schedule_from_pending(self, cog, repo):
+        future = (datetime.now() + timedelta(hours=2)).strftime("%Y-%m-%dT%H:%M:%S")
+        row_id = repo.create(message="未来の通知", scheduled_at=future)
+
+        await cog._load_schedule()
+
+        assert len(cog._scheduler) == 1
+        assert cog._scheduler.next_deadline() == datetime.fromisoformat(future)
+        assert row_id == cog._scheduler.pop_due(datetime.fromisoformat(future))[0]
+
+    @pytest.mark.asyncio
+    async def test_check_scheduled_pops_due_deadlines(self, cog, repo, mock_bot):
+        past = (datetime.now() - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        repo.create(message="送信テスト", scheduled_at=past)
+        await cog._load_schedule()
+
+        await cog.check_scheduled()
+
+        assert len(cog._scheduler) == 0
+        mock_bot.get_channel(123456789).send.assert_called_once()
+
+
+class SlowChannel:
+    """sendのたびに delay 秒かかるフェイクチャンネル。"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.sent: list[str] = []
+
+    async def send(self, embed=None, **kwargs):
+        await asyncio.sleep(self.delay)
+        self.sent.append(embed.description)
+
+
+class TestConcurrentDelivery:
+    @pytest.mark.asyncio
+    async def test_drain_time_scales_with_slowest_channel(self, repo, async_repo, mock_bot):
+        channels = {1: SlowChannel(0.2), 2: SlowChannel(0.1), 3: SlowChannel(0.1)}
+        mock_bot.resolve_channel = AsyncMock(side_effect=channels.get)
+        cog = ReminderCog(mock_bot, async_repo, max_concurrent_sends=10)
+
+        base = datetime.now() - timedelta(minutes=5)
+        for i in range(2):
+            for channel_id in channels:
+                at = (base + timedelta(seconds=i)).strftime("%Y-%m-%dT%H:%M:%S")
+                repo.create(message=f"ch{channel_id}-{i}", scheduled_at=at, channel_id=channel_id)
+
+        start = time.monotonic()
+        await cog.check_scheduled()
+        elapsed = time.monotonic() - start
+
+        # 直列なら (0.2 + 0.1 + 0.1) * 2 = 0.8秒、並行なら最も遅いチャンネルの 0.4秒
+        assert elapsed < 0.6
+        for channel_id, channel in channels.items():
+            assert channel.sent == [f"ch{channel_id}-0", f"ch{channel_id}-1"]
+        assert repo.get_all_pending() == []
+
+    @pytest.mark.asyncio
+    async def test_concurrency_cap(self, repo, async_repo, mock_bot):
+        channels = {i: SlowChannel(0.1) for i in range(1, 5)}
+        mock_bot.resolve_channel = AsyncMock(side_effect=channels.get)
+        cog = ReminderCog(mock_bot, async_repo, max_concurrent_sends=1)
+
+        past = (datetime.now() - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        for channel_id in channels:
+            repo.create(message=f"ch{channel_id}", scheduled_at=past, channel_id=channel_id)
+
+        start = time.monotonic()
+        await cog.check_scheduled()
+
+        assert time.monotonic() - start >= 0.35
+
+
+class TestCoalesceEmbeds:
+    @pytest.mark.asyncio
+    async def test_packs_up_to_ten_embeds_per_message(self, repo, async_repo, mock_bot):
+        cog = ReminderCog(mock_bot, async_repo, coalesce_embeds=True)
+        past = (datetime.now() - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        for i in range(12):
+            repo.create(message=f"まとめ{i}", scheduled_at=past)
+
+        await cog.check_scheduled()
+
+        channel = mock_bot.get_channel(123456789)
+        assert channel.send.call_count == 2
+        first, second = channel.send.call_args_list
+        assert len(first.kwargs["embeds"]) == 10
+        assert [e.description for e in second.kwargs["embeds"]] == ["まとめ10", "まとめ11"]
+        assert repo.get_all_pending() == []
+
+    @pytest.mark.asyncio
+    async def test_respects_total_character_limit(self, repo, async_repo, mock_bot):
+        cog = ReminderCog(mock_bot, async_repo, coalesce_embeds=True)
+        past = (datetime.now() - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        for i in range(3):
+            repo.create(message="あ" * 2500, scheduled_at=past)
+
+        await cog.check_scheduled()
+
+        channel = mock_bot.get_channel(123456789)
+        assert channel.send.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_failure_marks_every_row_in_message(self, repo, async_repo, mock_bot, tmp_db):
+        cog = ReminderCog(mock_bot, async_repo, coalesce_embeds=True)
+        past = (datetime.now() - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        ids = [repo.create(message=f"失敗{i}", scheduled_at=past) for i in range(3)]
+        mock_bot.get_channel(123456789).send = AsyncMock(side_effect=Exception("送信エラー"))
+
+        await cog.check_scheduled()
+
+        statuses = [
+            row["status"]
+            for row in tmp_db.connection.execute(
+                "SELECT status FROM scheduled_notifications ORDER BY id"
+            )
+        ]
+        assert statuses == ["failed"] * len(ids)
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_default(self, cog, repo, mock_bot):
+        past = (datetime.now() - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        for i in range(3):
+            repo.create(message=f"個別{i}", scheduled_at=past)
+
+        await cog.check_scheduled()
+
+        assert mock_bot.get_channel(123456789).send.call_count == 3
+
+
+class TestLeaseClaiming:
+    @pytest.mark.asyncio
+    async def test_two_instances_send_each_row_once(self, repo, tmp_db, mock_bot):
+        """同じDBを見る2つのCogが同時に動いても、1件につき1回だけ送る。"""
+        past = (datetime.now() - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        for i in range(30):
+            repo.create(message=f"重複なし{i}", scheduled_at=past)
+
+        other_db = Database(db_path=tmp_db.db_path)
+        other_db.connect()
+        try:
+            cogs = [
+                ReminderCog(mock_bot, AsyncNotificationRepository(tmp_db),
+                            claim_batch_size=4, worker_id="a"),
+                ReminderCog(mock_bot, AsyncNotificationRepository(other_db),
+                            claim_batch_size=4, worker_id="b"),
+            ]
+            await asyncio.gather(*(cog.check_scheduled() for cog in cogs))
+        finally:
+            other_db.close()
+
+        sent = [
+            call.kwargs["embed"].description
+            for call in mock_bot.get_channel(123456789).send.call_args_list
+        ]
+        assert len(sent) == 30
+        assert len(set(sent)) == 30
+        assert repo.get_all_pending() == []
+
+    @pytest.mark.asyncio
+    async def test_recovers_rows_from_crashed_worker(self, cog, repo, mock_bot):
+        past = (datetime.now() - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        repo.create(message="取り残し", scheduled_at=past)
+        expired_ms = int((datetime.now() - timedelta(minutes=10)).timestamp() * 1000)
+        repo.claim_due(10, 60, "crashed", now_ms=expired_ms)
+
+        await cog.check_scheduled()
+
+        mock_bot.get_channel(123456789).send.assert_called_once()
+        assert repo.next_lease_expiry_ms() is None
+
+    @pytest.mark.asyncio
+    async def test_wakes_up_when_foreign_lease_expires(self, cog, repo):
+        past = (datetime.now() - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        repo.create(message="他のワーカーが送信中", scheduled_at=past)
+        repo.claim_due(10, 60, "other")
+
+        await cog.check_scheduled()
+
+        expires_ms = repo.next_lease_expiry_ms()
+        assert cog._scheduler.next_deadline() == datetime.fromtimestamp(expires_ms / 1000)
+
+
+class TestRetryOnFailure:
+    @staticmethod
+    def _server_error() -> discord.HTTPException:
+        return discord.HTTPException(MagicMock(status=503, reason="Service Unavailable"), "error")
+
+    @pytest.mark.asyncio
+    async def test_transient_error_is_retried_with_backoff(self, cog, repo, mock_bot):
+        past = (datetime.now() - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        row_id = repo.create(message="一時エラー", scheduled_at=past)
+        mock_bot.get_channel(123456789).send = AsyncMock(side_effect=self._server_error())
+
+        before = datetime.now()
+        await cog.check_scheduled()
+
+        [pending] = repo.get_all_pending()
+        assert pending["id"] == row_id
+        assert pending["attempts"] == 1
+        next_attempt = datetime.fromtimestamp(pending["next_attempt_at_ms"] / 1000)
+        assert next_attempt >= before + timedelta(seconds=cog.retry_policy.base_delay / 2)
+        assert abs(cog._scheduler.next_deadline() - next_attempt) < timedelta(milliseconds=1)
+
+    @pytest.mark.asyncio
+    async def test_dead_letter_after_max_attempts(self, mock_bot, repo, async_repo):
+        cog = ReminderCog(
+            mock_bot, async_repo, retry_policy=RetryPolicy(max_attempts=2, base_delay=0.0)
+        )
+        past = (datetime.now() - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        row_id = repo.create(message="ずっと失敗", scheduled_at=past)
+        mock_bot.get_channel(123456789).send = AsyncMock(side_effect=self._server_error())
+
+        await cog.check_scheduled()
+        assert [row["id"] for row in repo.get_all_pending()] == [row_id]
+        await cog.check_scheduled()
+
+        assert repo.get_all_pending() == []
+        [dead] = repo.list_dead_letters()
+        assert dead["id"] == row_id
+        assert dead["attempts"] == 2
+
+    @pytest.mark.asyncio
+    async def test_replay_dead_letter_sends_again(self, cog, repo, mock_bot):
+        past = (datetime.now() - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        row_id = repo.create(message="再送", scheduled_at=past)
+        repo.claim_due(10, 60, "worker-a")
+        repo.record_outcomes([], [], dead=[(row_id, "503")])
+
+        assert await cog.replay_dead_letter(row_id) is True
+        await cog.check_scheduled()
+
+        mock_bot.get_channel(123456789).send.assert_called_once()
+        assert repo.list_dead_letters() == []
+
+
+class TestMetrics:
+    @pytest.mark.asyncio
+    async def test_records_outcomes_and_lateness(self, cog, repo, mock_bot):
+        sent = metrics.NOTIFICATIONS.labels(outcome="sent")
+        failed = metrics.NOTIFICATIONS.labels(outcome="failed")
+        sent_before, failed_before = sent.get(), failed.get()
+        lateness_before = metrics.NOTIFICATION_LATENESS.snapshot()
+        runs_before = metrics.CHECK_SCHEDULED_DURATION.snapshot()[2]
+
+        past = (datetime.now() - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        repo.create(message="成功", scheduled_at=past)
+        await cog.check_scheduled()
+
+        mock_bot.resolve_channel = AsyncMock(return_value=None)
+        repo.create(message="失敗", scheduled_at=past)
+        await cog.check_scheduled()
+
+        assert sent.get() == sent_before + 1
+        assert failed.get() == failed_before + 1
+        lateness = metrics.NOTIFICATION_LATENESS.snapshot()
+        assert lateness[2] == lateness_before[2] + 1
+        # 1分前の通知なので、遅れは60秒前後
+        assert 55 < lateness[1] - lateness_before[1] < 120
+        assert metrics.CHECK_SCHEDULED_DURATION.snapshot()[2] == runs_before + 2
@@ -1,7 +1,15 @@
 """NotificationRepository テスト"""
 
+import asyncio
+import sqlite3
+import threading
 from datetime import datetime, timedelta
 
+import pytest
+
+from src.database.models import Database
+from src.database.repository import NotificationRepository, NotificationStatusBuffer
+
 
 class TestNotificationRepository:
     def test_create_and_get_pending(self, repo):
@@ -81,3 +89,383 @@ class TestNotificationRepository:
         assert pending[0]["color"] == 0xFF0000
         assert pending[0]["source"] == "slash_command"
         assert pending[0]["channel_id"] == 123456789
+
+
+class TestAsyncNotificationRepository:
+    @pytest.mark.asyncio
+    async def test_create_and_get_pending(self, async_repo):
+        future = (datetime.now() + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        row_id = await async_repo.create(message="非同期テスト", scheduled_at=future, channel_id=42)
+
+        pending = await async_repo.get_all_pending()
+        assert len(pending) == 1
+        assert pending[0]["id"] == row_id
+        assert pending[0]["channel_id"] == 42
+
+    @pytest.mark.asyncio
+    async def test_runs_on_db_thread(self, async_repo, tmp_db):
+        thread_name = await tmp_db.run(lambda: threading.current_thread().name)
+        assert thread_name.startswith("ebibot-db")
+
+    @pytest.mark.asyncio
+    async def test_mark_and_cancel(self, async_repo):
+        future = (datetime.now() + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        sent_id = await async_repo.create(message="送信", scheduled_at=future)
+        failed_id = await async_repo.create(message="失敗", scheduled_at=future)
+        cancel_id = await async_repo.create(message="キャンセル", scheduled_at=future)
+
+        await async_repo.mark_sent(sent_id)
+        await async_repo.mark_failed(failed_id, "エラー")
+        assert await async_repo.cancel(cancel_id) is True
+        assert await async_repo.cancel(sent_id) is False
+
+        assert await async_repo.get_all_pending() == []
+
+
+class TestRecordOutcomes:
+    def test_record_outcomes_in_one_transaction(self, repo, tmp_db):
+        future = (datetime.now() + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        ids = [repo.create(message=f"通知{i}", scheduled_at=future) for i in range(4)]
+
+        repo.record_outcomes(sent=ids[:3], failed=[(ids[3], "エラー")])
+
+        rows = {
+            row["id"]: dict(row)
+            for row in tmp_db.connection.execute("SELECT * FROM scheduled_notifications")
+        }
+        assert [rows[i]["status"] for i in ids] == ["sent", "sent", "sent", "failed"]
+        assert rows[ids[0]]["sent_at"] is not None
+        assert rows[ids[3]]["error_message"] == "エラー"
+
+
+class TestNotificationStatusBuffer:
+    @pytest.mark.asyncio
+    async def test_flushes_when_batch_is_full(self, repo, async_repo):
+        future = (datetime.now() + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        ids = [repo.create(message=f"通知{i}", scheduled_at=future) for i in range(3)]
+        buffer = NotificationStatusBuffer(async_repo, max_batch=2, flush_interval=60)
+
+        await buffer.sent(ids[0])
+        assert len(repo.get_all_pending()) == 3
+
+        await buffer.failed(ids[1], "エラー")
+        assert len(buffer) == 0
+        assert [n["id"] for n in repo.get_all_pending()] == [ids[2]]
+
+        await buffer.sent(ids[2])
+        await buffer.flush()
+        assert repo.get_all_pending() == []
+
+    @pytest.mark.asyncio
+    async def test_flushes_after_interval(self, repo, async_repo):
+        future = (datetime.now() + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        ids = [repo.create(message=f"通知{i}", scheduled_at=future) for i in range(2)]
+        buffer = NotificationStatusBuffer(async_repo, max_batch=100, flush_interval=0)
+
+        await buffer.sent(ids[0])
+        assert [n["id"] for n in repo.get_all_pending()] == [ids[1]]
+
+    @pytest.mark.asyncio
+    async def test_flushes_on_timer_without_further_outcomes(self, repo, async_repo):
+        future = (datetime.now() + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        ids = [repo.create(message=f"通知{i}", scheduled_at=future) for i in range(2)]
+        buffer = NotificationStatusBuffer(async_repo, max_batch=100, flush_interval=0.05)
+
+        await buffer.sent(ids[0])
+        assert len(repo.get_all_pending()) == 2
+
+        # 後続の結果が来なくても flush_interval 後に書き込まれる
+        await asyncio.sleep(0.2)
+        assert len(buffer) == 0
+        assert [n["id"] for n in repo.get_all_pending()] == [ids[1]]
+
+
+    @pytest.mark.asyncio
+    async def test_keeps_outcomes_when_write_fails(self, repo, async_repo, monkeypatch):
+        future = (datetime.now() + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        ids = [repo.create(message=f"通知{i}", scheduled_at=future) for i in range(2)]
+        buffer = NotificationStatusBuffer(async_repo, max_batch=100, flush_interval=60)
+        record_outcomes = async_repo.record_outcomes
+
+        async def broken(*args, **kwargs):
+            raise sqlite3.OperationalError("database is locked")
+
+        await buffer.sent(ids[0])
+        await buffer.failed(ids[1], "エラー")
+        monkeypatch.setattr(async_repo, "record_outcomes", broken)
+        with pytest.raises(sqlite3.OperationalError):
+            await buffer.flush()
+        assert len(buffer) == 2
+
+        monkeypatch.setattr(async_repo, "record_outcomes", record_outcomes)
+        await buffer.flush()
+        assert len(buffer) == 0
+        assert repo.get_all_pending() == []
+
+    @pytest.mark.asyncio
+    async def test_timer_retries_failed_write(self, repo, async_repo, monkeypatch):
+        future = (datetime.now() + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        row_id = repo.create(message="通知", scheduled_at=future)
+        buffer = NotificationStatusBuffer(async_repo, max_batch=100, flush_interval=0.05)
+        record_outcomes = async_repo.record_outcomes
+        calls = 0
+
+        async def flaky(*args, **kwargs):
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise sqlite3.OperationalError("database is locked")
+            return await record_outcomes(*args, **kwargs)
+
+        monkeypatch.setattr(async_repo, "record_outcomes", flaky)
+        await buffer.sent(row_id)
+
+        # 1回目のタイマーは失敗し、次のタイマーで書き込まれる
+        await asyncio.sleep(0.3)
+        assert calls == 2
+        assert len(buffer) == 0
+        assert repo.get_all_pending() == []
+
+    @pytest.mark.asyncio
+    async def test_reports_rows_whose_lease_was_lost(self, repo, async_repo):
+        now_ms = int(datetime.now().timestamp() * 1000)
+        past = (datetime.now() - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        ids = [repo.create(message=f"通知{i}", scheduled_at=past) for i in range(2)]
+        repo.claim_due(10, 30, "worker-a", now_ms)
+        repo.db.connection.execute(
+            "UPDATE scheduled_notifications SET lease_owner = 'worker-b' WHERE id = ?", (ids[1],)
+        )
+        repo.db.connection.commit()
+        buffer = NotificationStatusBuffer(async_repo, worker_id="worker-a")
+
+        await buffer.sent(ids[0])
+        await buffer.sent(ids[1])
+        await buffer.flush()
+
+        assert buffer.lost == [ids[1]]
+        statuses = dict(repo.db.connection.execute("SELECT id, status FROM scheduled_notifications"))
+        assert statuses == {ids[0]: "sent", ids[1]: "sending"}
+
+
+class TestEpochSchedule:
+    def test_create_stores_epoch_ms(self, repo):
+        at = "2026-02-13T14:30:00"
+        repo.create(message="エポック", scheduled_at=at)
+
+        pending = repo.get_all_pending()
+        assert pending[0]["scheduled_at_ms"] == int(datetime.fromisoformat(at).timestamp() * 1000)
+
+    def test_get_due_uses_epoch_and_limit(self, repo):
+        now = datetime.now()
+        ids = [
+            repo.create(
+                message=f"通知{i}",
+                scheduled_at=(now - timedelta(minutes=10 - i)).strftime("%Y-%m-%dT%H:%M:%S"),
+            )
+            for i in range(3)
+        ]
+        repo.create(message="未来", scheduled_at=(now + timedelta(hours=1)).isoformat())
+
+        now_ms = int(now.timestamp() * 1000)
+        assert [n["id"] for n in repo.get_due(now_ms)] == ids
+        assert [n["id"] for n in repo.get_due(now_ms, limit=2)] == ids[:2]
+
+    def test_due_query_uses_partial_index(self, repo, tmp_db):
+        plan = " ".join(
+            str(row[3])
+            for row in tmp_db.connection.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM scheduled_notifications "
+                "WHERE status = 'pending' AND scheduled_at_ms <= ? ORDER BY scheduled_at_ms",
+                (0,),
+            )
+        )
+        assert "idx_notif_pending_due" in plan
+
+
+class TestClaimDue:
+    def test_claims_due_rows_once(self, repo):
+        now_ms = int(datetime.now().timestamp() * 1000)
+        past = (datetime.now() - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        future = (datetime.now() + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        due_ids = [repo.create(message=f"期限{i}", scheduled_at=past) for i in range(3)]
+        repo.create(message="未来", scheduled_at=future)
+
+        claimed = repo.claim_due(10, 60, "worker-a", now_ms)
+
+        assert [row["id"] for row in claimed] == due_ids
+        assert all(row["status"] == "sending" for row in claimed)
+        assert all(row["lease_owner"] == "worker-a" for row in claimed)
+        assert all(row["lease_expires_ms"] == now_ms + 60_000 for row in claimed)
+        assert repo.claim_due(10, 60, "worker-b", now_ms) == []
+        assert repo.next_lease_expiry_ms() == now_ms + 60_000
+
+    def test_respects_limit(self, repo):
+        past = (datetime.now() - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        for i in range(5):
+            repo.create(message=f"期限{i}", scheduled_at=past)
+
+        assert len(repo.claim_due(2, 60, "worker-a")) == 2
+        assert len(repo.claim_due(10, 60, "worker-a")) == 3
+
+    def test_concurrent_workers_never_share_rows(self, tmp_db):
+        """別々の接続から同時に確保しても、同じ行を2回取らない。"""
+        past = (datetime.now() - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        seed = NotificationRepository(tmp_db)
+        for i in range(200):
+            seed.create(message=f"競合{i}", scheduled_at=past)
+
+        claimed: list[int] = []
+        lock = threading.Lock()
+
+        def worker(name: str) -> None:
+            db = Database(db_path=tmp_db.db_path)
+            db.connect()
+            repo = NotificationRepository(db)
+            try:
+                while rows := repo.claim_due(7, 60, name):
+                    with lock:
+                        claimed.extend(row["id"] for row in rows)
+            finally:
+                db.close()
+
+        threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(claimed) == 200
+        assert len(set(claimed)) == 200
+
+    def test_claim_query_reads_index_in_order(self, tmp_db):
+        """試行回数→期限の順序を索引で読み、未処理行が多くても全件ソートしない。"""
+        plan = " ".join(
+            str(row[3])
+            for row in tmp_db.connection.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM scheduled_notifications "
+                "WHERE status = 'pending' AND scheduled_at_ms <= ? "
+                "AND (next_attempt_at_ms IS NULL OR next_attempt_at_ms <= ?) "
+                "ORDER BY attempts, scheduled_at_ms LIMIT ?",
+                (0, 0, 100),
+            )
+        )
+        assert "idx_notif_pending_claim" in plan
+        assert "TEMP B-TREE" not in plan
+
+    def test_recover_expired_leases(self, repo):
+        now_ms = int(datetime.now().timestamp() * 1000)
+        past = (datetime.now() - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        row_id = repo.create(message="落ちたワーカー", scheduled_at=past)
+        repo.claim_due(10, 30, "crashed", now_ms)
+
+        assert repo.recover_expired_leases(now_ms + 29_000) == 0
+        assert repo.recover_expired_leases(now_ms + 30_000) == 1
+
+        pending = repo.get_all_pending()
+        assert [row["id"] for row in pending] == [row_id]
+        assert pending[0]["lease_owner"] is None
+        assert repo.next_lease_expiry_ms() is None
+
+    def test_record_outcomes_clears_lease(self, repo):
+        past = (datetime.now() - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        ok = repo.create(message="成功", scheduled_at=past)
+        ng = repo.create(message="失敗", scheduled_at=past)
+        repo.claim_due(10, 60, "worker-a")
+
+        repo.record_outcomes([ok], [(ng, "エラー")])
+
+        rows = {
+            row["id"]: row
+            for row in repo.db.connection.execute("SELECT * FROM scheduled_notifications")
+        }
+        assert rows[ok]["status"] == "sent"
+        assert rows[ng]["status"] == "failed"
+        assert all(row["lease_owner"] is None for row in rows.values())
+        assert repo.next_lease_expiry_ms() is None
+
+    def test_record_outcomes_skips_rows_whose_lease_was_lost(self, repo):
+        now_ms = int(datetime.now().timestamp() * 1000)
+        past = (datetime.now() - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        row_id = repo.create(message="取り直された通知", scheduled_at=past)
+        repo.claim_due(10, 30, "worker-a", now_ms)
+        # worker-a のリースが切れ、worker-b が確保し直した
+        repo.recover_expired_leases(now_ms + 30_000)
+        repo.claim_due(10, 30, "worker-b", now_ms + 30_000)
+
+        lost = repo.record_outcomes([row_id], [], worker_id="worker-a")
+
+        row = repo.db.connection.execute(
+            "SELECT * FROM scheduled_notifications WHERE id = ?", (row_id,)
+        ).fetchone()
+        assert lost == [row_id]
+        assert row["status"] == "sending"
+        assert row["lease_owner"] == "worker-b"
+
+        assert repo.record_outcomes([row_id], [], worker_id="worker-b") == []
+        assert repo.db.connection.execute(
+            "SELECT status FROM scheduled_notifications WHERE id = ?", (row_id,)
+        ).fetchone()[0] == "sent"
+
+    def test_lost_lease_is_not_flipped_back_to_pending(self, repo):
+        now_ms = int(datetime.now().timestamp() * 1000)
+        past = (datetime.now() - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        row_id = repo.create(message="取り直された通知", scheduled_at=past)
+        repo.claim_due(10, 30, "worker-a", now_ms)
+        repo.recover_expired_leases(now_ms + 30_000)
+
+        lost = repo.record_outcomes(
+            [], [], retries=[(row_id, "503", now_ms + 60_000)], worker_id="worker-a"
+        )
+
+        assert lost == [row_id]
+        [pending] = repo.get_all_pending()
+        assert pending["next_attempt_at_ms"] is None
+
+
+class TestRetries:
+    def test_retry_waits_for_next_attempt(self, repo):
+        now_ms = int(datetime.now().timestamp() * 1000)
+        past = (datetime.now() - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        row_id = repo.create(message="再試行", scheduled_at=past)
+        [claimed] = repo.claim_due(10, 60, "worker-a", now_ms)
+        assert claimed["attempts"] == 1
+
+        repo.record_outcomes([], [], retries=[(row_id, "503", now_ms + 30_000)])
+
+        assert repo.claim_due(10, 60, "worker-a", now_ms) == []
+        assert repo.get_due(now_ms) == []
+        [retried] = repo.claim_due(10, 60, "worker-a", now_ms + 30_000)
+        assert retried["id"] == row_id
+        assert retried["attempts"] == 2
+        assert retried["error_message"] == "503"
+
+    def test_fresh_rows_are_claimed_before_retries(self, repo):
+        now_ms = int(datetime.now().timestamp() * 1000)
+        old = (datetime.now() - timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        past = (datetime.now() - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        retrying = repo.create(message="失敗続き", scheduled_at=old)
+        repo.claim_due(10, 60, "worker-a", now_ms)
+        repo.record_outcomes([], [], retries=[(retrying, "503", now_ms)])
+        fresh = repo.create(message="新しい通知", scheduled_at=past)
+
+        [first] = repo.claim_due(1, 60, "worker-a", now_ms)
+
+        assert first["id"] == fresh
+
+    def test_dead_letters_can_be_listed_and_replayed(self, repo):
+        past = (datetime.now() - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S")
+        row_id = repo.create(message="デッドレター", scheduled_at=past)
+        repo.claim_due(10, 60, "worker-a")
+        repo.record_outcomes([], [], dead=[(row_id, "503")])
+
+        dead = repo.list_dead_letters()
+        assert [row["id"] for row in dead] == [row_id]
+        assert dead[0]["error_message"] == "503"
+        assert repo.get_all_pending() == []
+
+        assert repo.replay_dead_letter(row_id) is True
+        assert repo.replay_dead_letter(row_id) is False
+        assert repo.list_dead_letters() == []
+        [pending] = repo.get_all_pending()
+        assert pending["attempts"] == 0
+        assert pending["next_attempt_at_ms"] is None
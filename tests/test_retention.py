@@ -0,0 +1,132 @@
+"""NotificationRetention テスト"""
+
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.database.retention import NotificationRetention
+
+
+def _age(tmp_db, notification_id: int, days: int) -> None:
+    old = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+    tmp_db.connection.execute(
+        "UPDATE scheduled_notifications SET created_at = ?, sent_at = CASE WHEN sent_at IS NULL THEN NULL ELSE ? END WHERE id = ?",
+        (old, old, notification_id),
+    )
+    tmp_db.connection.commit()
+
+
+@pytest.fixture
+def retention(tmp_db, tmp_path):
+    return NotificationRetention(
+        tmp_db,
+        max_age_days=30,
+        archive_path=str(tmp_path / "archive-%Y%m.db"),
+        batch_size=2,
+        pause_seconds=0,
+    )
+
+
+class TestNotificationRetention:
+    @pytest.mark.asyncio
+    async def test_archives_old_terminal_rows(self, repo, tmp_db, retention, tmp_path):
+        at = "2026-01-01T00:00:00"
+        old_sent = repo.create(message="古い送信済み", scheduled_at=at)
+        old_failed = repo.create(message="古い失敗", scheduled_at=at)
+        old_cancelled = repo.create(message="古いキャンセル", scheduled_at=at)
+        old_pending = repo.create(message="古いpending", scheduled_at=at)
+        new_sent = repo.create(message="新しい送信済み", scheduled_at=at)
+        repo.record_outcomes(sent=[old_sent, new_sent], failed=[(old_failed, "エラー")])
+        repo.cancel(old_cancelled)
+        for notification_id in (old_sent, old_failed, old_cancelled, old_pending):
+            _age(tmp_db, notification_id, days=40)
+
+        report = await retention.run()
+
+        assert report.rows_archived == 3
+        assert report.batches == 2
+        assert report.payload_bytes > 0
+        remaining = {
+            row["id"] for row in tmp_db.connection.execute("SELECT id FROM scheduled_notifications")
+        }
+        assert remaining == {old_pending, new_sent}
+
+        archive_file = tmp_path / datetime.now().strftime("archive-%Y%m.db")
+        archived = sqlite3.connect(archive_file).execute(
+            "SELECT id, status, message FROM scheduled_notifications_archive ORDER BY id"
+        ).fetchall()
+        assert [(row[0], row[1]) for row in archived] == [
+            (old_sent, "sent"),
+            (old_failed, "failed"),
+            (old_cancelled, "cancelled"),
+        ]
+        assert archived[0][2] == "古い送信済み"
+
+    @pytest.mark.asyncio
+    async def test_max_batches_limits_work(self, repo, tmp_db, retention):
+        ids = [repo.create(message=f"通知{i}", scheduled_at="2026-01-01T00:00:00") for i in range(5)]
+        repo.record_outcomes(sent=ids, failed=[])
+        for notification_id in ids:
+            _age(tmp_db, notification_id, days=40)
+
+        report = await retention.run(max_batches=1)
+        assert report.rows_archived == 2
+
+        report = await retention.run()
+        assert report.rows_archived == 3
+
+    @pytest.mark.asyncio
+    async def test_nothing_to_archive(self, repo, retention):
+        repo.create(message="pending", scheduled_at="2026-01-01T00:00:00")
+        report = await retention.run()
+        assert report.rows_archived == 0
+        assert report.batches == 0
+
+    @pytest.mark.asyncio
+    async def test_archives_attempt_history_of_dead_letters(self, repo, tmp_db, retention, tmp_path):
+        at = "2026-01-01T00:00:00"
+        now_ms = int(datetime.now().timestamp() * 1000)
+        row_id = repo.create(message="デッドレター", scheduled_at=at)
+        repo.claim_due(10, 60, "worker-a", now_ms)
+        repo.record_outcomes([], [], retries=[(row_id, "503", now_ms)])
+        repo.claim_due(10, 60, "worker-a", now_ms)
+        repo.record_outcomes([], [], dead=[(row_id, "503")])
+        _age(tmp_db, row_id, days=40)
+
+        await retention.run()
+
+        archive_file = tmp_path / datetime.now().strftime("archive-%Y%m.db")
+        row = sqlite3.connect(archive_file).execute(
+            "SELECT status, scheduled_at_ms, attempts, next_attempt_at_ms "
+            "FROM scheduled_notifications_archive"
+        ).fetchone()
+        assert row == ("dead", int(datetime.fromisoformat(at).timestamp() * 1000), 2, now_ms)
+
+    @pytest.mark.asyncio
+    async def test_adds_new_columns_to_existing_archive(self, repo, tmp_db, retention, tmp_path):
+        archive_file = tmp_path / datetime.now().strftime("archive-%Y%m.db")
+        legacy = sqlite3.connect(archive_file)
+        legacy.execute(
+            """
+            CREATE TABLE scheduled_notifications_archive (
+                id INTEGER PRIMARY KEY, message TEXT NOT NULL, title TEXT, color INTEGER,
+                scheduled_at TEXT NOT NULL, source TEXT, channel_id INTEGER,
+                status TEXT NOT NULL, sent_at TEXT, error_message TEXT, created_at TEXT,
+                archived_at TEXT DEFAULT (datetime('now', 'localtime'))
+            )
+            """
+        )
+        legacy.commit()
+        legacy.close()
+        row_id = repo.create(message="送信済み", scheduled_at="2026-01-01T00:00:00")
+        repo.record_outcomes(sent=[row_id], failed=[])
+        _age(tmp_db, row_id, days=40)
+
+        report = await retention.run()
+
+        assert report.rows_archived == 1
+        attempts = sqlite3.connect(archive_file).execute(
+            "SELECT attempts FROM scheduled_notifications_archive WHERE id = ?", (row_id,)
+        ).fetchone()[0]
+        assert attempts == 0
@@ -0,0 +1,44 @@
+"""再試行ポリシー テスト"""
+
+import asyncio
+from unittest.mock import MagicMock
+
+import aiohttp
+import discord
+
+from src.utils.retry import RetryPolicy, is_retryable
+
+
+def _http_error(status: int) -> discord.HTTPException:
+    return discord.HTTPException(MagicMock(status=status, reason="test"), "error")
+
+
+class TestIsRetryable:
+    def test_transient_errors(self):
+        assert is_retryable(_http_error(429))
+        assert is_retryable(_http_error(503))
+        assert is_retryable(aiohttp.ClientConnectionError())
+        assert is_retryable(asyncio.TimeoutError())
+
+    def test_permanent_errors(self):
+        assert not is_retryable(_http_error(403))
+        assert not is_retryable(_http_error(404))
+        assert not is_retryable(LookupError("Channel not found"))
+        assert not is_retryable(Exception("送信エラー"))
+
+
+class TestRetryPolicy:
+    def test_delay_grows_exponentially_with_jitter(self):
+        policy = RetryPolicy(base_delay=10.0, max_delay=1000.0)
+        for attempt, ceiling in [(1, 10.0), (2, 20.0), (3, 40.0), (4, 80.0)]:
+            for _ in range(50):
+                assert ceiling / 2 <= policy.delay(attempt) <= ceiling
+
+    def test_delay_is_capped(self):
+        policy = RetryPolicy(base_delay=10.0, max_delay=60.0)
+        assert all(30.0 <= policy.delay(20) <= 60.0 for _ in range(50))
+
+    def test_exhausted(self):
+        policy = RetryPolicy(max_attempts=3)
+        assert not policy.exhausted(2)
+        assert policy.exhausted(3)
@@ -0,0 +1,67 @@
+"""DeadlineScheduler テスト"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.utils.scheduler import DeadlineScheduler, parse_scheduled_at
+
+
+class TestDeadlineScheduler:
+    def test_pop_due_returns_only_past_deadlines(self):
+        scheduler = DeadlineScheduler()
+        now = datetime.now()
+        scheduler.push(now + timedelta(hours=1), 3)
+        scheduler.push(now - timedelta(minutes=1), 1)
+        scheduler.push(now - timedelta(seconds=1), 2)
+
+        assert scheduler.pop_due(now) == [1, 2]
+        assert len(scheduler) == 1
+        assert scheduler.next_deadline() == now + timedelta(hours=1)
+
+    def test_parse_scheduled_at(self):
+        assert parse_scheduled_at("2026-02-13T14:30:00") == datetime(2026, 2, 13, 14, 30)
+
+    @pytest.mark.asyncio
+    async def test_wait_next_sleeps_until_deadline(self):
+        scheduler = DeadlineScheduler()
+        scheduler.push(datetime.now() + timedelta(milliseconds=200), 1)
+
+        start = time.monotonic()
+        await scheduler.wait_next()
+        elapsed = time.monotonic() - start
+
+        assert 0.15 <= elapsed < 0.5
+
+    @pytest.mark.asyncio
+    async def test_earlier_push_wakes_waiter(self):
+        scheduler = DeadlineScheduler()
+        scheduler.push(datetime.now() + timedelta(hours=1), 1)
+
+        waiter = asyncio.create_task(scheduler.wait_next())
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+
+        start = time.monotonic()
+        scheduler.push(datetime.now() + timedelta(milliseconds=100), 2)
+        await asyncio.wait_for(waiter, timeout=1)
+
+        assert time.monotonic() - start < 0.5
+
+    @pytest.mark.asyncio
+    async def test_idle_waits_until_push(self):
+        scheduler = DeadlineScheduler()
+        waiter = asyncio.create_task(scheduler.wait_next())
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+
+        scheduler.push(datetime.now(), 1)
+        await asyncio.wait_for(waiter, timeout=1)
+
+    def test_parse_scheduled_at_with_timezone(self):
+        aware = datetime(2026, 2, 13, 5, 30).astimezone()
+        parsed = parse_scheduled_at(aware.isoformat())
+        assert parsed.tzinfo is None
+        assert parsed == datetime(2026, 2, 13, 5, 30)
@@ -0,0 +1,103 @@
+"""スレッド索引（scripts/thread_index.py）テスト"""
+
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import thread_index  # noqa: E402
+from fake_discord import FakeDiscord  # noqa: E402
+from thread_index import ThreadIndex  # noqa: E402
+
+
+@pytest.fixture
+def fake():
+    return FakeDiscord(threads=50, seed=4)
+
+
+@pytest.fixture
+def index(tmp_path):
+    with ThreadIndex(tmp_path / "threads.db") as index:
+        yield index
+
+
+def _threads(fake) -> list[dict]:
+    return [c for c in fake.channels.values() if c.get("thread_metadata")]
+
+
+class TestThreadIndex:
+    def test_threads_are_returned_newest_first(self, fake, index):
+        threads = _threads(fake)
+        index.upsert(threads, seen_ms=1)
+
+        rows = list(index.threads(fake.channel_id))
+
+        assert [t["id"] for t in rows] == sorted((t["id"] for t in threads), key=int, reverse=True)
+        assert index.count(fake.channel_id) == 50
+        assert {t["id"] for t in rows if t["thread_metadata"]["archived"]} == {
+            t["id"] for t in threads if t["thread_metadata"]["archived"]
+        }
+
+    def test_upsert_updates_existing_rows(self, fake, index):
+        thread = _threads(fake)[0]
+        index.upsert([thread], seen_ms=1)
+        renamed = {
+            **thread,
+            "name": "renamed",
+            "thread_metadata": {**thread["thread_metadata"], "archived": True},
+        }
+        index.upsert([renamed], seen_ms=2)
+
+        [row] = list(index.threads(fake.channel_id))
+        assert row["name"] == "renamed"
+        assert row["thread_metadata"]["archived"] is True
+
+    def test_below_id_and_nth_newest(self, fake, index):
+        threads = sorted(_threads(fake), key=lambda t: int(t["id"]), reverse=True)
+        index.upsert(threads, seen_ms=1)
+
+        tenth = index.nth_newest_id(fake.channel_id, 10)
+        assert tenth == int(threads[9]["id"])
+        assert [t["id"] for t in index.threads(fake.channel_id, below_id=tenth)] == [
+            t["id"] for t in threads[10:]
+        ]
+        assert index.nth_newest_id(fake.channel_id, 51) is None
+
+    def test_older_than_boundary(self, fake, index):
+        threads = _threads(fake)
+        index.upsert(threads, seen_ms=1)
+        cutoff = datetime.now(tz=timezone.utc) - timedelta(days=30)
+
+        rows = list(index.threads(fake.channel_id, below_id=thread_index.datetime_to_snowflake(cutoff)))
+
+        expected = {
+            t["id"] for t in threads
+            if thread_index.snowflake_to_ms(t["id"]) < cutoff.timestamp() * 1000
+        }
+        assert 0 < len(expected) < len(threads)
+        assert {t["id"] for t in rows} == expected
+
+    def test_remove_while_iterating_in_chunks(self, fake, index, monkeypatch):
+        monkeypatch.setattr(thread_index, "CHUNK_SIZE", 7)
+        index.upsert(_threads(fake), seen_ms=1)
+
+        seen = []
+        for t in index.threads(fake.channel_id):
+            seen.append(t["id"])
+            index.remove(t["id"])
+
+        assert len(seen) == len(set(seen)) == 50
+        assert index.count(fake.channel_id) == 0
+
+    def test_prune_active_only(self, fake, index):
+        threads = _threads(fake)
+        index.upsert(threads, seen_ms=1)
+        index.upsert(threads[:5], seen_ms=2)
+
+        stale_active = sum(not t["thread_metadata"]["archived"] for t in threads[5:])
+        assert index.prune(fake.channel_id, 2, active_only=True) == stale_active
+        assert index.prune(fake.channel_id, 2, active_only=False) == 45 - stale_active
+        assert index.count(fake.channel_id) == 5
@@ -0,0 +1,122 @@
+"""TodoistSyncSource テスト — ローカルのSync APIスタンドインを相手に動かす"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.cogs.watchdog import TodoistSyncSource
+
+
+def _item(item_id, due, **kwargs):
+    return {"id": item_id, "content": f"タスク{item_id}", "due": {"date": due} if due else None, **kwargs}
+
+
+class FakeTodoistSync:
+    """sync_token ごとに用意したレスポンスを返す Sync API のスタンドイン。"""
+
+    def __init__(self):
+        self.responses: dict[str, dict] = {}
+        self.requests: list[dict] = []
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if request.headers.get("Authorization") != "Bearer test-token":
+            return web.json_response({"error": "unauthorized"}, status=401)
+        form = dict(await request.post())
+        self.requests.append(form)
+        return web.json_response(self.responses[form["sync_token"]])
+
+
+@pytest_asyncio.fixture
+async def todoist():
+    fake = FakeTodoistSync()
+    app = web.Application()
+    app.router.add_post("/api/v1/sync", fake.handle)
+    server = TestServer(app)
+    await server.start_server()
+    fake.url = str(server.make_url("/api/v1/sync"))
+    yield fake
+    await server.close()
+
+
+@pytest_asyncio.fixture
+async def source(todoist):
+    source = TodoistSyncSource("test-token", url=todoist.url)
+    yield source
+    await source.close()
+
+
+YESTERDAY = (date.today() - timedelta(days=1)).isoformat()
+TOMORROW = (date.today() + timedelta(days=1)).isoformat()
+HOUR_AGO = (datetime.now() - timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+class TestTodoistSyncSource:
+    @pytest.mark.asyncio
+    async def test_full_then_incremental_sync(self, todoist, source):
+        todoist.responses["*"] = {
+            "sync_token": "t1",
+            "full_sync": True,
+            "items": [
+                _item("1", YESTERDAY),
+                _item("2", TOMORROW),
+                _item("3", HOUR_AGO),
+                _item("4", None),
+            ],
+        }
+        todoist.responses["t1"] = {
+            "sync_token": "t2",
+            "full_sync": False,
+            "items": [
+                _item("1", YESTERDAY, checked=True),
+                _item("5", YESTERDAY),
+            ],
+        }
+
+        first = await source.fetch_overdue()
+        assert {t["id"] for t in first} == {"1", "3"}
+        assert {t["due"] for t in first} == {YESTERDAY, HOUR_AGO}
+
+        second = await source.fetch_overdue()
+        assert {t["id"] for t in second} == {"3", "5"}
+        assert [r["sync_token"] for r in todoist.requests] == ["*", "t1"]
+        assert todoist.requests[1]["resource_types"] == '["items"]'
+
+    @pytest.mark.asyncio
+    async def test_deleted_items_leave_index(self, todoist, source):
+        todoist.responses["*"] = {"sync_token": "t1", "full_sync": True, "items": [_item("1", YESTERDAY)]}
+        todoist.responses["t1"] = {"sync_token": "t2", "items": [_item("1", YESTERDAY, is_deleted=True)]}
+
+        assert len(await source.fetch_overdue()) == 1
+        assert await source.fetch_overdue() == []
+
+    @pytest.mark.asyncio
+    async def test_error_returns_empty(self, todoist):
+        source = TodoistSyncSource("wrong-token", url=todoist.url)
+        try:
+            assert await source.fetch_overdue() == []
+        finally:
+            await source.close()
+
+
+class TestIsOverdue:
+    def test_date_only(self):
+        now = datetime(2026, 2, 13, 9, 0)
+        assert TodoistSyncSource.is_overdue({"due": {"date": "2026-02-12"}}, now)
+        assert not TodoistSyncSource.is_overdue({"due": {"date": "2026-02-13"}}, now)
+
+    def test_datetime(self):
+        now = datetime(2026, 2, 13, 9, 0)
+        assert TodoistSyncSource.is_overdue({"due": {"date": "2026-02-13T08:59:00"}}, now)
+        assert not TodoistSyncSource.is_overdue({"due": {"date": "2026-02-13T09:30:00"}}, now)
+
+    def test_utc_datetime(self):
+        now = datetime.now()
+        past = (datetime.utcnow() - timedelta(minutes=5)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        assert TodoistSyncSource.is_overdue({"due": {"date": past}}, now)
+
+    def test_no_due(self):
+        assert not TodoistSyncSource.is_overdue({"due": None}, datetime.now())
+        assert not TodoistSyncSource.is_overdue({"due": {"date": "bogus"}}, datetime.now())
@@ -1,12 +1,15 @@
 """WatchdogCog テスト"""
 
+import asyncio
 import json
+import time
 from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
 from src.cogs.watchdog import WatchdogCog
+from src.database.watchdog_repository import WatchdogStateRepository
 
 
 @pytest.fixture
@@ -18,6 +21,7 @@ def mock_bot():
     mock_channel = AsyncMock()
     mock_channel.send = AsyncMock()
     bot.get_channel = MagicMock(return_value=mock_channel)
+    bot.resolve_channel = AsyncMock(return_value=mock_channel)
     return bot
 
 
@@ -26,6 +30,19 @@ def cog(mock_bot):
     return WatchdogCog(mock_bot)
 
 
+@pytest.fixture
+def fake_todoist(tmp_path):
+    """todoist.sh の代わりに任意のシェルスクリプトを実行させるfixture。"""
+    script = tmp_path / "todoist.sh"
+
+    def install(body: str) -> None:
+        script.write_text(f"#!/bin/sh\n{body}\n")
+        script.chmod(0o755)
+
+    with patch("src.cogs.watchdog.TODOIST_SH", str(script)):
+        yield install
+
+
 class TestWatchdogCog:
     def test_is_active_hours(self, cog):
         with patch("src.cogs.watchdog.datetime") as mock_dt:
@@ -51,25 +68,65 @@ class TestWatchdogCog:
 
         assert len(cog._notified_today) == 0
 
-    @patch("src.cogs.watchdog.subprocess.run")
-    def test_fetch_overdue_tasks_success(self, mock_run, cog):
+    @pytest.mark.asyncio
+    async def test_fetch_overdue_tasks_success(self, cog, fake_todoist):
         tasks = [{"id": "1", "content": "テスト", "due": "2026-02-12"}]
-        mock_run.return_value = MagicMock(
-            returncode=0,
-            stdout=json.dumps(tasks),
-        )
-        result = cog._fetch_overdue_tasks()
+        fake_todoist(f"echo '{json.dumps(tasks, ensure_ascii=False)}'")
+
+        result = await cog._fetch_overdue_tasks()
         assert len(result) == 1
         assert result[0]["content"] == "テスト"
 
-    @patch("src.cogs.watchdog.subprocess.run")
-    def test_fetch_overdue_tasks_failure(self, mock_run, cog):
-        mock_run.return_value = MagicMock(
-            returncode=1,
-            stderr="error",
-        )
-        result = cog._fetch_overdue_tasks()
+    @pytest.mark.asyncio
+    async def test_fetch_overdue_tasks_failure(self, cog, fake_todoist):
+        fake_todoist("echo error >&2; exit 1")
+
+        result = await cog._fetch_overdue_tasks()
+        assert result == []
+
+    @pytest.mark.asyncio
+    async def test_fetch_overdue_tasks_invalid_json(self, cog, fake_todoist):
+        fake_todoist("echo 'not json'")
+
+        result = await cog._fetch_overdue_tasks()
+        assert result == []
+
+    @pytest.mark.asyncio
+    async def test_fetch_overdue_tasks_missing_script(self, cog, tmp_path):
+        with patch("src.cogs.watchdog.TODOIST_SH", str(tmp_path / "missing.sh")):
+            result = await cog._fetch_overdue_tasks()
+        assert result == []
+
+    @pytest.mark.asyncio
+    async def test_fetch_overdue_tasks_timeout_kills_child(self, cog, fake_todoist, tmp_path):
+        marker = tmp_path / "finished"
+        fake_todoist(f"sleep 5; touch {marker}")
+
+        with patch("src.cogs.watchdog.FETCH_TIMEOUT", 0.2):
+            start = time.monotonic()
+            result = await cog._fetch_overdue_tasks()
+
         assert result == []
+        assert time.monotonic() - start < 2
+        await asyncio.sleep(0.1)
+        assert not marker.exists()
+
+    @pytest.mark.asyncio
+    async def test_fetch_overdue_tasks_does_not_block_loop(self, cog, fake_todoist):
+        fake_todoist("sleep 0.3; echo '[]'")
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await cog._fetch_overdue_tasks()
+        task.cancel()
+
+        assert ticks > 10
 
     @pytest.mark.asyncio
     @patch.object(WatchdogCog, "_fetch_overdue_tasks")
@@ -114,3 +171,124 @@ class TestWatchdogCog:
         await cog.check_overdue()
         channel = mock_bot.get_channel(123456789)
         channel.send.assert_not_called()
+
+
+class TestTaskSource:
+    @pytest.mark.asyncio
+    async def test_uses_injected_source(self, mock_bot):
+        source = MagicMock()
+        source.fetch_overdue = AsyncMock(return_value=[{"id": "x", "content": "注入", "due": "2026-02-12"}])
+        source.close = AsyncMock()
+        cog = WatchdogCog(mock_bot, source)
+
+        assert await cog._fetch_overdue_tasks() == source.fetch_overdue.return_value
+
+        await cog.cog_unload()
+        source.close.assert_awaited_once()
+
+
+class TestPersistentDedup:
+    @pytest.mark.asyncio
+    @patch.object(WatchdogCog, "_fetch_overdue_tasks")
+    @patch.object(WatchdogCog, "_is_active_hours", return_value=True)
+    async def test_dedup_survives_restart(self, mock_active, mock_fetch, mock_bot, tmp_db):
+        mock_fetch.return_value = [
+            {"id": "task1", "content": "期限切れ1", "due": "2026-02-12"},
+            {"id": "task2", "content": "期限切れ2", "due": "2026-02-11"},
+        ]
+        channel = mock_bot.get_channel(123456789)
+
+        first = WatchdogCog(mock_bot, state_repo=WatchdogStateRepository(tmp_db))
+        await first._load_state()
+        await first.check_overdue()
+        assert channel.send.call_count == 1
+
+        # 再起動: 新しいCogでも通知済みが復元される
+        restarted = WatchdogCog(mock_bot, state_repo=WatchdogStateRepository(tmp_db))
+        await restarted._load_state()
+        assert restarted._notified_today == {"task1", "task2"}
+        await restarted.check_overdue()
+        assert channel.send.call_count == 1
+
+    @pytest.mark.asyncio
+    @patch.object(WatchdogCog, "_fetch_overdue_tasks")
+    @patch.object(WatchdogCog, "_is_active_hours", return_value=True)
+    async def test_dedup_survives_restart_with_integer_ids(
+        self, mock_active, mock_fetch, mock_bot, tmp_db
+    ):
+        mock_fetch.return_value = [{"id": 12345, "content": "期限切れ", "due": "2026-02-12"}]
+        channel = mock_bot.get_channel(123456789)
+
+        first = WatchdogCog(mock_bot, state_repo=WatchdogStateRepository(tmp_db))
+        await first._load_state()
+        await first.check_overdue()
+
+        restarted = WatchdogCog(mock_bot, state_repo=WatchdogStateRepository(tmp_db))
+        await restarted._load_state()
+        await restarted.check_overdue()
+        assert channel.send.call_count == 1
+
+    @pytest.mark.asyncio
+    @patch.object(WatchdogCog, "_fetch_overdue_tasks")
+    @patch.object(WatchdogCog, "_is_active_hours", return_value=True)
+    async def test_purge_failure_does_not_stop_check(
+        self, mock_active, mock_fetch, mock_bot, tmp_db
+    ):
+        mock_fetch.return_value = [{"id": "task1", "content": "期限切れ", "due": "2026-02-12"}]
+        state = WatchdogStateRepository(tmp_db)
+        state.purge_before = AsyncMock(side_effect=RuntimeError("database is locked"))
+        cog = WatchdogCog(mock_bot, state_repo=state)
+        cog._last_reset_date = "2000-01-01"
+
+        await cog.check_overdue()
+
+        state.purge_before.assert_awaited_once()
+        assert mock_bot.get_channel(123456789).send.call_count == 1
+
+    @pytest.mark.asyncio
+    @patch.object(WatchdogCog, "_fetch_overdue_tasks")
+    @patch.object(WatchdogCog, "_is_active_hours", return_value=True)
+    async def test_failed_send_is_retried_next_check(
+        self, mock_active, mock_fetch, mock_bot, tmp_db
+    ):
+        mock_fetch.return_value = [{"id": "task1", "content": "期限切れ", "due": "2026-02-12"}]
+        channel = mock_bot.get_channel(123456789)
+        channel.send.side_effect = [RuntimeError("503 Service Unavailable"), None]
+        state = WatchdogStateRepository(tmp_db)
+        cog = WatchdogCog(mock_bot, state_repo=state)
+        await cog._load_state()
+
+        await cog.check_overdue()
+        assert cog._notified_today == set()
+        assert await state.load(cog._last_reset_date) == set()
+
+        await cog.check_overdue()
+        assert channel.send.call_count == 2
+        assert await state.load(cog._last_reset_date) == {"task1"}
+
+    @pytest.mark.asyncio
+    @patch.object(WatchdogCog, "_fetch_overdue_tasks")
+    @patch.object(WatchdogCog, "_is_active_hours", return_value=True)
+    async def test_unresolved_channel_does_not_mark_notified(
+        self, mock_active, mock_fetch, mock_bot, tmp_db
+    ):
+        mock_fetch.return_value = [{"id": "task1", "content": "期限切れ", "due": "2026-02-12"}]
+        mock_bot.resolve_channel = AsyncMock(return_value=None)
+        state = WatchdogStateRepository(tmp_db)
+        cog = WatchdogCog(mock_bot, state_repo=state)
+        await cog._load_state()
+
+        await cog.check_overdue()
+
+        assert cog._notified_today == set()
+        assert await state.load(cog._last_reset_date) == set()
+
+    @pytest.mark.asyncio
+    async def test_purge_before(self, tmp_db):
+        state = WatchdogStateRepository(tmp_db)
+        await state.add_many("2026-02-12", ["a", "b"])
+        await state.add_many("2026-02-13", ["a", "a"])
+
+        assert await state.purge_before("2026-02-13") == 2
+        assert await state.load("2026-02-12") == set()
+        assert await state.load("2026-02-13") == {"a"}